@@ -2,8 +2,23 @@
 通用驗證器
 提供 API 回應的驗證功能
 """
+import gzip
+import io
+import reprlib
+from itertools import islice
+
+import config
+from common import json_codec
 from common.file_process import FileProcess
-from deepdiff import DeepDiff
+
+# 差異預覽：巢狀最多 3 層、每個列表 / dict 最多 5 筆、字串最多 80 字元
+_PREVIEW_REPR = reprlib.Repr()
+_PREVIEW_REPR.maxlevel = 3
+_PREVIEW_REPR.maxdict = 5
+_PREVIEW_REPR.maxlist = 5
+_PREVIEW_REPR.maxtuple = 5
+_PREVIEW_REPR.maxstring = 80
+_PREVIEW_REPR.maxother = 80
 
 
 class Validator:
@@ -12,6 +27,20 @@ class Validator:
     
     用於驗證 API 回應是否符合預期結果
     """
+    # 同質物件列表（例如分頁的 data[]）達此筆數時改為逐欄（columnar）比對
+    COLUMNAR_MIN_ROWS = 100
+    # 差異最多列出的筆數（其餘只計數）與每個值預覽的字元數上限
+    MAX_REPORTED_DIFFS = 20
+    PREVIEW_CHARS = 200
+
+    # 只有一側有值的差異類型
+    ADDED_TYPES = ('dictionary_item_added', 'iterable_item_added', 'set_item_added', 'attribute_added')
+    DIFF_HEADINGS = {
+        'dictionary_item_added': 'Items added',
+        'dictionary_item_removed': 'Items Removed',
+        'iterable_item_added': 'Iterable items added',
+        'iterable_item_removed': 'Iterable items removed',
+    }
     
     def __init__(
         self,
@@ -35,12 +64,16 @@ class Validator:
         """
         執行驗證
         
-        比較實際回應和預期結果，並顯示差異
+        比較實際回應和預期結果，並顯示差異（root_check 不一致時已輸出差異，不再重複計算；
+        比對過程發生其他錯誤時改以 DeepDiff 重新輸出差異後再判定）
         """
         try:
             self.root_check(self.resp_json, self.expected_resp)
-        except (KeyError, AssertionError):
-            self.find_different(self.expected_resp, self.resp_json)
+        except AssertionError:
+            raise
+        except Exception as error:
+            print(f"Diff failed ({error!r}); retrying with DeepDiff only")
+            self.find_different(self.expected_resp, self.resp_json, columnar=False)
             assert self.resp_json == self.expected_resp
     
     def root_check(self, response: dict, expected: dict):
@@ -51,83 +84,225 @@ class Validator:
             response: 實際回應
             expected: 預期結果
         """
+        # 完全相同時不需計算差異
+        if response == expected:
+            return
         self.find_different(expected, response)
         assert response == expected
     
-    def find_different(self, expected_resp: dict, resp_json: dict):
+    def find_different(self, expected_resp: dict, resp_json: dict, columnar: bool = True):
         """
         找出差異並格式化輸出
-        
+
+        只輸出前 MAX_REPORTED_DIFFS 筆差異與各類型的筆數，文件與值以截斷的預覽顯示；
+        DIFF_ATTACHMENT=true 時另將完整差異以 gzip 壓縮的 JSON Lines 附加到 Allure 報告
+
         Args:
             expected_resp: 預期回應
             resp_json: 實際回應
+            columnar: 是否對大型物件列表使用逐欄比對（False 時全部交給 DeepDiff）
         """
-        def format_value_changes(path: str, value: dict) -> str:
-            return (
-                "Value of items been Changes:\n"
-                f"Path: {path}\n"
-                f"Expected value: {value['old_value']}\n"
-                f"Actual value: {value['new_value']}\n"
-            )
-        
-        def format_type_changes(key: str, change: dict) -> str:
-            return (
-                "Type of items been Changes:\n"
-                f"Path: {key}\n"
-                f"Expected type: {change['old_type']}\n"
-                f"Actual type: {change['new_type']}\n"
-            )
-        
-        def format_added_items(items: list) -> str:
-            result = "Items added:\n"
-            for item in items:
-                if isinstance(item, str):
-                    value = self._get_simple_value(resp_json, item)
-                    result += f"- {item} = {value}\n"
-                else:
-                    result += f"- {item}\n"
-            return result
-        
-        def format_removed_items(items: list) -> str:
-            result = "Items Removed:\n"
-            for item in items:
-                if isinstance(item, str):
-                    value = self._get_simple_value(expected_resp, item)
-                    result += f"- {item} = {value}\n"
+        diff = self._diff(expected_resp, resp_json, columnar)
+        if not diff:
+            return
+
+        counts = {change_type: len(changes) for change_type, changes in diff.items() if changes}
+        total = sum(counts.values())
+        print("=== Show Matching details if DeepDiff error ===")
+        print(f"expected result: {self._preview(expected_resp)}\n")
+        print(f"actual result: {self._preview(resp_json)}")
+        print("==================")
+        print(
+            f"Differences: {total} ("
+            + ", ".join(f"{change_type}: {count}" for change_type, count in counts.items())
+            + ")\n"
+        )
+
+        heading = None
+        entries = self._iter_diff(diff, expected_resp, resp_json)
+        for change_type, path, expected, actual in islice(entries, self.MAX_REPORTED_DIFFS):
+            if change_type == 'values_changed':
+                print(
+                    "Value of items been Changes:\n"
+                    f"Path: {path}\n"
+                    f"Expected value: {self._preview(expected)}\n"
+                    f"Actual value: {self._preview(actual)}\n"
+                )
+            elif change_type == 'type_changes':
+                print(
+                    "Type of items been Changes:\n"
+                    f"Path: {path}\n"
+                    f"Expected type: {type(expected)}\n"
+                    f"Actual type: {type(actual)}\n"
+                )
+            else:
+                if heading != change_type:
+                    if heading is not None:
+                        print()
+                    heading = change_type
+                    print(f"{self.DIFF_HEADINGS.get(change_type, change_type)}:")
+                value = actual if change_type in self.ADDED_TYPES else expected
+                print(f"- {path} = {self._preview(value)}")
+        if total > self.MAX_REPORTED_DIFFS:
+            print(f"\n... and {total - self.MAX_REPORTED_DIFFS} more difference(s)")
+
+        if str(config.DIFF_ATTACHMENT).lower() in ('true', '1', 'yes'):
+            self._attach_full_diff(self._iter_diff(diff, expected_resp, resp_json))
+
+    def _iter_diff(self, diff: dict, expected_resp, resp_json):
+        """
+        逐筆產生差異（不一次展開全部）
+
+        Yields:
+            tuple: (change_type, path, 預期值, 實際值)；該側不存在時為 None
+        """
+        for change_type, changes in diff.items():
+            if isinstance(changes, dict):
+                for path, change in changes.items():
+                    if isinstance(change, dict) and ('old_value' in change or 'new_value' in change):
+                        yield change_type, path, change.get('old_value'), change.get('new_value')
+                    elif change_type in self.ADDED_TYPES:
+                        yield change_type, path, None, change
+                    else:
+                        yield change_type, path, change, None
+            else:
+                for path in changes:
+                    if change_type in self.ADDED_TYPES:
+                        yield change_type, path, None, self._get_simple_value(resp_json, path)
+                    else:
+                        yield change_type, path, self._get_simple_value(expected_resp, path), None
+
+    def _preview(self, value) -> str:
+        """有上限的 repr：巢狀層數、列表 / dict 筆數與字串長度皆截斷，不會先序列化整份文件"""
+        text = _PREVIEW_REPR.repr(value)
+        if len(text) > self.PREVIEW_CHARS:
+            text = f"{text[:self.PREVIEW_CHARS]}... ({len(text)} chars)"
+        return text
+
+    def _attach_full_diff(self, entries):
+        """將完整差異以 gzip 壓縮的 JSON Lines 附加到 Allure 報告"""
+        import allure
+
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as compressed:
+            for change_type, path, expected, actual in entries:
+                record = {'type': change_type, 'path': path, 'expected': expected, 'actual': actual}
+                try:
+                    line = json_codec.dumps_bytes(record)
+                except (TypeError, ValueError):
+                    # JSON 無法表示的值（例如 DeepDiff 的型別物件）改為 repr
+                    record['expected'], record['actual'] = repr(expected), repr(actual)
+                    line = json_codec.dumps_bytes(record)
+                compressed.write(line + b'\n')
+        allure.attach(
+            buffer.getvalue(), name=f'{self.api_tag} full diff', extension='jsonl.gz')
+
+    def _diff(self, expected, actual, columnar: bool = True) -> dict:
+        """
+        計算差異（格式同 DeepDiff 的 values_changed / type_changes / dictionary_item_added / removed）
+
+        大型同質物件列表先以 _columnar_diff 逐欄比對（columnar=True 時），其餘部分才交給 DeepDiff。
+        """
+        diff = {}
+        if columnar:
+            expected, actual = self._extract_record_lists(expected, actual, 'root', diff)
+        self._merge_diff(diff, self._deep_diff(expected, actual), 'root')
+        return diff
+
+    def _deep_diff(self, expected, actual):
+        if expected == actual:
+            return {}
+        # deepdiff 載入成本高，僅在實際比對時才 import
+        from deepdiff import DeepDiff
+
+        return DeepDiff(expected, actual)
+
+    @staticmethod
+    def _merge_diff(diff: dict, other, prefix: str):
+        """將以 root 為起點的差異併入 diff，路徑改以 prefix 為起點"""
+        for change_type, changes in other.items():
+            if isinstance(changes, dict):
+                target = diff.setdefault(change_type, {})
+                for path, change in changes.items():
+                    target[prefix + path[len('root'):]] = change
+            else:
+                target = diff.setdefault(change_type, [])
+                target.extend(prefix + path[len('root'):] for path in changes)
+
+    def _is_record_list(self, value) -> bool:
+        """是否為欄位相同的物件列表（list of dict）"""
+        if not isinstance(value, list) or len(value) < self.COLUMNAR_MIN_ROWS:
+            return False
+        if not isinstance(value[0], dict):
+            return False
+        keys = value[0].keys()
+        return all(type(row) is dict and row.keys() == keys for row in value)
+
+    def _extract_record_lists(self, expected, actual, path: str, diff: dict):
+        """
+        找出兩邊位置相同、筆數與欄位相同的大型物件列表，逐欄比對後從文件中移除
+
+        Returns:
+            tuple: 移除這些列表後的 (expected, actual)（淺複製，不修改原資料）
+        """
+        if (
+            self._is_record_list(expected)
+            and self._is_record_list(actual)
+            and len(expected) == len(actual)
+            and expected[0].keys() == actual[0].keys()
+        ):
+            self._columnar_diff(expected, actual, path, diff)
+            return None, None
+        if not (isinstance(expected, dict) and isinstance(actual, dict)):
+            return expected, actual
+        expected, actual = dict(expected), dict(actual)
+        for key in expected:
+            if key in actual:
+                expected[key], actual[key] = self._extract_record_lists(
+                    expected[key], actual[key], f"{path}[{key!r}]", diff)
+        return expected, actual
+
+    def _columnar_diff(self, expected_rows: list, actual_rows: list, path: str, diff: dict):
+        """
+        以 NumPy 逐欄比對兩個同質物件列表，只記錄不一致的列索引與欄位
+
+        型別不同記為 type_changes；值不同的純量記為 values_changed（兩側皆為 NaN 不算），
+        巢狀值（dict / list）再以 DeepDiff 比對該格以取得細節。
+        """
+        import numpy as np
+
+        count = len(expected_rows)
+        for field in expected_rows[0]:
+            expected_column = np.fromiter(
+                (row[field] for row in expected_rows), dtype=object, count=count)
+            actual_column = np.fromiter(
+                (row[field] for row in actual_rows), dtype=object, count=count)
+
+            expected_types = np.fromiter(map(type, expected_column), dtype=object, count=count)
+            actual_types = np.fromiter(map(type, actual_column), dtype=object, count=count)
+            type_mismatch = expected_types != actual_types
+            # x != x 只對 NaN 成立：兩側皆為 NaN 的格視為相同（與 DeepDiff 比對列表元素的結果一致）
+            both_nan = (expected_column != expected_column) & (actual_column != actual_column)
+            value_mismatch = (expected_column != actual_column) & ~type_mismatch & ~both_nan
+
+            for index in np.flatnonzero(type_mismatch):
+                diff.setdefault('type_changes', {})[f"{path}[{index}][{field!r}]"] = {
+                    'old_type': expected_types[index],
+                    'new_type': actual_types[index],
+                    'old_value': expected_column[index],
+                    'new_value': actual_column[index],
+                }
+            for index in np.flatnonzero(value_mismatch):
+                cell_path = f"{path}[{index}][{field!r}]"
+                old_value, new_value = expected_column[index], actual_column[index]
+                if isinstance(old_value, (dict, list)):
+                    self._merge_diff(diff, self._deep_diff(old_value, new_value), cell_path)
                 else:
-                    result += f"- {item}\n"
-            return result
-        
-        diff_handlers = {
-            'values_changed': lambda diff: [
-                format_value_changes(path, value)
-                for path, value in diff['values_changed'].items()
-            ],
-            'type_changes': lambda diff: [
-                format_type_changes(key, change)
-                for key, change in diff['type_changes'].items()
-            ],
-            'dictionary_item_added': lambda diff: [
-                format_added_items(diff['dictionary_item_added'])
-            ],
-            'dictionary_item_removed': lambda diff: [
-                format_removed_items(diff['dictionary_item_removed'])
-            ]
-        }
-        
-        diff = DeepDiff(expected_resp, resp_json)
-        
-        if diff:
-            print("=== Show Matching details if DeepDiff error ===")
-            print(f"expected result: {expected_resp}\n")
-            print(f"actual result: {resp_json}")
-            print("==================")
-        
-        for change_type, handler in diff_handlers.items():
-            if change_type in diff:
-                for output in handler(diff):
-                    print(output)
-    
+                    diff.setdefault('values_changed', {})[cell_path] = {
+                        'old_value': old_value,
+                        'new_value': new_value,
+                    }
+
     def _get_simple_value(self, data: dict, path: str):
         """
         根據路徑取得值
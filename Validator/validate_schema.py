@@ -0,0 +1,230 @@
+"""
+Schema 驗證器
+只驗證 API 回應的結構（型別、必要欄位、列舉值），不需每個案例的 expected_result JSON。
+每個 api_tag 的 schema 只編譯一次成巢狀檢查函式，並於行程內快取。
+
+支援的 JSON Schema 關鍵字（子集）：
+  type, enum, const, properties, required, additionalProperties, items,
+  minItems, maxItems, minimum, maximum, minLength, maxLength, pattern
+另支援 "$enum": "<common.constants 的常數名稱>"，例如 {"$enum": "ADDRESS_TYPES"}。
+"""
+import re
+import threading
+
+import common.constants as constants
+from common.file_process import FileProcess
+
+# 最多列出的違規數量（其餘只計數）
+MAX_REPORTED_ERRORS = 20
+
+_TYPES = {
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'null': lambda value: value is None,
+}
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def _resolve_enum(name: str) -> list:
+    """由 common.constants 取得列舉值"""
+    values = getattr(constants, name, None)
+    if not isinstance(values, (list, tuple, set, frozenset)):
+        raise ValueError(f'Unknown enum constant in schema: {name}')
+    return list(values)
+
+
+def compile_schema(schema: dict):
+    """
+    將 schema 編譯為檢查函式
+
+    Args:
+        schema: JSON Schema（子集）
+
+    Returns:
+        callable: check(value, path, errors)，違規時將 (path, 訊息) 加入 errors
+    """
+    checks = []
+
+    if 'type' in schema:
+        names = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+        type_checks = [_TYPES[name] for name in names]
+        expected_type = ' | '.join(names)
+
+        def check_type(value, path, errors):
+            if not any(type_check(value) for type_check in type_checks):
+                errors.append((path, f'expected type {expected_type}, got {type(value).__name__}'))
+                return False
+            return True
+        checks.append(check_type)
+
+    if 'enum' in schema or '$enum' in schema:
+        allowed = schema['enum'] if 'enum' in schema else _resolve_enum(schema['$enum'])
+        allowed_set = frozenset(allowed)
+
+        def check_enum(value, path, errors):
+            try:
+                valid = value in allowed_set
+            except TypeError:
+                valid = value in allowed
+            if not valid:
+                errors.append((path, f'{value!r} is not one of {allowed}'))
+            return True
+        checks.append(check_enum)
+
+    if 'const' in schema:
+        const = schema['const']
+
+        def check_const(value, path, errors):
+            if value != const:
+                errors.append((path, f'expected {const!r}, got {value!r}'))
+            return True
+        checks.append(check_const)
+
+    bounds = [
+        ('minimum', lambda value, limit: value >= limit, 'less than minimum'),
+        ('maximum', lambda value, limit: value <= limit, 'greater than maximum'),
+    ]
+    for keyword, compare, message in bounds:
+        if keyword in schema:
+            checks.append(_make_bound_check(
+                schema[keyword], compare, message, (int, float), lambda value: value))
+    lengths = [
+        ('minLength', str, lambda value, limit: value >= limit, 'shorter than minLength'),
+        ('maxLength', str, lambda value, limit: value <= limit, 'longer than maxLength'),
+        ('minItems', list, lambda value, limit: value >= limit, 'fewer than minItems'),
+        ('maxItems', list, lambda value, limit: value <= limit, 'more than maxItems'),
+    ]
+    for keyword, value_type, compare, message in lengths:
+        if keyword in schema:
+            checks.append(_make_bound_check(schema[keyword], compare, message, value_type, len))
+
+    if 'pattern' in schema:
+        pattern = re.compile(schema['pattern'])
+
+        def check_pattern(value, path, errors):
+            if isinstance(value, str) and not pattern.search(value):
+                errors.append((path, f'{value!r} does not match {pattern.pattern!r}'))
+            return True
+        checks.append(check_pattern)
+
+    if 'properties' in schema or 'required' in schema or 'additionalProperties' in schema:
+        properties = {
+            key: compile_schema(sub_schema)
+            for key, sub_schema in schema.get('properties', {}).items()
+        }
+        required = list(schema.get('required', []))
+        additional = schema.get('additionalProperties', True)
+        additional_check = compile_schema(additional) if isinstance(additional, dict) else None
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return True
+            for key in required:
+                if key not in value:
+                    errors.append((f'{path}[{key!r}]', 'required property is missing'))
+            for key, item in value.items():
+                item_check = properties.get(key)
+                if item_check is not None:
+                    item_check(item, f'{path}[{key!r}]', errors)
+                elif additional is False:
+                    errors.append((f'{path}[{key!r}]', 'additional property is not allowed'))
+                elif additional_check is not None:
+                    additional_check(item, f'{path}[{key!r}]', errors)
+            return True
+        checks.append(check_object)
+
+    if 'items' in schema:
+        item_check = compile_schema(schema['items'])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for index, item in enumerate(value):
+                    item_check(item, f'{path}[{index}]', errors)
+            return True
+        checks.append(check_items)
+
+    def check(value, path, errors):
+        for single_check in checks:
+            # 型別不符時不再檢查其他關鍵字，避免重複的錯誤
+            if not single_check(value, path, errors):
+                return
+    return check
+
+
+def _make_bound_check(limit, compare, message, value_type, measure):
+    def check_bound(value, path, errors):
+        if (
+            isinstance(value, value_type)
+            and not isinstance(value, bool)
+            and not compare(measure(value), limit)
+        ):
+            errors.append((path, f'{value!r} is {message} {limit}'))
+        return True
+    return check_bound
+
+
+def get_compiled(api_tag: str, schema_path: str):
+    """取得 api_tag 的已編譯檢查函式（每個行程每個 schema 只編譯一次）"""
+    key = (api_tag, schema_path)
+    check = _compiled.get(key)
+    if check is None:
+        with _compiled_lock:
+            check = _compiled.get(key)
+            if check is None:
+                check = _compiled[key] = compile_schema(FileProcess.read_json(schema_path))
+    return check
+
+
+class SchemaValidator:
+    """
+    Schema 驗證器
+
+    以 api_tag 對應的 schema 驗證回應結構，不讀取 expected_result JSON
+    （介面同 Validator 的 validate()，但不繼承 Validator：沒有 expected_result 可載入）
+    """
+
+    def __init__(
+        self,
+        api_tag: str,
+        resp_json: dict,
+        schema_path: str
+    ):
+        """
+        初始化驗證器
+
+        Args:
+            api_tag: API 標籤（schema 快取的鍵）
+            resp_json: 實際 API 回應 JSON
+            schema_path: schema JSON 檔案路徑
+        """
+        self.api_tag = api_tag
+        self.resp_json = resp_json
+        self.schema_path = schema_path
+        self.check = get_compiled(api_tag, schema_path)
+
+    def validate(self):
+        """
+        執行驗證
+
+        列出不符合 schema 的路徑與原因（最多 MAX_REPORTED_ERRORS 筆）
+        """
+        errors = []
+        self.check(self.resp_json, 'root', errors)
+        if errors:
+            self.show_errors(errors)
+        assert not errors, f'{len(errors)} schema violation(s) for {self.api_tag}'
+
+    def show_errors(self, errors: list):
+        print("=== Show Schema violations ===")
+        print(f"schema: {self.schema_path}")
+        print("==================")
+        for path, message in errors[:MAX_REPORTED_ERRORS]:
+            print(f"Path: {path}\n{message}\n")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            print(f"... and {len(errors) - MAX_REPORTED_ERRORS} more violation(s)")
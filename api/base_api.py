@@ -2,9 +2,14 @@
 API 基礎類別
 封裝 HTTP 請求的通用邏輯
 """
+import time
+
 import requests
 
 import config
+from api import case_metrics, coalesce, download, http_cache, replay, retry
+from api import governor as rate_governor
+from common import compression, json_codec
 
 
 class BaseAPI:
@@ -13,8 +18,14 @@ class BaseAPI:
 
     提供統一的 HTTP 請求方法
     """
-    service_a_base_url = config.SERVICE_A_BASE_URL
-    version = config.VERSION
+
+    @property
+    def service_a_base_url(self):
+        return config.SERVICE_A_BASE_URL
+
+    @property
+    def version(self):
+        return config.VERSION
 
     def request(
         self,
@@ -22,6 +33,8 @@ class BaseAPI:
         path: str,
         params_query: str = '',
         service: str = 'service_a',
+        auth_type: str = None,
+        max_body_bytes: int = None,
         **kwargs
     ):
         """
@@ -32,6 +45,8 @@ class BaseAPI:
             path: API 路徑
             params_query: 用來對 DB 查詢的 filter (例如: ?page=1&limit=10)
             service: 保留參數，目前僅使用 Service A
+            auth_type: 認證類型（錄製 / 重播指紋使用；未指定時依 Authorization header 推斷）
+            max_body_bytes: 回應本文大小上限（未指定時使用 MAX_BODY_BYTES）
             **kwargs: 其他 requests 參數 (headers, json, data 等)
 
         Returns:
@@ -39,16 +54,173 @@ class BaseAPI:
 
         Raises:
             requests.exceptions.RequestException
+            api.replay.ReplayMissError: 重播模式下找不到對應的錄製回應
+            api.download.ResponseTooLargeError: 回應本文超過大小上限
         """
         base_url = f"{self.service_a_base_url}{self.version}{path}{params_query}"
 
-        try:
-            # 預設 timeout 為 20 秒，等待資料傳輸完成
-            print(f'>> API PATH: {method} {base_url}')
-            response = requests.request(method, base_url, timeout=20, **kwargs)
-            # 取消註解以下行以查看回應內容（用於除錯）
-            # print(f'<< API RESPONSE: {response.status_code} {response.text}')
-        except requests.exceptions.RequestException as err:
-            raise requests.exceptions.RequestException(err)
+        replay_key = None
+        if replay.mode() != replay.MODE_OFF:
+            if auth_type is None:
+                auth_type = replay.infer_auth_type(kwargs.get('headers'))
+            replay_key = replay.fingerprint(
+                method, base_url, auth_type,
+                kwargs.get('json', kwargs.get('data'))
+            )
+            if replay.mode() == replay.MODE_REPLAY:
+                print(f'>> API PATH (replay): {method} {base_url}')
+                return replay.load(replay_key)
+
+        # 條件式請求快取（僅 GET）：新鮮時直接回傳，過期時帶 If-None-Match 重新驗證
+        cache = http_cache.get_cache()
+        cache_key = cache_entry = None
+        if cache is not None and method.upper() == 'GET':
+            if auth_type is None:
+                auth_type = replay.infer_auth_type(kwargs.get('headers'))
+            cache_key = http_cache.cache_key(base_url, auth_type)
+            cache_entry = cache.lookup(cache_key)
+            if cache_entry is not None:
+                if cache.is_fresh(cache_entry):
+                    print(f'>> API PATH (cached): {method} {base_url}')
+                    case_metrics.incr('http_cache_hits')
+                    return cache.hit(cache_entry)
+                kwargs['headers'] = {
+                    **(kwargs.get('headers') or {}),
+                    **cache.conditional_headers(cache_entry)
+                }
+
+        # 請求合併：相同的 GET / HEAD（含 header 與本文大小上限）只送出一次，其餘案例取得同一份回應的副本
+        coalescer = coalesce.get_coalescer()
+        if coalescer is not None and cache_entry is None and coalescer.applies_to(method):
+            if auth_type is None:
+                auth_type = replay.infer_auth_type(kwargs.get('headers'))
+            coalesce_key = coalesce.request_key(
+                method, base_url, auth_type,
+                kwargs.get('json', kwargs.get('data')),
+                headers=kwargs.get('headers'),
+                max_body_bytes=max_body_bytes or download.limits_from_config()[0]
+            )
+            response, shared = coalescer.execute(
+                coalesce_key, method, base_url, auth_type,
+                lambda: self._send(method, base_url, max_body_bytes, **kwargs)
+            )
+            if shared:
+                print(f'>> API PATH (coalesced): {method} {base_url}')
+                case_metrics.incr('coalesced')
+        else:
+            response = self._send(method, base_url, max_body_bytes, **kwargs)
+
+        if cache_key is not None:
+            if response.status_code == 304 and cache_entry is not None:
+                case_metrics.incr('http_cache_revalidated')
+            response = cache.update(cache_key, cache_entry, response)
+
+        if replay_key is not None:
+            replay.save(replay_key, method, base_url, auth_type, response)
 
         return response
+
+    def _send(self, method: str, url: str, max_body_bytes: int = None, **kwargs):
+        """
+        發送請求，依重試策略處理暫時性錯誤；啟用調節器時先向 token bucket 取得送出額度
+        有本文大小上限或落地門檻時以串流讀取本文；啟用 HTTP_COMPRESSION 時協商壓縮，否則要求不壓縮
+
+        Returns:
+            requests.Response: 最後一次嘗試的回應
+
+        Raises:
+            requests.exceptions.RequestException: 不可重試或重試用盡時
+        """
+        if str(config.HTTP_COMPRESSION).lower() in ('true', '1', 'yes'):
+            kwargs = self._compress_request(kwargs)
+        else:
+            kwargs = self._identity_request(kwargs)
+        policy = retry.get_policy()
+        governor = rate_governor.get_governor()
+        headers = kwargs.get('headers')
+        default_max_bytes, spill_bytes, spill_dir = download.limits_from_config()
+        max_bytes = max_body_bytes or default_max_bytes
+        stream = max_bytes is not None or spill_bytes is not None
+        attempt = 0
+
+        def fetch():
+            if not stream:
+                response = requests.request(method, url, timeout=20, **kwargs)
+            else:
+                response = download.read_body(
+                    requests.request(method, url, timeout=20, stream=True, **kwargs),
+                    max_bytes=max_bytes, spill_bytes=spill_bytes, spill_dir=spill_dir
+                )
+            transferred, decoded = download.transfer_sizes(response)
+            case_metrics.incr('bytes_transferred', transferred)
+            case_metrics.incr('bytes_decoded', decoded)
+            return response
+
+        while True:
+            attempt += 1
+            try:
+                # 預設 timeout 為 20 秒，等待資料傳輸完成
+                print(f'>> API PATH: {method} {url}')
+                if governor is None:
+                    response = fetch()
+                else:
+                    governor.acquire()
+                    response = fetch()
+                    governor.feedback(response)
+                # 取消註解以下行以查看回應內容（用於除錯）
+                # print(f'<< API RESPONSE: {response.status_code} {response.text}')
+            except download.ResponseTooLargeError:
+                raise
+            except requests.exceptions.RequestException as err:
+                if not policy.should_retry_error(method, headers, err, attempt):
+                    raise requests.exceptions.RequestException(err)
+                delay = policy.backoff(attempt)
+                print(f'<< RETRY {attempt}/{policy.max_attempts - 1} in {delay:.2f}s: {err}')
+            else:
+                if not policy.should_retry_response(method, headers, response, attempt):
+                    return response
+                delay = policy.backoff(attempt, response)
+                print(
+                    f'<< RETRY {attempt}/{policy.max_attempts - 1} in {delay:.2f}s: '
+                    f'HTTP {response.status_code}'
+                )
+                response.close()
+
+            case_metrics.incr('retries')
+            time.sleep(delay)
+
+    @staticmethod
+    def _identity_request(kwargs: dict) -> dict:
+        """
+        未啟用壓縮時送出 Accept-Encoding: identity（requests 預設會帶 gzip, deflate）；呼叫端已指定時不覆寫
+
+        Returns:
+            dict: 新的 requests 參數（不修改呼叫端的 dict）
+        """
+        headers = dict(kwargs.get('headers') or {})
+        if any(name.lower() == 'accept-encoding' for name in headers):
+            return kwargs
+        headers['Accept-Encoding'] = 'identity'
+        return dict(kwargs, headers=headers)
+
+    @staticmethod
+    def _compress_request(kwargs: dict) -> dict:
+        """
+        加上 Accept-Encoding；JSON 本文達 REQUEST_COMPRESSION_MIN_BYTES 時改送 gzip 壓縮的 data
+
+        Returns:
+            dict: 新的 requests 參數（不修改呼叫端的 dict）
+        """
+        kwargs = dict(kwargs)
+        headers = dict(kwargs.get('headers') or {})
+        headers['Accept-Encoding'] = compression.accept_encoding_header()
+        body = kwargs.get('json')
+        if body is not None:
+            raw = json_codec.dumps_bytes(body)
+            if len(raw) >= int(config.REQUEST_COMPRESSION_MIN_BYTES):
+                kwargs.pop('json')
+                kwargs['data'] = compression.compress(raw, 'gzip')
+                headers['Content-Type'] = 'application/json'
+                headers['Content-Encoding'] = 'gzip'
+        kwargs['headers'] = headers
+        return kwargs
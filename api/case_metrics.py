@@ -0,0 +1,38 @@
+"""
+測試案例層級的請求統計
+BaseAPI 於請求過程中累加計數（例如 retries），
+conftest.py 在每個案例開始 / 結束時切換目前案例並把結果寫入報告的 user_properties。
+"""
+import threading
+
+_lock = threading.Lock()
+_state = {'case': None, 'counters': {}}
+
+
+def begin_case(case_id: str):
+    """開始記錄一個測試案例（清除前一個案例的計數）"""
+    with _lock:
+        _state['case'] = case_id
+        _state['counters'] = {}
+
+
+def end_case() -> dict:
+    """
+    結束目前案例的記錄
+
+    Returns:
+        dict: 計數名稱 → 數值
+    """
+    with _lock:
+        counters = _state['counters']
+        _state['case'] = None
+        _state['counters'] = {}
+    return counters
+
+
+def incr(name: str, value: int = 1):
+    """累加目前案例的計數（不在案例中時忽略）"""
+    with _lock:
+        if _state['case'] is None:
+            return
+        _state['counters'][name] = _state['counters'].get(name, 0) + value
@@ -0,0 +1,201 @@
+"""
+請求合併（single-flight）
+session 內以 request_key（replay.fingerprint 加上其餘請求 header 與本文大小上限）為鍵，
+相同的請求只實際送出一次，其餘案例取得同一份回應的副本；同時送出的相同請求會等待第一個完成。
+xdist 下可另外指定共用的 ResponseStore（SQLite）：每個指紋以檔案鎖選出一個 worker 送出，
+其他 worker 等鎖釋放後由 store 讀取回應。
+只合併不改變伺服器狀態的方法（COALESCE_METHODS，預設 GET、HEAD）。
+只共用穩定的回應：5xx、429 與重試策略中的狀態碼不保留也不寫入 store，等待者改為自行重送。
+"""
+import hashlib
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows 無 fcntl，僅合併同一行程內的請求
+    fcntl = None
+
+import requests
+
+from api import download, replay, retry
+
+_state = {'coalescer': None}
+
+
+def request_key(
+    method: str,
+    url: str,
+    auth_type: str,
+    body=None,
+    headers: dict = None,
+    max_body_bytes: int = None
+) -> str:
+    """
+    合併用的請求鍵
+
+    除了 replay 指紋外也納入所有請求 header 與實際生效的本文大小上限：
+    header 不同的請求可能得到不同回應，有上限的案例也不能共用無上限案例取得的大型回應。
+    """
+    parts = [replay.fingerprint(method, url, auth_type, body), str(max_body_bytes or '')]
+    parts.extend(
+        f'{name.lower()}:{value}'
+        for name, value in sorted((headers or {}).items(), key=lambda item: item[0].lower())
+    )
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    """進行中的請求"""
+    __slots__ = ('done',)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class RequestCoalescer:
+    """
+    session 範圍的請求合併
+
+    Args:
+        methods: 可合併的 HTTP 方法
+        shared_path: 跨行程共用的 ResponseStore 路徑（None 表示只合併同一行程內的請求）
+    """
+
+    def __init__(self, methods=('GET', 'HEAD'), shared_path: str = None):
+        self.methods = frozenset(method.upper() for method in methods)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {'executed': 0, 'coalesced': 0}
+        self._store = None
+        self._lock_dir = None
+        if shared_path and fcntl is not None:
+            self._store = replay.ResponseStore(shared_path)
+            self._lock_dir = f'{shared_path}.locks'
+            os.makedirs(self._lock_dir, exist_ok=True)
+
+    def applies_to(self, method: str) -> bool:
+        return method.upper() in self.methods
+
+    @staticmethod
+    def _shareable(response: requests.Response) -> bool:
+        """限流、伺服器錯誤與會被重試的回應不共用（其他案例應自行送出取得結果）"""
+        status = response.status_code
+        return (
+            status < 500
+            and status != 429
+            and status not in retry.get_policy().retry_statuses
+        )
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _snapshot(response: requests.Response) -> dict:
+        return {
+            'status_code': response.status_code,
+            'headers': {
+                name: value for name, value in response.headers.items()
+                if name.lower() not in replay._DROP_HEADERS
+            },
+            'body': response.content,
+            'url': response.url,
+            'reason': response.reason or '',
+        }
+
+    @staticmethod
+    def _build(entry: dict) -> requests.Response:
+        return replay.build_response(
+            entry['status_code'], entry['headers'], entry['body'], entry['url'], entry['reason'])
+
+    def execute(self, key: str, method: str, url: str, auth_type: str, send):
+        """
+        依指紋取得回應：已有結果時回傳副本，同一指紋進行中時等待，否則由本次呼叫送出
+
+        Args:
+            key: 請求指紋
+            method / url / auth_type: 寫入共用 store 的中繼資料
+            send: 實際送出請求的函式（無參數，回傳 requests.Response）
+
+        Returns:
+            tuple: (requests.Response, 是否為共用的回應)
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    flight = self._entries[key] = _Flight()
+                    break
+            if isinstance(entry, _Flight):
+                entry.done.wait()
+                continue  # 送出失敗時 entry 已移除，由等待者之一重新送出
+            self._count('coalesced')
+            return self._build(entry), True
+
+        try:
+            response, snapshot, shared = self._execute_shared(key, method, url, auth_type, send)
+        except BaseException:
+            with self._lock:
+                del self._entries[key]
+            flight.done.set()
+            raise
+        with self._lock:
+            if snapshot is None:
+                del self._entries[key]  # 不可共用的回應：等待者各自重送
+            else:
+                self._entries[key] = snapshot
+        flight.done.set()
+        return response, shared
+
+    def _execute_shared(self, key: str, method: str, url: str, auth_type: str, send):
+        """
+        送出請求（有共用 store 時以檔案鎖確保所有 worker 只送出一次）
+
+        Returns:
+            tuple: (回應, 可共用的快照或 None, 是否取自其他 worker)
+        """
+        if self._store is None:
+            return self._send(send) + (False,)
+        lock_path = os.path.join(self._lock_dir, hashlib.sha1(key.encode()).hexdigest())
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                stored = self._store.get(key)
+                if stored is not None:
+                    self._count('coalesced')
+                    snapshot = {
+                        'status_code': stored['status_code'], 'headers': stored['headers'],
+                        'body': stored['body'], 'url': stored['url'], 'reason': stored['reason'],
+                    }
+                    return self._build(snapshot), snapshot, True
+                response, snapshot = self._send(send)
+                if snapshot is not None:
+                    self._store.put(key, method, url, auth_type, response)
+                return response, snapshot, False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _send(self, send):
+        response = send()
+        self._count('executed')
+        # 落地到暫存檔的大型回應與不穩定的狀態碼不共用
+        if isinstance(response, download.SpilledResponse) or not self._shareable(response):
+            return response, None
+        return response, self._snapshot(response)
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+
+
+def configure(enabled: bool, methods=('GET', 'HEAD'), shared_path: str = None):
+    """啟用 / 停用請求合併（每個 session 一份新的合併表）"""
+    if _state['coalescer'] is not None:
+        _state['coalescer'].close()
+    _state['coalescer'] = RequestCoalescer(methods, shared_path) if enabled else None
+
+
+def get_coalescer():
+    """目前的合併器；未啟用時回傳 None"""
+    return _state['coalescer']
@@ -0,0 +1,192 @@
+"""
+回應本文大小限制與串流下載
+以串流讀取回應本文：超過上限時立即中止（ResponseTooLargeError），
+超過落地門檻時改寫入暫存檔（SpilledResponse），content 於第一次存取時才讀回，
+也可用 iter_body() 分段讀取、json_body() 以 mmap 解析。
+
+設定（環境變數，空白表示不限制 / 不落地）：
+  MAX_BODY_BYTES: 預設本文大小上限（端點的 max_body_bytes 或 CSV 的 max_body_bytes 欄可覆寫）
+  SPILL_BODY_BYTES: 本文超過此大小時寫入暫存檔
+  SPILL_DIR: 暫存檔目錄（預設系統暫存目錄）
+"""
+import mmap
+import os
+import tempfile
+import weakref
+
+import requests
+import urllib3
+
+import config
+from common import json_codec
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseTooLargeError(requests.exceptions.RequestException):
+    """回應本文超過大小上限（已中止下載）"""
+
+    def __init__(self, url: str, limit: int, received: int):
+        self.limit = limit
+        self.received = received
+        super().__init__(
+            f'Response body of {url} exceeds {limit} bytes '
+            f'(aborted after {received} bytes)'
+        )
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpilledResponse(requests.Response):
+    """
+    本文已寫入暫存檔的回應
+
+    content / text / json() 於第一次存取時才讀回記憶體；
+    暫存檔於 close() 或物件回收時刪除。
+    """
+
+    body_path = None
+
+    @property
+    def content(self):
+        if self._content is False:
+            with open(self.body_path, 'rb') as file_input:
+                self._content = file_input.read()
+        return self._content
+
+    def iter_body(self, chunk_size: int = CHUNK_SIZE):
+        """分段讀取本文，不需整份載入記憶體"""
+        with open(self.body_path, 'rb') as file_input:
+            while True:
+                chunk = file_input.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def close(self):
+        super().close()
+        _remove_quietly(self.body_path)
+
+
+def limits_from_config():
+    """
+    讀取預設限制
+
+    Returns:
+        tuple: (max_body_bytes, spill_body_bytes, spill_dir)，未設定時為 None
+    """
+    max_bytes = config.MAX_BODY_BYTES
+    spill_bytes = config.SPILL_BODY_BYTES
+    return (
+        int(max_bytes) if max_bytes else None,
+        int(spill_bytes) if spill_bytes else None,
+        config.SPILL_DIR or None,
+    )
+
+
+def read_body(
+    response: requests.Response,
+    max_bytes: int = None,
+    spill_bytes: int = None,
+    spill_dir: str = None
+) -> requests.Response:
+    """
+    串流讀取回應本文（response 需以 stream=True 取得）
+
+    Args:
+        response: 尚未讀取本文的回應
+        max_bytes: 本文大小上限（解壓縮後）；None 表示不限制
+        spill_bytes: 本文超過此大小時寫入暫存檔；None 表示一律保留在記憶體
+        spill_dir: 暫存檔目錄
+
+    Returns:
+        requests.Response: 本文已讀取的回應（落地時為 SpilledResponse）
+
+    Raises:
+        ResponseTooLargeError: 本文超過 max_bytes
+    """
+    declared = response.headers.get('Content-Length')
+    if (
+        max_bytes is not None
+        and declared and declared.isdigit()
+        and not response.headers.get('Content-Encoding')
+        and int(declared) > max_bytes
+    ):
+        response.close()
+        raise ResponseTooLargeError(response.url, max_bytes, 0)
+
+    chunks = []
+    received = 0
+    spill_file = None
+    spill_path = None
+    try:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            received += len(chunk)
+            if max_bytes is not None and received > max_bytes:
+                raise ResponseTooLargeError(response.url, max_bytes, received)
+            if spill_file is None and spill_bytes is not None and received > spill_bytes:
+                descriptor, spill_path = tempfile.mkstemp(prefix='body-', dir=spill_dir)
+                spill_file = os.fdopen(descriptor, 'wb')
+                spill_file.writelines(chunks)
+                chunks = []
+            if spill_file is None:
+                chunks.append(chunk)
+            else:
+                spill_file.write(chunk)
+    except BaseException:
+        if spill_file is not None:
+            spill_file.close()
+            _remove_quietly(spill_path)
+        raise
+    finally:
+        response.close()
+
+    if spill_file is None:
+        response._content = b''.join(chunks)
+        response._content_consumed = True
+        return response
+
+    spill_file.close()
+    spilled = SpilledResponse()
+    spilled.__dict__.update(response.__dict__)
+    spilled._content = False
+    spilled._content_consumed = True
+    spilled.body_path = spill_path
+    weakref.finalize(spilled, _remove_quietly, spill_path)
+    return spilled
+
+
+def transfer_sizes(response: requests.Response):
+    """
+    回應本文的傳輸與解壓縮後大小
+
+    Returns:
+        tuple: (實際傳輸的 bytes, 解壓縮後的 bytes)；無法取得傳輸大小時兩者相同
+    """
+    if isinstance(response, SpilledResponse) and response._content is False:
+        decoded = os.path.getsize(response.body_path)
+    else:
+        decoded = len(response._content or b'')
+    # 只有 urllib3 的回應能取得實際讀取的 bytes；假回應等無法取得時視為未壓縮
+    if isinstance(response.raw, urllib3.response.HTTPResponse):
+        return response.raw.tell(), decoded
+    return decoded, decoded
+
+
+def json_body(response: requests.Response):
+    """
+    解析回應 JSON；落地的本文以 mmap 交給 JSON codec，不另外複製一份 bytes
+    """
+    if isinstance(response, SpilledResponse) and response._content is False:
+        with open(response.body_path, 'rb') as file_input:
+            if os.fstat(file_input.fileno()).st_size == 0:
+                return json_codec.loads(b'')
+            with mmap.mmap(file_input.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    return json_codec.loads(view)
+    return json_codec.loads(response.content)
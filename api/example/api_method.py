@@ -12,7 +12,8 @@ class APIMethod(BaseAPI):
         cookie_code: str = 'auth',
         params_query: str = '',
         body: dict = {},
-        service: str = 'service_a'
+        service: str = 'service_a',
+        max_body_bytes: int = None
     ):
         """
         Args:
@@ -23,6 +24,7 @@ class APIMethod(BaseAPI):
             params_query: 查詢參數字串
             body: 請求 body (dict)
             service: 保留參數，目前僅使用 Service A
+            max_body_bytes: 回應本文大小上限（未指定時使用 MAX_BODY_BYTES）
         
         Returns:
             requests.Response: HTTP response object
@@ -42,5 +44,7 @@ class APIMethod(BaseAPI):
             headers=headers,
             params_query=params_query,
             json=body,
-            service=service
+            service=service,
+            auth_type=cookie_code,
+            max_body_bytes=max_body_bytes
         )
@@ -1,4 +1,3 @@
-import config
 import requests
 from api.base_api import BaseAPI
 
@@ -34,13 +33,14 @@ class OAuth2(BaseAPI):
             'password': credential
         }
         
-        url = f"{self.service_a_base_url}{self.version}{login_path}"
-        
         try:
-            response = requests.post(
-                url,
+            # 經由 BaseAPI.request 發送，錄製 / 重播模式下登入同樣不經網路
+            response = self.request(
+                method='POST',
+                path=login_path,
                 json=login_body,
-                timeout=20
+                service=service,
+                auth_type='login'
             )
             response.raise_for_status()
             
@@ -0,0 +1,228 @@
+"""
+請求速率調節器
+以 token bucket 限制送出速率，速率以 AIMD 調整：成功時緩慢加大、遇到 429/503 時乘法遞減，
+並遵守 Retry-After 暫停送出。xdist 下各 worker 共用以檔案鎖保護的 bucket，協調整體速率。
+
+pytest worker 為單執行緒、一次只送出一個請求，因此不另設行程內的併發上限：
+實際限制送出量的只有 token bucket。
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows 無 fcntl，僅提供行程內調節
+    fcntl = None
+
+import config
+from api import retry
+
+THROTTLE_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """
+    行程內的 token bucket，速率以 AIMD 調整
+
+    Args:
+        rate: 初始速率（requests / 秒）
+        min_rate: 速率下限
+        max_rate: 速率上限
+    """
+
+    def __init__(self, rate: float, min_rate: float, max_rate: float):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._initial_rate = min(max(rate, min_rate), max_rate)
+        self._state = None
+        self._lock = threading.Lock()
+
+    def _new_state(self, now: float) -> dict:
+        return {
+            'rate': self._initial_rate,
+            'tokens': 1.0,
+            'updated_at': now,
+            'paused_until': 0.0,
+        }
+
+    @staticmethod
+    def _refill(state: dict, now: float):
+        # 依經過時間補充 token（最多累積 1 秒份）
+        elapsed = max(0.0, now - state['updated_at'])
+        state['tokens'] = min(
+            state['rate'], state['tokens'] + elapsed * state['rate'])
+        state['updated_at'] = now
+
+    @contextmanager
+    def _locked_state(self):
+        with self._lock:
+            now = time.time()
+            if self._state is None:
+                self._state = self._new_state(now)
+            self._refill(self._state, now)
+            yield self._state
+
+    @property
+    def rate(self) -> float:
+        with self._locked_state() as state:
+            return state['rate']
+
+    def acquire(self):
+        """取得一個 token，不足或暫停中時睡到可送出為止"""
+        while True:
+            with self._locked_state() as state:
+                now = time.time()
+                if now < state['paused_until']:
+                    wait = state['paused_until'] - now
+                elif state['tokens'] >= 1:
+                    state['tokens'] -= 1
+                    return
+                else:
+                    wait = (1 - state['tokens']) / state['rate']
+            time.sleep(wait)
+
+    def on_success(self):
+        """加法遞增：每個成功回應加 1/rate，約等於每秒加 1"""
+        with self._locked_state() as state:
+            state['rate'] = min(self.max_rate, state['rate'] + 1 / state['rate'])
+
+    def on_throttle(self, factor: float, retry_after: float = None):
+        """乘法遞減並清空 token；有 Retry-After 時暫停送出"""
+        with self._locked_state() as state:
+            state['rate'] = max(self.min_rate, state['rate'] * factor)
+            state['tokens'] = min(state['tokens'], 0.0)
+            if retry_after:
+                state['paused_until'] = max(
+                    state['paused_until'], time.time() + retry_after)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    跨行程共用的 token bucket
+
+    狀態存於單一 JSON 檔，以 fcntl.flock 互斥。
+
+    Args:
+        path: 狀態檔路徑（所有 worker 需相同）
+        rate / min_rate / max_rate: 同 TokenBucket
+    """
+
+    def __init__(self, path: str, rate: float, min_rate: float, max_rate: float):
+        if fcntl is None:
+            raise RuntimeError('Shared rate governor requires fcntl (POSIX only)')
+        super().__init__(rate, min_rate, max_rate)
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def _parse_state(self, raw: str, now: float) -> dict:
+        """解析狀態檔；空白、損毀或截斷（例如寫入途中被中止）時重設為初始狀態"""
+        try:
+            state = json.loads(raw)
+            if all(isinstance(state[key], (int, float)) for key in self._new_state(now)):
+                return state
+        except (ValueError, TypeError, KeyError):
+            pass
+        return self._new_state(now)
+
+    @contextmanager
+    def _locked_state(self):
+        with open(self.path, 'a+', encoding='utf-8') as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                raw = state_file.read()
+                now = time.time()
+                state = self._parse_state(raw, now)
+                self._refill(state, now)
+                yield state
+                state_file.seek(0)
+                state_file.truncate()
+                state_file.write(json.dumps(state))
+                state_file.flush()
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+
+class RateGovernor:
+    """
+    AIMD 速率調節器
+
+    Args:
+        bucket: TokenBucket（單一行程）或 SharedTokenBucket（xdist）
+        decrease_factor: 遇到 429/503 時的乘法遞減係數
+    """
+
+    def __init__(self, bucket: TokenBucket, decrease_factor: float = 0.5):
+        self.bucket = bucket
+        self.decrease_factor = decrease_factor
+        self.throttled = 0
+
+    @classmethod
+    def from_config(cls, shared_file: str = None):
+        """依環境變數（GOVERNOR_*）建立調節器"""
+        shared_file = shared_file or config.GOVERNOR_SHARED_FILE
+        rates = dict(
+            rate=float(config.GOVERNOR_RATE),
+            min_rate=float(config.GOVERNOR_MIN_RATE),
+            max_rate=float(config.GOVERNOR_MAX_RATE)
+        )
+        if shared_file:
+            return cls(SharedTokenBucket(shared_file, **rates))
+        return cls(TokenBucket(**rates))
+
+    def acquire(self):
+        """送出請求前呼叫：等到 bucket 有 token 且不在 Retry-After 暫停期間"""
+        self.bucket.acquire()
+
+    def feedback(self, response=None):
+        """
+        依回應調整速率
+
+        Args:
+            response: requests.Response；連線錯誤時為 None（不調整）
+        """
+        if response is None:
+            return
+        if response.status_code in THROTTLE_STATUSES:
+            self.throttled += 1
+            self.bucket.on_throttle(self.decrease_factor, retry.retry_after_seconds(response))
+        else:
+            self.bucket.on_success()
+
+
+# throttled_policy：啟用時加入 THROTTLE_STATUSES 的重試策略與實際加入的狀態碼，停用時據此移除
+_governor = {'current': None, 'throttled_policy': None}
+
+
+def configure(enabled: bool, shared_file: str = None):
+    """
+    啟用 / 停用調節器（由 conftest.py 於 pytest_configure 呼叫）
+
+    啟用時一併讓重試策略重試 THROTTLE_STATUSES，被限流的請求等 Retry-After 後重送；
+    停用時移除由此加入的狀態碼（策略原本就重試的狀態碼保留）。
+
+    Args:
+        enabled: 是否啟用
+        shared_file: xdist 各 worker 共用的 token bucket 狀態檔
+    """
+    if _governor['throttled_policy'] is not None:
+        policy, added = _governor['throttled_policy']
+        policy.retry_statuses = policy.retry_statuses - added
+        _governor['throttled_policy'] = None
+    _governor['current'] = (
+        RateGovernor.from_config(shared_file) if enabled else None)
+    if enabled:
+        policy = retry.get_policy()
+        added = frozenset(THROTTLE_STATUSES) - policy.retry_statuses
+        policy.retry_statuses = policy.retry_statuses | added
+        _governor['throttled_policy'] = (policy, added)
+
+
+def get_governor():
+    """取得目前的調節器；未啟用時回傳 None"""
+    return _governor['current']
@@ -0,0 +1,168 @@
+"""
+HTTP 條件式請求快取
+session 範圍的 GET 回應快取，鍵為 (URL, 認證類型)，no-auth / auth_invalid 等案例互不共用。
+依 Cache-Control: max-age 判斷新鮮度；過期（或 no-cache）時以 If-None-Match / If-Modified-Since
+重新驗證，伺服器回 304 時沿用快取內容，並以 304 帶回的 header（例如新的 ETag）更新快取項目。
+Cache-Control: no-store 的回應不快取。
+"""
+import threading
+import time
+
+import requests
+
+from api import download, replay
+
+# 已解壓縮後才存入，這些 header 不再適用
+_DROP_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+_state = {'cache': None}
+
+
+def parse_cache_control(value: str) -> dict:
+    """
+    解析 Cache-Control
+
+    Returns:
+        dict: 指令名稱（小寫）→ 值（無值的指令為 True）
+    """
+    directives = {}
+    for item in (value or '').split(','):
+        name, _, argument = item.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else True
+    return directives
+
+
+class HttpCache:
+    """session 範圍的 GET 回應快取"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def lookup(self, key: tuple):
+        with self._lock:
+            return self._entries.get(key)
+
+    @staticmethod
+    def is_fresh(entry: dict) -> bool:
+        return entry['expires_at'] is not None and time.time() < entry['expires_at']
+
+    @staticmethod
+    def conditional_headers(entry: dict) -> dict:
+        """重新驗證用的條件式 header"""
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def build(entry: dict) -> requests.Response:
+        return replay.build_response(
+            entry['status_code'], entry['headers'], entry['content'],
+            entry['url'], entry['reason']
+        )
+
+    def hit(self, entry: dict) -> requests.Response:
+        """快取仍新鮮，直接回傳"""
+        self._count('hits')
+        return self.build(entry)
+
+    def update(self, key: tuple, entry, response: requests.Response) -> requests.Response:
+        """
+        依伺服器回應更新快取
+
+        Args:
+            key: 快取鍵
+            entry: 送出前查到的快取項目（可為 None）
+            response: 伺服器回應
+
+        Returns:
+            requests.Response: 304 時為快取內容，其他情況為原回應
+        """
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        expires_at = self._expires_at(directives)
+
+        if response.status_code == 304 and entry is not None:
+            headers = self._merge_headers(entry['headers'], response.headers)
+            with self._lock:
+                entry['headers'] = headers
+                entry['etag'] = response.headers.get('ETag') or entry['etag']
+                entry['last_modified'] = (
+                    response.headers.get('Last-Modified') or entry['last_modified'])
+                entry['expires_at'] = expires_at
+                self.stats['revalidated'] += 1
+            response.close()
+            return self.build(entry)
+
+        self._count('misses')
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if (
+            response.status_code != 200
+            or 'no-store' in directives
+            or isinstance(response, download.SpilledResponse)
+            or not (etag or last_modified or expires_at)
+        ):
+            return response
+
+        with self._lock:
+            self._entries[key] = {
+                'status_code': response.status_code,
+                'headers': {
+                    name: value for name, value in response.headers.items()
+                    if name.lower() not in _DROP_HEADERS
+                },
+                'content': response.content,
+                'url': response.url,
+                'reason': response.reason or '',
+                'etag': etag,
+                'last_modified': last_modified,
+                'expires_at': expires_at,
+            }
+            self.stats['stored'] += 1
+        return response
+
+    @staticmethod
+    def _merge_headers(stored: dict, updated) -> dict:
+        """以 304 回應的 header 取代快取中同名（不分大小寫）的 header，回傳新的 dict"""
+        replaced = {
+            name.lower(): (name, value) for name, value in updated.items()
+            if name.lower() not in _DROP_HEADERS
+        }
+        headers = {
+            name: value for name, value in stored.items()
+            if name.lower() not in replaced
+        }
+        headers.update(replaced.values())
+        return headers
+
+    @staticmethod
+    def _expires_at(directives: dict):
+        if 'no-cache' in directives or 'max-age' not in directives:
+            return None
+        try:
+            return time.time() + int(directives['max-age'])
+        except (TypeError, ValueError):
+            return None
+
+
+def cache_key(url: str, auth_type: str) -> tuple:
+    return (url, auth_type or '')
+
+
+def configure(enabled: bool):
+    """啟用 / 停用快取（每個 session 一份新的快取）"""
+    _state['cache'] = HttpCache() if enabled else None
+
+
+def get_cache():
+    """目前的快取；未啟用時回傳 None"""
+    return _state['cache']
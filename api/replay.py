@@ -0,0 +1,339 @@
+"""
+回應錄製 / 重播
+以請求指紋 (method, URL, 認證類型, body hash) 為鍵，
+將 API 回應存入單一 SQLite 檔案，重播模式下由 BaseAPI 直接回傳，不經網路。
+
+指令列（於專案根目錄執行）：
+  python -m api.replay stats --store .replay/responses.db
+  python -m api.replay stale --store .replay/responses.db --max-age 86400 --version v2
+  python -m api.replay prune --store .replay/responses.db --max-age 86400 --version v2
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+MODE_OFF = 'off'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+MODES = (MODE_OFF, MODE_RECORD, MODE_REPLAY)
+
+# 回應 body 已解壓縮後才存入，這些 header 不再適用
+_DROP_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+_state = {
+    'mode': MODE_OFF,
+    'store': None,
+    'version': '',
+    'max_age': None,
+}
+_stats = {'hits': 0, 'misses': 0, 'stale': 0, 'recorded': 0}
+
+
+class ReplayMissError(requests.exceptions.RequestException):
+    """重播模式下找不到對應（或已過期）的錄製回應"""
+
+
+def _body_bytes(body) -> bytes:
+    if body is None:
+        return b''
+    if isinstance(body, bytes):
+        return body
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    return json.dumps(body, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def fingerprint(method: str, url: str, auth_type: str, body=None) -> str:
+    """
+    計算請求指紋
+
+    Args:
+        method: HTTP 方法
+        url: 完整 URL（含 query string）
+        auth_type: 認證類型（對應 CSV 的 cookie 欄位，例如 'auth'、'no-auth'）
+        body: 請求 body（dict / str / bytes）
+
+    Returns:
+        str: sha256 十六進位字串
+    """
+    body_hash = hashlib.sha256(_body_bytes(body)).hexdigest()
+    key = '\x1f'.join((method.upper(), url, auth_type or '', body_hash))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def infer_auth_type(headers) -> str:
+    """未指定認證類型時，依 Authorization header 是否存在推斷"""
+    if headers and headers.get('Authorization'):
+        return 'auth'
+    return 'no-auth'
+
+
+def build_response(
+    status_code: int,
+    headers: dict,
+    content: bytes,
+    url: str,
+    reason: str = ''
+) -> requests.Response:
+    """由已儲存的欄位組出 requests.Response"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    response.url = url
+    response.reason = reason
+    response.encoding = requests.utils.get_encoding_from_headers(
+        response.headers)
+    return response
+
+
+class ResponseStore:
+    """
+    錄製回應的儲存區
+
+    單一 SQLite 檔案，以指紋為主鍵建立索引；body 以 zlib 壓縮存放。
+    多個 xdist worker 可同時寫入（WAL + busy timeout）。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                fingerprint TEXT PRIMARY KEY,
+                method TEXT,
+                url TEXT,
+                auth_type TEXT,
+                status_code INTEGER,
+                reason TEXT,
+                headers TEXT,
+                body BLOB,
+                recorded_at REAL,
+                version TEXT
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+
+    def get(self, key: str):
+        """
+        取得錄製紀錄
+
+        Returns:
+            dict or None: 欄位同資料表
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT method, url, auth_type, status_code, reason, headers, '
+                'body, recorded_at, version FROM responses WHERE fingerprint = ?',
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'fingerprint': key,
+            'method': row[0],
+            'url': row[1],
+            'auth_type': row[2],
+            'status_code': row[3],
+            'reason': row[4],
+            'headers': json.loads(row[5]),
+            'body': zlib.decompress(row[6]),
+            'recorded_at': row[7],
+            'version': row[8],
+        }
+
+    def put(
+        self,
+        key: str,
+        method: str,
+        url: str,
+        auth_type: str,
+        response: requests.Response,
+        version: str = ''
+    ):
+        """寫入（或覆寫）一筆錄製紀錄"""
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in _DROP_HEADERS
+        }
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    key, method.upper(), url, auth_type,
+                    response.status_code, response.reason or '',
+                    json.dumps(headers),
+                    zlib.compress(response.content or b''),
+                    time.time(), version or '',
+                )
+            )
+            self._conn.commit()
+
+    def entries(self):
+        """列出所有紀錄的中繼資料（不含 body）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT fingerprint, method, url, auth_type, status_code, '
+                'recorded_at, version FROM responses ORDER BY url'
+            ).fetchall()
+        keys = ('fingerprint', 'method', 'url', 'auth_type',
+                'status_code', 'recorded_at', 'version')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def delete(self, keys: list):
+        with self._lock:
+            self._conn.executemany(
+                'DELETE FROM responses WHERE fingerprint = ?',
+                [(key,) for key in keys]
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def is_stale(entry: dict, max_age: float = None, version: str = '') -> bool:
+    """
+    判斷紀錄是否過期
+
+    Args:
+        entry: ResponseStore.get / entries 回傳的紀錄
+        max_age: 最長保存秒數（None 表示不檢查）
+        version: 目前的版本標籤（空字串表示不檢查）
+    """
+    if max_age is not None and time.time() - entry['recorded_at'] > max_age:
+        return True
+    if version and entry['version'] != version:
+        return True
+    return False
+
+
+def configure(
+    mode: str = MODE_OFF,
+    path: str = '.replay/responses.db',
+    version: str = '',
+    max_age: float = None
+):
+    """
+    設定錄製 / 重播模式（由 conftest.py 於 pytest_configure 呼叫）
+
+    Raises:
+        ValueError: 當模式不支援時
+    """
+    mode = (mode or MODE_OFF).lower()
+    if mode not in MODES:
+        raise ValueError(f'Unsupported replay mode: {mode}')
+    if _state['store'] is not None:
+        _state['store'].close()
+    _state.update(
+        mode=mode,
+        store=ResponseStore(path) if mode != MODE_OFF else None,
+        version=version or '',
+        max_age=max_age,
+    )
+
+
+def mode() -> str:
+    return _state['mode']
+
+
+def stats() -> dict:
+    return dict(_stats)
+
+
+def load(key: str) -> requests.Response:
+    """
+    重播模式下依指紋取得回應
+
+    Raises:
+        ReplayMissError: 找不到紀錄或紀錄已過期
+    """
+    entry = _state['store'].get(key)
+    if entry is None:
+        _stats['misses'] += 1
+        raise ReplayMissError(f'No recorded response for fingerprint {key}')
+    if is_stale(entry, _state['max_age'], _state['version']):
+        _stats['stale'] += 1
+        raise ReplayMissError(
+            f"Recorded response is stale: {entry['method']} {entry['url']} "
+            f"(version={entry['version'] or '-'}, "
+            f"recorded_at={time.ctime(entry['recorded_at'])})"
+        )
+    _stats['hits'] += 1
+    return build_response(
+        status_code=entry['status_code'],
+        headers=entry['headers'],
+        content=entry['body'],
+        url=entry['url'],
+        reason=entry['reason'],
+    )
+
+
+def save(
+    key: str,
+    method: str,
+    url: str,
+    auth_type: str,
+    response: requests.Response
+):
+    """錄製模式下儲存回應"""
+    _state['store'].put(
+        key, method, url, auth_type, response, version=_state['version'])
+    _stats['recorded'] += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay store 維護工具')
+    parser.add_argument('command', choices=('stats', 'stale', 'prune'))
+    parser.add_argument('--store', default='.replay/responses.db')
+    parser.add_argument('--max-age', type=float, default=None,
+                        help='最長保存秒數')
+    parser.add_argument('--version', default='', help='目前的版本標籤')
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.store):
+        parser.error(f'store not found: {args.store}')
+
+    store = ResponseStore(args.store)
+    entries = store.entries()
+    stale = [
+        entry for entry in entries
+        if is_stale(entry, args.max_age, args.version)
+    ]
+
+    if args.command == 'stats':
+        versions = sorted({entry['version'] or '-' for entry in entries})
+        print(f'entries: {len(entries)}')
+        print(f'versions: {", ".join(versions)}')
+        print(f'stale: {len(stale)}')
+    elif args.command == 'stale':
+        for entry in stale:
+            print(
+                f"{entry['method']} {entry['url']} [{entry['auth_type']}] "
+                f"version={entry['version'] or '-'} "
+                f"recorded_at={time.ctime(entry['recorded_at'])}"
+            )
+    else:
+        store.delete([entry['fingerprint'] for entry in stale])
+        print(f'pruned: {len(stale)}')
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
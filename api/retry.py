@@ -0,0 +1,176 @@
+"""
+請求重試策略
+依 HTTP 方法的冪等性決定是否可重試，連線錯誤與指定狀態碼時以指數退避 + jitter 重送，
+並以整個 session（單一行程）共用的重試額度避免後端故障時放大流量。
+"""
+import random
+import threading
+
+import requests
+
+import config
+
+# 未送出請求即失敗的連線錯誤：任何方法都可安全重試
+_CONNECT_ERRORS = (
+    requests.exceptions.ConnectTimeout,
+)
+# 請求可能已送達後端的錯誤：僅冪等方法可重試
+_TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ReadTimeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def _split(value: str) -> list:
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+class RetryPolicy:
+    """
+    重試策略
+
+    Args:
+        max_attempts: 每個請求最多嘗試次數（含第一次；1 表示不重試）
+        backoff_base: 退避基準秒數，第 n 次重試最多等待 base * 2 ** n
+        backoff_max: 單次退避上限秒數
+        retry_statuses: 需要重試的 HTTP 狀態碼
+        idempotent_methods: 可安全重試的 HTTP 方法
+        budget: 整個 session 可用的重試次數（None 表示不限）
+        retry_after_max: 可接受的 Retry-After 秒數上限，超過時不重試
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        retry_statuses=(502, 503, 504),
+        idempotent_methods=('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'),
+        budget: int = 50,
+        retry_after_max: float = 60.0
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_methods = frozenset(
+            method.upper() for method in idempotent_methods)
+        self.budget = budget
+        self.retry_after_max = retry_after_max
+        self.retries_used = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        """依環境變數（RETRY_*）建立策略"""
+        budget = config.RETRY_BUDGET
+        return cls(
+            max_attempts=int(config.RETRY_MAX_ATTEMPTS),
+            backoff_base=float(config.RETRY_BACKOFF_BASE),
+            backoff_max=float(config.RETRY_BACKOFF_MAX),
+            retry_statuses=[int(code) for code in _split(config.RETRY_STATUS_CODES)],
+            idempotent_methods=_split(config.RETRY_METHODS),
+            budget=int(budget) if budget not in (None, '') else None,
+            retry_after_max=float(config.RETRY_AFTER_MAX)
+        )
+
+    def is_idempotent(self, method: str, headers: dict = None) -> bool:
+        """冪等方法，或帶有 Idempotency-Key header 的請求"""
+        if method.upper() in self.idempotent_methods:
+            return True
+        return bool(headers and headers.get('Idempotency-Key'))
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.budget is not None and self.retries_used >= self.budget:
+                return False
+            self.retries_used += 1
+            return True
+
+    def should_retry_error(
+        self,
+        method: str,
+        headers: dict,
+        error: Exception,
+        attempt: int
+    ) -> bool:
+        """
+        連線層錯誤是否重試
+
+        Args:
+            attempt: 已完成的嘗試次數（第一次失敗時為 1）
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if isinstance(error, _CONNECT_ERRORS):
+            return self._take_budget()
+        if isinstance(error, _TRANSIENT_ERRORS) and self.is_idempotent(method, headers):
+            return self._take_budget()
+        return False
+
+    def should_retry_response(
+        self,
+        method: str,
+        headers: dict,
+        response: requests.Response,
+        attempt: int
+    ) -> bool:
+        """回應狀態碼是否重試（僅冪等請求；Retry-After 超過 retry_after_max 時不重試）"""
+        if attempt >= self.max_attempts:
+            return False
+        if response.status_code not in self.retry_statuses:
+            return False
+        if not self.is_idempotent(method, headers):
+            return False
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None and retry_after > self.retry_after_max:
+            return False
+        return self._take_budget()
+
+    def backoff(self, attempt: int, response: requests.Response = None) -> float:
+        """
+        計算下一次重試前的等待秒數（full jitter）
+
+        回應帶有 Retry-After（秒數）時以其為下限，不受 backoff_max 限制
+        （過長的 Retry-After 已由 should_retry_response 排除）。
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        delay = random.uniform(0, ceiling)
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+def retry_after_seconds(response: requests.Response = None):
+    """解析 Retry-After header（僅支援秒數格式）"""
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+_policy = {'current': None}
+
+
+def get_policy() -> RetryPolicy:
+    """取得目前的重試策略（第一次呼叫時依設定建立）"""
+    if _policy['current'] is None:
+        _policy['current'] = RetryPolicy.from_config()
+    return _policy['current']
+
+
+def set_policy(policy: RetryPolicy) -> RetryPolicy:
+    """
+    替換目前的重試策略（例如在 conftest 或個別測試中調整）
+
+    Returns:
+        RetryPolicy: 原本的策略（尚未建立時為 None），傳回 set_policy 即可還原
+    """
+    previous = _policy['current']
+    _policy['current'] = policy
+    return previous
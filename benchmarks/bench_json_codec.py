@@ -0,0 +1,136 @@
+"""
+JSON 編解碼效能量測
+以 1MB 以上的回應（分頁 data[]）比較 common.json_codec 兩種實作（json / orjson）在各呼叫點的耗時，
+直接呼叫實際的程式碼：
+  - download.json_body（測試中解析回應）
+  - FileProcess.read_json（讀檔 + 解析）
+  - mock_server.router.load_expected_json（讀檔 + 解析）
+  - Mock Server 的 jsonify（CodecJSONProvider 序列化回應）
+
+FileProcess / router 讀取暫存目錄下的檔案，並停用測試計畫檔，量測的是原檔讀取路徑。
+
+執行（於專案根目錄，需安裝 orjson）：
+  python -m benchmarks.bench_json_codec --rows 20000 --repeat 5
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+# 在載入 config 之前指定：讀取暫存目錄下的原檔，不產生測試計畫檔
+_DATA_FOLDER = tempfile.mkdtemp(prefix='bench-json-')
+_ENV = 'bench'
+os.environ['TEST_DATA_FOLDER'] = _DATA_FOLDER
+os.environ['ENV'] = _ENV
+os.environ['TEST_PLAN'] = 'false'
+
+import requests  # noqa: E402
+from flask import Flask  # noqa: E402
+
+from api import download  # noqa: E402
+from common import json_codec  # noqa: E402
+from common.file_process import FileProcess  # noqa: E402
+from mock_server import router  # noqa: E402
+from mock_server.app import CodecJSONProvider  # noqa: E402
+
+MODULE, API_NAME, CASE_ID = 'users', 'get_users', 'TC001'
+
+
+def build_payload(rows: int) -> dict:
+    return {
+        'data': [
+            {
+                'id': index,
+                'username': f'test_user_{index}',
+                'email': f'test{index}@example.com',
+                'is_active': index % 3 != 0,
+                'score': index * 0.125,
+                'created_at': '2025-01-01T00:00:00Z',
+                'tags': ['regression', 'smoke'],
+            }
+            for index in range(1, rows + 1)
+        ],
+        'pagination': {'page': 1, 'limit': rows, 'total': rows, 'total_pages': 1},
+    }
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def with_backend(name: str, func):
+    """以指定的 json_codec 實作執行 func"""
+    def run():
+        previous = json_codec.backend()
+        json_codec.set_backend(name)
+        try:
+            return func()
+        finally:
+            json_codec.set_backend(previous)
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='JSON 編解碼效能量測')
+    parser.add_argument('--rows', type=int, default=20000, help='data[] 筆數')
+    parser.add_argument('--repeat', type=int, default=5, help='每項取最佳值的執行次數')
+    args = parser.parse_args(argv)
+
+    if json_codec.orjson is None:
+        shutil.rmtree(_DATA_FOLDER, ignore_errors=True)
+        parser.error('orjson is not installed; nothing to compare')
+
+    payload = build_payload(args.rows)
+    content = json.dumps(payload).encode('utf-8')
+
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    response._content = content
+
+    codec_provider = CodecJSONProvider(Flask(__name__))
+
+    expected_dir = os.path.join(_DATA_FOLDER, _ENV, MODULE, 'expected_result', API_NAME)
+    os.makedirs(expected_dir)
+    path = os.path.join(expected_dir, f'{CASE_ID}.json')
+    with open(path, 'wb') as file_output:
+        file_output.write(content)
+
+    cases = [
+        ('download.json_body', lambda: download.json_body(response)),
+        ('FileProcess.read_json', lambda: FileProcess.read_json(path)),
+        ('router.load_expected_json', lambda: router.load_expected_json(MODULE, API_NAME, CASE_ID)),
+        ('jsonify', lambda: codec_provider.dumps(payload)),
+    ]
+
+    try:
+        # 確認兩種實作在實際呼叫點的結果一致（含鍵順序）
+        for name, func in cases[:3]:
+            stdlib_result = with_backend('json', func)()
+            orjson_result = with_backend('orjson', func)()
+            assert stdlib_result == orjson_result == payload, name
+            assert list(orjson_result['data'][0]) == list(payload['data'][0]), name
+        assert json.loads(with_backend('orjson', cases[3][1])()) == payload
+
+        print(f'payload: {len(content) / 1024 / 1024:.2f} MB')
+        print(f'{"call site":<28}{"json":>12}{"orjson":>12}{"speedup":>10}')
+        for name, func in cases:
+            stdlib_time = best_of(args.repeat, with_backend('json', func))
+            codec_time = best_of(args.repeat, with_backend('orjson', func))
+            print(
+                f'{name:<28}{stdlib_time * 1000:>10.1f}ms{codec_time * 1000:>10.1f}ms'
+                f'{stdlib_time / codec_time:>9.1f}x'
+            )
+    finally:
+        shutil.rmtree(_DATA_FOLDER, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
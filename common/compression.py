@@ -0,0 +1,76 @@
+"""
+HTTP 內容壓縮
+BaseAPI（請求本文壓縮、Accept-Encoding）與 Mock Server（回應壓縮、解壓請求本文）共用。
+支援 gzip、deflate；有安裝 brotli（或 brotlicffi）時另支援 br。
+"""
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# 依偏好排序（協商時優先選擇前面的）
+ENCODINGS = ('br', 'gzip', 'deflate') if brotli is not None else ('gzip', 'deflate')
+
+
+def accept_encoding_header() -> str:
+    """用戶端的 Accept-Encoding 值（例如 'br, gzip, deflate'）"""
+    return ', '.join(ENCODINGS)
+
+
+def choose_encoding(accept_encoding: str):
+    """
+    依 Accept-Encoding 選擇回應使用的壓縮方式
+
+    Args:
+        accept_encoding: 請求的 Accept-Encoding header
+
+    Returns:
+        str: 壓縮方式；不接受任何支援的壓縮時回傳 None
+    """
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """以指定方式壓縮（gzip 不寫入時間戳，相同內容壓縮結果相同）"""
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if encoding == 'deflate':
+        return zlib.compress(data, 6)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=5)
+    raise ValueError(f'Unsupported content encoding: {encoding}')
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """解壓縮（identity 或空值時原樣回傳）"""
+    encoding = (encoding or 'identity').strip().lower()
+    if encoding == 'identity':
+        return data
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.decompress(data)
+    if encoding == 'deflate':
+        return zlib.decompress(data)
+    if encoding == 'br' and brotli is not None:
+        return brotli.decompress(data)
+    raise ValueError(f'Unsupported content encoding: {encoding}')
@@ -32,6 +32,12 @@ class ErrorCode(Enum):
             return None
 
 
+# 客戶狀態（範例）
+CUSTOMER_STATUSES = [
+    "active",
+    "inactive"
+]
+
 # 地址類型（範例）
 ADDRESS_TYPES = [
     "HOME",
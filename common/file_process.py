@@ -2,14 +2,9 @@
 檔案處理工具
 處理 CSV、JSON、TXT 等測試資料檔案
 """
-import json
-
-import pandas as pd
-
 import config
-
-testdata_folder = config.TEST_DATA_FOLDER
-env = config.ENV
+from common import json_codec, test_plan
+from common.test_case import TestCase
 
 
 class FileProcess:
@@ -19,6 +14,21 @@ class FileProcess:
     提供讀取 CSV、JSON、TXT 等檔案的方法
     """
 
+    @classmethod
+    def _plan(cls):
+        """
+        取得目前使用的測試計畫檔
+
+        xdist worker 由主行程傳入路徑掛載；單一行程於 TEST_PLAN 啟用時
+        第一次讀取前檢查（必要時重新編譯）並掛載。
+        """
+        plan = test_plan.current()
+        if plan is None and str(config.TEST_PLAN).lower() in ('true', '1', 'yes'):
+            test_plan.attach(test_plan.ensure(
+                config.TEST_DATA_FOLDER, config.ENV, config.TEST_PLAN_PATH or None))
+            plan = test_plan.current()
+        return plan
+
     @classmethod
     def read_csv_data(cls, file_name: str, path: str):
         """
@@ -29,20 +39,19 @@ class FileProcess:
             path: 檔案所在路徑（相對於 test_data/{env}/）
 
         Returns:
-            list: 包含字典的列表，每個字典代表一筆測試案例
+            list: TestCase 列表，每筆代表一個測試案例（可用 dict 寫法存取欄位）
         """
-        file_path = f"./{testdata_folder}/{env}/{path}/{file_name}"
-        sheet = pd.read_csv(
-            filepath_or_buffer=f"{file_path}.csv",
-            header=0,  # 第一行為標題（本專案 CSV 單一標題列；若為雙列標題則改為 header=1）
-            dtype=str
-        ).dropna(how='all').reset_index(drop=True)  # 移除完全為空的列
+        # 計畫檔中已有此 CSV 時直接由 mmap 取得，不需載入 pandas
+        plan = cls._plan()
+        key = f'{path}/{file_name}'
+        if plan is not None and plan.has_csv(key):
+            return plan.read_csv(key)
 
-        # 將 NaN 值替換為空字串
-        sheet = sheet.where(pd.notnull(sheet), '')
+        file_path = f"./{config.TEST_DATA_FOLDER}/{config.ENV}/{path}/{file_name}"
+        columns, rows = test_plan.read_csv_rows(f"{file_path}.csv")
 
-        # 轉換為字典列表
-        return [dict(sheet.loc[index]) for index in range(len(sheet))]
+        # 轉換為 TestCase 列表（欄位名稱共用、字串值去重）
+        return TestCase.from_rows(columns, rows)
 
     @classmethod
     def read_json(cls, path: str):
@@ -55,5 +64,12 @@ class FileProcess:
         Returns:
             dict or list: JSON 內容
         """
-        with open(path, 'r', encoding='utf-8') as file_input:
-            return json.loads(file_input.read())
+        plan = cls._plan()
+        relative = test_plan.relative_to_env(path, config.TEST_DATA_FOLDER, config.ENV)
+        if plan is not None and relative is not None:
+            content = plan.expected_bytes(relative)
+            if content is not None:
+                return json_codec.loads(content)
+
+        with open(path, 'rb') as file_input:
+            return json_codec.loads(file_input.read())
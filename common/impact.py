@@ -0,0 +1,122 @@
+"""
+增量執行（change impact）
+每個案例的指紋 = CSV 列內容 + 端點宣告 + expected_result / schema JSON 的 hash + 測試程式碼的 hash
+（api/、Validator/、utils/、common/ 與測試模組、conftest.py）+ 目標環境。
+結果存放於 pytest 的 cache（.pytest_cache，鍵 IMPACT_CACHE_KEY）；
+指紋未變且上次通過的案例標記為 cached-pass（skip），指紋變更或上次失敗的案例照常執行。
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+IMPACT_CACHE_KEY = 'impact/results'
+
+# 案例會經過的程式碼目錄（相對於專案根目錄）
+CODE_PACKAGES = ('api', 'Validator', 'utils', 'common')
+
+OUTCOME_PASSED = 'passed'
+OUTCOME_FAILED = 'failed'
+
+
+def file_hash(path: str) -> str:
+    """檔案內容的 sha256（檔案不存在時回傳空字串）"""
+    try:
+        with open(path, 'rb') as file_input:
+            return hashlib.sha256(file_input.read()).hexdigest()
+    except OSError:
+        return ''
+
+
+@lru_cache(maxsize=None)
+def code_hash(root: str, packages: tuple = CODE_PACKAGES, extra_files: tuple = ()) -> str:
+    """
+    程式碼的 hash（目錄下所有 .py 依相對路徑排序後計算；每個行程只計算一次）
+
+    Args:
+        root: 專案根目錄
+        packages: 納入的目錄
+        extra_files: 額外納入的檔案（相對於 root）
+    """
+    digest = hashlib.sha256()
+    paths = list(extra_files)
+    for package in packages:
+        for folder, dirs, files in os.walk(os.path.join(root, package)):
+            dirs[:] = sorted(name for name in dirs if name != '__pycache__')
+            paths.extend(
+                os.path.relpath(os.path.join(folder, name), root)
+                for name in files if name.endswith('.py')
+            )
+    for relative in sorted(paths):
+        digest.update(relative.replace(os.sep, '/').encode())
+        digest.update(b'\0')
+        digest.update(file_hash(os.path.join(root, relative)).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def case_fingerprint(endpoint, case_input, test_data_folder: str, env: str, code: str, target: str = '') -> str:
+    """
+    單一案例的指紋
+
+    Args:
+        endpoint: 端點宣告（common.registry.Endpoint）
+        case_input: CSV 列
+        test_data_folder: 測試資料根目錄
+        env: 環境
+        code: code_hash 的結果
+        target: 受測服務（例如 base URL），不同服務的結果不共用
+    """
+    payload = {
+        'case': sorted((str(name), str(value)) for name, value in dict(case_input).items()),
+        'endpoint': sorted((name, str(value)) for name, value in vars(endpoint).items()),
+        'expected': file_hash(
+            endpoint.expected_path(test_data_folder, env, case_input['case_id'])),
+        'schema': file_hash(endpoint.schema_path(test_data_folder, env)),
+        'code': code,
+        'env': env,
+        'target': target,
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def is_cached_pass(results: Dict[str, dict], nodeid: str, fingerprint: str) -> bool:
+    """上次以相同指紋通過"""
+    record = results.get(nodeid)
+    return (
+        record is not None
+        and record.get('fingerprint') == fingerprint
+        and record.get('outcome') == OUTCOME_PASSED
+    )
+
+
+class ResultRecorder:
+    """
+    收集本次執行的結果（主行程的 pytest_runtest_logreport 呼叫；xdist worker 的報告也會回到主行程）
+
+    Args:
+        previous: 上次儲存的結果（nodeid → {'fingerprint', 'outcome'}）
+    """
+
+    def __init__(self, previous: Optional[Dict[str, dict]] = None):
+        self._results = dict(previous or {})
+        self._outcomes = {}
+
+    def observe(self, nodeid: str, when: str, outcome: str, properties: Iterable):
+        fingerprint = next((value for name, value in properties if name == 'impact_fingerprint'), None)
+        if fingerprint is None or any(name == 'cached_pass' for name, _ in properties):
+            return
+        current = self._outcomes.get(nodeid)
+        if outcome == 'failed':
+            self._outcomes[nodeid] = (fingerprint, OUTCOME_FAILED)
+        elif when == 'call' and outcome == 'passed' and current is None:
+            self._outcomes[nodeid] = (fingerprint, OUTCOME_PASSED)
+
+    def results(self) -> Dict[str, dict]:
+        """合併後的結果（本次未執行或被 skip 的案例保留上次的紀錄）"""
+        merged = dict(self._results)
+        for nodeid, (fingerprint, outcome) in self._outcomes.items():
+            merged[nodeid] = {'fingerprint': fingerprint, 'outcome': outcome}
+        return merged
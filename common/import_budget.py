@@ -0,0 +1,112 @@
+"""
+Import 時間預算檢查
+以 `python -X importtime` 量測各模組的啟動 import 成本，
+超過 import_budget.json 設定的預算，或提早載入了應延遲載入的重量級套件時回傳非 0。
+
+執行（於專案根目錄）：
+  python -m common.import_budget
+  python -m common.import_budget --budget-file import_budget.json --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> dict:
+    """
+    以獨立的 Python 行程 import 模組並解析 -X importtime 輸出
+
+    Args:
+        module: 模組名稱（例如 'common.file_process'）
+
+    Returns:
+        dict: {'total_us': 模組的累計 import 微秒數, 'imported': 載入的所有模組名稱}
+
+    Raises:
+        RuntimeError: 當 import 失敗時
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'import {module} failed:\n{result.stderr}')
+
+    imported = set()
+    total_us = 0
+    for line in result.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            total_us = int(cumulative)
+    return {'total_us': total_us, 'imported': imported}
+
+
+def check(budget: dict, runs: int = 3) -> list:
+    """
+    依預算檢查所有模組
+
+    Args:
+        budget: import_budget.json 內容
+        runs: 每個模組量測次數（取最小值以降低雜訊）
+
+    Returns:
+        list: 違反預算的說明文字（空 list 表示通過）
+    """
+    violations = []
+    for module, rule in budget['modules'].items():
+        samples = [measure(module) for _ in range(runs)]
+        best_ms = min(sample['total_us'] for sample in samples) / 1000
+        limit_ms = rule['budget_ms']
+        loaded = sorted(
+            name for name in rule.get('deferred', [])
+            if name in samples[0]['imported']
+        )
+        status = 'OK' if best_ms <= limit_ms and not loaded else 'FAIL'
+        print(f'{status:4} {module:32} {best_ms:8.1f} ms (budget {limit_ms} ms)')
+
+        if best_ms > limit_ms:
+            violations.append(
+                f'{module}: {best_ms:.1f} ms exceeds budget {limit_ms} ms')
+        if loaded:
+            violations.append(
+                f'{module}: imports deferred dependencies at startup: '
+                f'{", ".join(loaded)}'
+            )
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import 時間預算檢查')
+    parser.add_argument(
+        '--budget-file',
+        default=os.path.join(PROJECT_ROOT, 'import_budget.json'))
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with open(args.budget_file, 'r', encoding='utf-8') as file_input:
+        budget = json.load(file_input)
+
+    violations = check(budget, runs=args.runs)
+    if violations:
+        print('\n ✘✘✘ Import budget exceeded ✘✘✘')
+        for violation in violations:
+            print(f'- {violation}')
+        sys.exit(1)
+    print('\n ✔✔✔ Import budget OK ✔✔✔')
+
+
+if __name__ == '__main__':
+    main()
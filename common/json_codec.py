@@ -0,0 +1,85 @@
+"""
+JSON 編解碼
+統一測試（resp.json）、FileProcess.read_json、Mock Server（expected JSON 與回應）使用的 JSON 實作：
+有安裝 orjson 時使用 orjson，否則使用標準函式庫 json。
+
+- 物件鍵維持原始順序，浮點數解析結果與標準函式庫相同，Validator 的比對不受影響
+- 解析：orjson 不接受的輸入（超過 64 位元的整數、NaN / Infinity 字面值等）改用標準函式庫
+- 序列化：orjson 不支援的型別（超過 64 位元的整數、非字串鍵等）改用標準函式庫；
+  非有限浮點數（NaN / Infinity）orjson 會寫成 null 而非標準函式庫的 NaN 字面值，
+  需要保留字面值時請設定 JSON_CODEC=json
+
+設定 JSON_CODEC（經 config 讀取，含 .env）：auto（預設）/ orjson / json；於第一次編解碼時才決定
+"""
+import json
+
+import config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    orjson = None
+
+BACKENDS = ('auto', 'orjson', 'json')
+
+_backend = {'name': None}
+
+
+def set_backend(name: str):
+    """
+    設定使用的實作
+
+    Args:
+        name: auto（有 orjson 時使用 orjson）、orjson 或 json
+    """
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown JSON codec: {name} (expected one of {BACKENDS})')
+    if name == 'orjson' and orjson is None:
+        raise ValueError('JSON_CODEC=orjson but orjson is not installed')
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    _backend['name'] = name
+
+
+def backend() -> str:
+    """目前使用的實作名稱（尚未設定時依 config.JSON_CODEC 決定）"""
+    if _backend['name'] is None:
+        set_backend(str(config.JSON_CODEC).lower())
+    return _backend['name']
+
+
+def loads(data):
+    """
+    解析 JSON
+
+    Args:
+        data: bytes / bytearray / memoryview / str
+
+    Returns:
+        dict or list: JSON 內容
+    """
+    if (_backend['name'] or backend()) == 'orjson':
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # 交由標準函式庫解析（或拋出標準的 json.JSONDecodeError）
+            pass
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps_bytes(obj) -> bytes:
+    """序列化為 UTF-8 bytes（不跳脫非 ASCII 字元；orjson 將 NaN / Infinity 寫成 null）"""
+    if (_backend['name'] or backend()) == 'orjson':
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps(obj) -> str:
+    """序列化為字串（不跳脫非 ASCII 字元）"""
+    return dumps_bytes(obj).decode('utf-8')
+
@@ -0,0 +1,375 @@
+"""
+案例層級的 CPU / 記憶體剖析（--profile-cases / --trace-memory）
+
+- CPU：背景執行緒每 PROFILE_INTERVAL_MS 以 sys._current_frames() 取樣執行案例的執行緒（sampling，不攔截每次函式呼叫），
+  等待網路時同樣會取到樣本（落在 socket / ssl），可區分 CPU 時間與網路等待
+- 記憶體：tracemalloc 記錄每個案例的峰值與留存量，session 結束時依配置位置彙整仍存活的配置
+
+每個樣本歸屬到最接近堆疊頂端的框架元件（FileProcess、BaseAPI、Validator、Assert、test）與其呼叫的函式庫
+（pandas、deepdiff、json、network、import…），例如 Validator/deepdiff。
+session 結束時於 PROFILE_OUTPUT 輸出：
+  report.txt         各元件 / 函式 / 案例的 top-N
+  cpu.collapsed      collapsed stack（flamegraph.pl、speedscope 可直接讀取），數值為樣本數
+  memory.collapsed   同上，數值為 session 結束時仍存活的 bytes
+xdist 下各 worker 將結果寫入 PROFILE_OUTPUT/.parts/，由主行程合併後輸出。
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+# 框架元件（相對於專案根目錄的路徑前綴，依序比對）
+COMPONENTS = (
+    ('common/file_process.py', 'FileProcess'),
+    ('common/test_plan.py', 'FileProcess'),
+    ('common/test_case.py', 'FileProcess'),
+    ('api/', 'BaseAPI'),
+    ('Validator/', 'Validator'),
+    ('utils/assert_response.py', 'Assert'),
+    ('tests/', 'test'),
+)
+
+# 函式庫（專案外為 site-packages / 標準函式庫的相對路徑；專案內為相對於根目錄的路徑）
+LIBRARIES = (
+    ('pandas/', 'pandas'),
+    ('numpy/', 'numpy'),
+    ('deepdiff/', 'deepdiff'),
+    ('jsonschema/', 'jsonschema'),
+    ('json/', 'json'),
+    ('orjson', 'json'),
+    ('common/json_codec.py', 'json'),
+    ('socket.py', 'network'),
+    ('ssl.py', 'network'),
+    ('selectors.py', 'network'),
+    ('http/client.py', 'network'),
+    ('urllib3/', 'network'),
+    ('requests/', 'network'),
+    ('<frozen importlib', 'import'),
+    ('importlib/', 'import'),
+)
+
+OTHER = 'other'
+SELF = 'self'
+
+
+class _Labeler:
+    """code object → 顯示名稱 / 元件 / 函式庫（每個 code object 只計算一次）"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root) + os.sep
+        self._cache = {}
+
+    def path(self, filename: str) -> str:
+        if filename.startswith(self.root):
+            return filename[len(self.root):].replace(os.sep, '/')
+        normalized = filename.replace(os.sep, '/')
+        for marker in ('/site-packages/', '/dist-packages/'):
+            if marker in normalized:
+                return normalized.rsplit(marker, 1)[1]
+        # 標準函式庫：去掉 .../lib/pythonX.Y/
+        head, sep, tail = normalized.rpartition(f'/python{sys.version_info[0]}.{sys.version_info[1]}/')
+        return tail if sep else normalized
+
+    def label(self, filename: str, name: str):
+        key = (filename, name)
+        cached = self._cache.get(key)
+        if cached is None:
+            path = self.path(filename)
+            is_project = filename.startswith(self.root)
+            component = next(
+                (label for prefix, label in COMPONENTS if is_project and path.startswith(prefix)), None)
+            library = next(
+                (label for prefix, label in LIBRARIES if path.startswith(prefix)), None)
+            cached = self._cache[key] = (f'{path}:{name}', component, library)
+        return cached
+
+    def classify(self, frames) -> str:
+        """
+        frames 由堆疊底端（最外層）排到頂端；回傳「元件/函式庫」
+
+        元件為最接近頂端的框架元件，函式庫為元件之上最接近頂端的函式庫（沒有時為 self）
+        """
+        library = None
+        for name, component, frame_library in reversed(frames):
+            if component is not None:
+                return f'{component}/{library or SELF}'
+            if library is None and frame_library is not None:
+                library = frame_library
+        return f'{OTHER}/{library or SELF}'
+
+
+class CaseSampler:
+    """
+    取樣式 CPU 剖析
+
+    Args:
+        root: 專案根目錄
+        interval: 取樣間隔（秒）
+    """
+
+    def __init__(self, root: str, interval: float = 0.005):
+        self.interval = interval
+        self._labeler = _Labeler(root)
+        self._case = None
+        self._thread_id = None
+        # (nodeid, code objects 由頂端到底端) → 樣本數；字串化延後到輸出時
+        self._samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='case-sampler', daemon=True)
+
+    @property
+    def started(self) -> bool:
+        return self._thread.ident is not None
+
+    def stop(self):
+        if self.started:
+            self._stop.set()
+            self._thread.join()
+
+    def begin(self, nodeid: str):
+        """開始取樣目前執行緒上的案例（第一個案例時才啟動取樣執行緒，xdist 主行程不取樣）"""
+        self._thread_id = threading.get_ident()
+        self._case = nodeid
+        if not self.started:
+            self._thread.start()
+
+    def end(self):
+        self._case = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            case = self._case
+            if case is None:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if codes:
+                self._samples[(case, tuple(codes))] += 1
+
+    def data(self) -> dict:
+        """可序列化的結果：{'interval', 'stacks': {collapsed: 數}, 'cases': {nodeid: {元件/函式庫: 數}}}"""
+        stacks = Counter()
+        cases: Dict[str, Counter] = {}
+        for (case, codes), count in self._samples.items():
+            frames = [self._labeler.label(code.co_filename, code.co_name) for code in reversed(codes)]
+            stacks[';'.join(frame[0] for frame in frames)] += count
+            cases.setdefault(case, Counter())[self._labeler.classify(frames)] += count
+        return {
+            'interval': self.interval,
+            'stacks': dict(stacks),
+            'cases': {case: dict(counter) for case, counter in cases.items()},
+        }
+
+
+class MemoryTracer:
+    """
+    tracemalloc 記錄每個案例的峰值 / 留存量；session 結束時取一次快照，依配置位置彙整仍存活的配置
+
+    每個案例只讀取 tracemalloc 的計數器，不在案例之間取快照（大型 session 的快照與比較需數秒以上）
+
+    Args:
+        root: 專案根目錄
+        frames: tracemalloc 保留的堆疊深度（越深越容易歸屬到框架元件，額外負擔也越高）
+    """
+
+    def __init__(self, root: str, frames: int = 16):
+        self.frames = frames
+        self._labeler = _Labeler(root)
+        self.started = False
+        self._baseline = 0
+        self._cases: Dict[str, dict] = {}
+
+    def stop(self):
+        if self.started:
+            tracemalloc.stop()
+
+    def begin(self, nodeid: str):
+        """開始記錄案例（第一個案例時才啟動 tracemalloc，xdist 主行程不追蹤）"""
+        if not self.started:
+            tracemalloc.start(self.frames)
+            self.started = True
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+
+    def end(self, nodeid: str):
+        current, peak = tracemalloc.get_traced_memory()
+        self._cases[nodeid] = {'peak': peak - self._baseline, 'retained': current - self._baseline}
+
+    def data(self) -> dict:
+        """
+        可序列化的結果（須在 stop 之前呼叫）：
+        {'stacks': {collapsed: bytes}, 'components': {元件/函式庫: bytes}, 'cases': {nodeid: {'peak', 'retained'}}}
+        """
+        stacks = Counter()
+        components = Counter()
+        for stat in tracemalloc.take_snapshot().statistics('traceback'):
+            if any(frame.filename == __file__ for frame in stat.traceback):
+                continue  # 取樣器本身的資料
+            frames = [
+                self._labeler.label(frame.filename, str(frame.lineno))
+                for frame in stat.traceback
+                if frame.filename != tracemalloc.__file__
+            ]
+            stacks[';'.join(frame[0] for frame in frames)] += stat.size
+            components[self._labeler.classify(frames)] += stat.size
+        return {'stacks': dict(stacks), 'components': dict(components), 'cases': dict(self._cases)}
+
+
+def save_part(folder: str, name: str, data: dict):
+    """儲存單一行程的結果（xdist worker）"""
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f'{name}.json'), 'w', encoding='utf-8') as file_output:
+        json.dump(data, file_output)
+
+
+def merge(parts: List[dict]) -> dict:
+    """合併多個行程的結果"""
+    merged = {'cpu': None, 'memory': None}
+    for part in parts:
+        for kind in ('cpu', 'memory'):
+            source = part.get(kind)
+            if source is None:
+                continue
+            target = merged[kind]
+            if target is None:
+                target = merged[kind] = {'stacks': {}, 'cases': {}}
+                if 'interval' in source:
+                    target['interval'] = source['interval']
+            for field in ('stacks', 'components'):
+                if field in source:
+                    totals = target.setdefault(field, {})
+                    for key, value in source[field].items():
+                        totals[key] = totals.get(key, 0) + value
+            target['cases'].update(source['cases'])
+    return merged
+
+
+def load_parts(folder: str) -> List[dict]:
+    parts = []
+    if os.path.isdir(folder):
+        for name in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, name), 'r', encoding='utf-8') as file_input:
+                parts.append(json.load(file_input))
+    return parts
+
+
+def _write_collapsed(path: str, stacks: Dict[str, int]):
+    with open(path, 'w', encoding='utf-8') as file_output:
+        for stack, value in sorted(stacks.items()):
+            file_output.write(f'{stack} {value}\n')
+
+
+def _percent(value: float, total: float) -> str:
+    return f'{value / total:6.1%}' if total else '     -'
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+def _cpu_components(cpu: dict) -> Counter:
+    components = Counter()
+    for counter in cpu['cases'].values():
+        components.update(counter)
+    return components
+
+
+def _memory_components(memory: dict) -> Counter:
+    return Counter(memory.get('components', {}))
+
+
+def _cpu_report(cpu: dict, top_n: int) -> List[str]:
+    interval = cpu.get('interval', 0)
+    components = _cpu_components(cpu)
+    total = sum(components.values())
+    functions = Counter()
+    for stack, count in cpu['stacks'].items():
+        functions[stack.rsplit(';', 1)[-1]] += count
+
+    lines = [f'CPU profile: {total} samples ({interval * 1000:g} ms interval, ~{total * interval:.2f} s)', '']
+    lines.append('Top components:')
+    lines.extend(f'  {_percent(count, total)}  {label}' for label, count in components.most_common(top_n))
+    lines.extend(['', 'Top functions (self):'])
+    lines.extend(f'  {_percent(count, total)}  {name}' for name, count in functions.most_common(top_n))
+    lines.extend(['', 'Top cases:'])
+    ranked = sorted(cpu['cases'].items(), key=lambda item: -sum(item[1].values()))
+    for nodeid, counter in ranked[:top_n]:
+        case_total = sum(counter.values())
+        label, count = Counter(counter).most_common(1)[0]
+        lines.append(
+            f'  {case_total * interval:7.3f} s  {nodeid}  ({label} {count / case_total:.0%})')
+    return lines
+
+
+def _memory_report(memory: dict, top_n: int) -> List[str]:
+    components = _memory_components(memory)
+    total = sum(components.values())
+    sites = Counter()
+    for stack, size in memory['stacks'].items():
+        sites[stack.rsplit(';', 1)[-1]] += size
+
+    lines = [f'Memory (tracemalloc): {_format_bytes(total)} live at session end', '']
+    lines.append('Top components (live):')
+    lines.extend(
+        f'  {_percent(size, total)}  {_format_bytes(size):>10}  {label}'
+        for label, size in components.most_common(top_n))
+    lines.extend(['', 'Top allocation sites (live):'])
+    lines.extend(
+        f'  {_format_bytes(size):>10}  {site}' for site, size in sites.most_common(top_n))
+    lines.extend(['', 'Top cases (peak):'])
+    ranked = sorted(memory['cases'].items(), key=lambda item: -item[1]['peak'])
+    lines.extend(
+        f'  {_format_bytes(case["peak"]):>10} peak, {_format_bytes(case["retained"]):>10} retained  {nodeid}'
+        for nodeid, case in ranked[:top_n])
+    return lines
+
+
+def write_reports(folder: str, data: dict, top_n: int = 20) -> Optional[List[str]]:
+    """
+    輸出 report.txt 與 collapsed stack 檔
+
+    Returns:
+        list: 報告內容（每行一筆）；沒有任何結果時回傳 None
+    """
+    sections = []
+    os.makedirs(folder, exist_ok=True)
+    if data.get('cpu'):
+        sections.append(_cpu_report(data['cpu'], top_n))
+        _write_collapsed(os.path.join(folder, 'cpu.collapsed'), data['cpu']['stacks'])
+    if data.get('memory'):
+        sections.append(_memory_report(data['memory'], top_n))
+        _write_collapsed(os.path.join(folder, 'memory.collapsed'), data['memory']['stacks'])
+    if not sections:
+        return None
+    lines = [f'Generated at {time.strftime("%Y-%m-%d %H:%M:%S")}', '']
+    for section in sections:
+        lines.extend(section + [''])
+    with open(os.path.join(folder, 'report.txt'), 'w', encoding='utf-8') as file_output:
+        file_output.write('\n'.join(lines))
+    return lines
+
+
+def summary(data: dict, top_n: int = 5) -> List[str]:
+    """終端摘要用：CPU 樣本與留存配置最多的元件"""
+    lines = []
+    if data.get('cpu'):
+        components = _cpu_components(data['cpu'])
+        total = sum(components.values())
+        lines.append('CPU: ' + ', '.join(
+            f'{label} {count / total:.0%}' for label, count in components.most_common(top_n)))
+    if data.get('memory'):
+        components = _memory_components(data['memory'])
+        lines.append('Memory: ' + ', '.join(
+            f'{label} {_format_bytes(size)}' for label, size in components.most_common(top_n)))
+    return lines
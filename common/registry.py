@@ -0,0 +1,114 @@
+"""
+端點註冊表
+讀取 test_data/endpoints.json 的端點宣告，
+供 pytest 產生測試案例、Mock Server 產生路由，不需再為每個端點手寫測試模組。
+"""
+import json
+import os
+from functools import lru_cache
+from typing import List
+
+REGISTRY_FILE = 'endpoints.json'
+
+
+class Endpoint:
+    """
+    單一端點的宣告
+
+    Args:
+        module: 模組名稱（對應 test_data/{env}/{module}/）
+        api_name: API 名稱（用於 Validator 的 api_tag）
+        method: HTTP 方法
+        path: API 路徑（不含版本前綴，例如 '/users'）
+        csv_file: CSV 檔名（不含副檔名，預設同 api_name）
+        expected_result: 預期結果目錄（相對於 test_data/{env}/，預設 {module}/expected_result/{api_name}）
+        epic / feature / story / severity: Allure 標記
+        order: pytest-order 執行順序
+        mock_db_table: Mock Server 從 Mock DB 取資料時使用的資料表（可選）
+        validation: 預設驗證方式（exact=比對 expected_result JSON、schema=只驗證結構；CSV 的 validation 欄可逐案例覆寫）
+        schema: schema JSON 路徑（相對於 test_data/{env}/，預設 {module}/schema/{api_name}.json）
+        max_body_bytes: 回應本文大小上限（可選；CSV 的 max_body_bytes 欄可逐案例覆寫）
+    """
+
+    def __init__(
+        self,
+        module: str,
+        api_name: str,
+        method: str,
+        path: str,
+        csv_file: str = None,
+        expected_result: str = None,
+        epic: str = None,
+        feature: str = None,
+        story: str = None,
+        severity: str = 'normal',
+        order: int = None,
+        mock_db_table: str = None,
+        validation: str = 'exact',
+        schema: str = None,
+        max_body_bytes: int = None
+    ):
+        self.module = module
+        self.api_name = api_name
+        self.method = method.upper()
+        self.path = path
+        self.csv_file = csv_file or api_name
+        self.expected_result = (
+            expected_result or f'{module}/expected_result/{api_name}')
+        self.epic = epic or module.capitalize()
+        self.feature = feature or api_name
+        self.story = story
+        self.severity = severity
+        self.order = order
+        self.mock_db_table = mock_db_table
+        self.validation = validation
+        self.schema = schema or f'{module}/schema/{api_name}.json'
+        self.max_body_bytes = max_body_bytes
+
+    @property
+    def key(self) -> str:
+        """端點識別字串（例如 'users.get_users'），用於 pytest id 與 Mock 路由名稱"""
+        return f'{self.module}.{self.api_name}'
+
+    def expected_path(self, test_data_folder: str, env: str, case_id: str) -> str:
+        """預期結果 JSON 的路徑"""
+        return f'./{test_data_folder}/{env}/{self.expected_result}/{case_id}.json'
+
+    def schema_path(self, test_data_folder: str, env: str) -> str:
+        """schema JSON 的路徑"""
+        return f'./{test_data_folder}/{env}/{self.schema}'
+
+    def validation_mode(self, case_input) -> str:
+        """案例的驗證方式（CSV validation 欄優先，空白時使用端點預設）"""
+        return (case_input.get('validation') or self.validation).strip().lower()
+
+    def body_limit(self, case_input):
+        """案例的回應本文大小上限（CSV max_body_bytes 欄優先，空白時使用端點設定）"""
+        value = case_input.get('max_body_bytes')
+        return int(value) if value else self.max_body_bytes
+
+    def __repr__(self):
+        return f'Endpoint({self.method} {self.path}, {self.key})'
+
+
+@lru_cache(maxsize=None)
+def load_endpoints(test_data_folder: str) -> List[Endpoint]:
+    """
+    讀取端點註冊表（每個行程只解析一次）
+
+    Args:
+        test_data_folder: 測試資料根目錄（endpoints.json 所在目錄）
+
+    Returns:
+        list: Endpoint 列表（依 order 排序）
+    """
+    path = os.path.join(test_data_folder, REGISTRY_FILE)
+    if not os.path.isfile(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as file_input:
+        declared = json.load(file_input)['endpoints']
+    endpoints = [Endpoint(**item) for item in declared]
+    return sorted(
+        endpoints,
+        key=lambda endpoint: (endpoint.order is None, endpoint.order or 0)
+    )
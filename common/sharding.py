@@ -0,0 +1,141 @@
+"""
+跨機器分片（--shard-index / --shard-count）
+依「module + api_name + case_id」決定案例所屬的分片，每台機器收集到相同的案例集合即得到相同的切分，
+分片內仍可搭配 xdist（-n）並行。
+
+- 無歷史時間：依鍵的 hash 排序後輪流分配，各分片案例數最多相差 1
+- 有歷史時間（--shard-timings）：以 greedy LPT 分配（由耗時最長的案例開始，放入目前總時間最少的分片），
+  沒有紀錄的案例以已知時間的中位數估計
+
+合併各分片的結果：
+  python -m common.sharding merge --results shard-0/allure-results shard-1/allure-results \\
+      --output allure-results --timings shard-0/timings.json shard-1/timings.json --timings-output timings.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import sys
+from typing import Dict, Iterable, List, Sequence
+
+SHARD_KEY_PROPERTY = 'shard_key'
+
+
+def case_key(endpoint, case_input) -> str:
+    """端點案例的分片鍵（與 nodeid 無關，測試檔改名或搬移不影響分配）"""
+    return f'{endpoint.module}/{endpoint.api_name}/{case_input["case_id"]}'
+
+
+def _stable_hash(key: str) -> str:
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def assign(keys: Sequence[str], shard_count: int, durations: Dict[str, float] = None) -> Dict[str, int]:
+    """
+    將案例分配到各分片
+
+    Args:
+        keys: 所有案例的分片鍵（重複的鍵視為同一案例）
+        shard_count: 分片數
+        durations: 歷史執行時間（鍵 → 秒）；None 或空時依 hash 輪流分配
+
+    Returns:
+        dict: 鍵 → 分片索引（0 起算）
+    """
+    unique = sorted(set(keys), key=lambda key: (_stable_hash(key), key))
+    if not durations:
+        return {key: index % shard_count for index, key in enumerate(unique)}
+
+    known = [durations[key] for key in unique if key in durations]
+    default = statistics.median(known) if known else 1.0
+    weighted = sorted(
+        unique, key=lambda key: (-durations.get(key, default), _stable_hash(key), key))
+    loads = [0.0] * shard_count
+    assignment = {}
+    for key in weighted:
+        # 總時間相同時選索引較小的分片，確保結果固定
+        shard = min(range(shard_count), key=lambda index: (loads[index], index))
+        assignment[key] = shard
+        loads[shard] += durations.get(key, default)
+    return assignment
+
+
+def load_timings(path: str) -> Dict[str, float]:
+    """讀取歷史時間（檔案不存在時回傳空 dict）"""
+    if not path or not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file_input:
+        return {key: float(value) for key, value in json.load(file_input).items()}
+
+
+def save_timings(path: str, timings: Dict[str, float]):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file_output:
+        json.dump(dict(sorted(timings.items())), file_output, indent=2)
+
+
+class TimingRecorder:
+    """彙整每個案例的 setup + call + teardown 時間（主行程的 pytest_runtest_logreport 呼叫）"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    def observe(self, duration: float, properties: Iterable):
+        key = next((value for name, value in properties if name == SHARD_KEY_PROPERTY), None)
+        if key is not None:
+            self.timings[key] = self.timings.get(key, 0.0) + duration
+
+
+def merge_results(sources: List[str], output: str) -> int:
+    """
+    合併各分片的 allure-results（結果檔以 uuid 命名不會衝突；同名檔案如 environment.properties 以後者為準）
+
+    Returns:
+        int: 複製的檔案數
+    """
+    os.makedirs(output, exist_ok=True)
+    copied = 0
+    for source in sources:
+        for folder, _, files in os.walk(source):
+            target = os.path.join(output, os.path.relpath(folder, source))
+            os.makedirs(target, exist_ok=True)
+            for name in files:
+                shutil.copy2(os.path.join(folder, name), os.path.join(target, name))
+                copied += 1
+    return copied
+
+
+def merge_timings(sources: List[str]) -> Dict[str, float]:
+    """合併各分片的時間紀錄（同一案例以後者為準）"""
+    merged = {}
+    for source in sources:
+        merged.update(load_timings(source))
+    return merged
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='合併各分片的 allure-results 與執行時間')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    merge = subparsers.add_parser('merge', help='合併 allure-results 與時間紀錄')
+    merge.add_argument('--results', nargs='*', default=[], help='各分片的 allure-results 目錄')
+    merge.add_argument('--output', default='allure-results', help='合併後的 allure-results 目錄')
+    merge.add_argument('--timings', nargs='*', default=[], help='各分片的時間紀錄 JSON')
+    merge.add_argument('--timings-output', default=None, help='合併後的時間紀錄 JSON（供下次 --shard-timings）')
+    args = parser.parse_args(argv)
+
+    if args.results:
+        copied = merge_results(args.results, args.output)
+        print(f'Merged {copied} files from {len(args.results)} shards into {args.output}')
+    if args.timings and args.timings_output:
+        timings = merge_timings(args.timings)
+        save_timings(args.timings_output, timings)
+        print(f'Merged timings of {len(timings)} cases into {args.timings_output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+測試案例紀錄
+以 __slots__ 儲存 CSV 的一列：欄位名稱由同一個 CSV 的所有案例共用，
+字串值經 sys.intern 去重，仍可用 case_input['status_code']、case_input.get(...) 等 dict 寫法存取。
+"""
+import sys
+from collections.abc import Mapping
+
+
+class CaseColumns:
+    """
+    欄位定義（同一個 CSV 的所有案例共用一份）
+
+    Args:
+        names: 欄位名稱 tuple
+    """
+    __slots__ = ('names', 'index')
+
+    _cache = {}
+
+    def __init__(self, names: tuple):
+        self.names = names
+        self.index = {name: position for position, name in enumerate(names)}
+
+    @classmethod
+    def get(cls, names) -> 'CaseColumns':
+        """取得（或建立）相同欄位名稱的共用定義"""
+        names = tuple(sys.intern(str(name)) for name in names)
+        columns = cls._cache.get(names)
+        if columns is None:
+            columns = cls._cache[names] = cls(names)
+        return columns
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TestCase(Mapping):
+    """
+    單一測試案例（CSV 的一列）
+
+    Args:
+        columns: CaseColumns 欄位定義
+        values: 與欄位順序相同的值
+    """
+    __slots__ = ('_columns', '_values')
+    # 避免被 pytest 當成測試類別收集
+    __test__ = False
+
+    def __init__(self, columns: CaseColumns, values: tuple):
+        self._columns = columns
+        self._values = tuple(_intern(value) for value in values)
+
+    @classmethod
+    def from_rows(cls, names, rows) -> list:
+        """
+        由欄位名稱與多列值建立案例列表
+
+        Args:
+            names: 欄位名稱
+            rows: 每列的值（iterable of tuple）
+
+        Returns:
+            list: TestCase 列表
+        """
+        columns = CaseColumns.get(names)
+        return [cls(columns, row) for row in rows]
+
+    @property
+    def case_id(self) -> str:
+        return self.get('case_id', '')
+
+    @property
+    def row(self) -> tuple:
+        """依欄位順序排列的值（序列化快照時使用）"""
+        return self._values
+
+    def __getitem__(self, key):
+        return self._values[self._columns.index[key]]
+
+    def __iter__(self):
+        return iter(self._columns.names)
+
+    def __len__(self):
+        return len(self._values)
+
+    def to_dict(self) -> dict:
+        return dict(zip(self._columns.names, self._values))
+
+    def __reduce__(self):
+        return (_restore, (self._columns.names, self._values))
+
+    def __repr__(self):
+        return f'TestCase({self.to_dict()!r})'
+
+
+def _restore(names: tuple, values: tuple) -> TestCase:
+    return TestCase(CaseColumns.get(names), values)
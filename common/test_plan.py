@@ -0,0 +1,506 @@
+"""
+預先編譯的測試計畫檔
+將 test_data/{env}/ 下所有 CSV 與 expected_result 索引編譯成單一二進位檔（欄式儲存 + 字串表 + case_id 索引），
+FileProcess、Mock Server router 與 xdist worker 以 mmap 載入，不必在每次收集時重新解析 CSV。
+任何來源檔案的路徑、大小或 mtime 改變（或數量改變）時自動重新產生。
+
+指令列（於專案根目錄執行）：
+  python -m common.test_plan build --env dev
+  python -m common.test_plan info --env dev
+
+檔案格式（原生位元組順序，僅作為本機快取）：
+  MAGIC (8 bytes) | header 長度 (uint64) | header JSON | 資料區（各區段 8 bytes 對齊）
+  - 字串表：所有字串排序去重；uint64 offsets (n + 1) + UTF-8 bytes，字串 id 即排序位置
+  - CSV 表：每個欄位一個 uint32 字串 id 陣列；case_id 索引為依 case_id 排序的列號陣列
+  - expected_result：路徑字串 id（排序）、內容 offset、長度（-1 表示未內嵌，需讀原檔）
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Mapping
+
+from common.test_case import CaseColumns, TestCase
+
+MAGIC = b'TPLAN001'
+_LENGTH = struct.Struct('<Q')
+# expected JSON 小於此大小時內嵌於計畫檔，較大的只記錄路徑
+DEFAULT_EMBED_LIMIT = 64 * 1024
+
+_attached = {'plan': None}
+
+
+def default_plan_path(env: str) -> str:
+    return os.path.join('.test_plan', f'{env}.plan')
+
+
+def read_csv_rows(file_path: str):
+    """
+    以 pandas 讀取 CSV（與 FileProcess 原本的規則相同：第一行為標題、全部為字串、
+    移除完全為空的列、NaN 以空字串取代）
+
+    Returns:
+        tuple: (欄位名稱 list, 每列值的 list of tuple)
+    """
+    # pandas 載入成本高，僅在實際讀取 CSV 時才 import
+    import pandas as pd
+
+    sheet = pd.read_csv(
+        filepath_or_buffer=file_path,
+        header=0,
+        dtype=str
+    ).dropna(how='all').reset_index(drop=True)
+    sheet = sheet.where(pd.notnull(sheet), '')
+    return list(sheet.columns), list(sheet.itertuples(index=False, name=None))
+
+
+def scan_sources(root: str) -> list:
+    """
+    列出計畫檔的來源檔案
+
+    Returns:
+        list: (相對路徑（/ 分隔）, mtime_ns, size) 依路徑排序
+    """
+    sources = []
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                    continue
+                relative = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                is_csv = entry.name.endswith('.csv')
+                is_expected = (
+                    entry.name.endswith('.json') and '/expected_result/' in f'/{relative}')
+                if is_csv or is_expected:
+                    stat = entry.stat()
+                    sources.append((relative, stat.st_mtime_ns, stat.st_size))
+    return sorted(sources)
+
+
+def _signature(sources: list) -> dict:
+    """
+    來源檔案的簽章：排序後的 (相對路徑, mtime_ns, size) 整體 hash
+
+    改名、新增 / 刪除、大小或 mtime 任一改變都會使簽章不同
+    """
+    digest = hashlib.sha256()
+    for relative, mtime_ns, size in sources:
+        digest.update(f'{relative}\0{mtime_ns}\0{size}\n'.encode('utf-8'))
+    return {'count': len(sources), 'sources': digest.hexdigest()}
+
+
+def _pad(data: bytearray):
+    data.extend(b'\0' * (-len(data) % 8))
+
+
+def build(
+    test_data_folder: str,
+    env: str,
+    target: str = None,
+    embed_limit: int = DEFAULT_EMBED_LIMIT
+) -> str:
+    """
+    編譯計畫檔
+
+    Args:
+        test_data_folder: 測試資料根目錄
+        env: 環境（test_data 子目錄）
+        target: 輸出路徑（預設 .test_plan/{env}.plan）
+        embed_limit: expected JSON 內嵌大小上限（bytes）
+
+    Returns:
+        str: 計畫檔路徑
+    """
+    target = target or default_plan_path(env)
+    root = os.path.join(test_data_folder, env)
+    sources = scan_sources(root) if os.path.isdir(root) else []
+
+    tables = {}
+    expected = []
+    strings = set()
+    for relative, _, size in sources:
+        full_path = os.path.join(root, *relative.split('/'))
+        if relative.endswith('.csv'):
+            columns, rows = read_csv_rows(full_path)
+            tables[relative[:-len('.csv')]] = (columns, rows)
+            strings.update(columns)
+            for row in rows:
+                strings.update(row)
+        else:
+            content = None
+            if size <= embed_limit:
+                with open(full_path, 'rb') as file_input:
+                    content = file_input.read()
+            expected.append((relative, content))
+            strings.add(relative)
+
+    ordered = sorted(strings)
+    ids = {value: position for position, value in enumerate(ordered)}
+
+    data = bytearray()
+    header = {'signature': _signature(sources), 'built_at': time.time()}
+
+    # 字串表
+    encoded = [value.encode('utf-8') for value in ordered]
+    offsets = array('Q', [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    header['strings'] = {'count': len(ordered), 'offsets': len(data)}
+    data.extend(offsets.tobytes())
+    header['strings']['blob'] = len(data)
+    data.extend(b''.join(encoded))
+    _pad(data)
+
+    # CSV 表（欄式）
+    header['tables'] = {}
+    for key, (columns, rows) in tables.items():
+        table = {'columns': columns, 'rows': len(rows), 'column_offsets': []}
+        for position in range(len(columns)):
+            table['column_offsets'].append(len(data))
+            data.extend(array('I', (ids[row[position]] for row in rows)).tobytes())
+            _pad(data)
+        if 'case_id' in columns:
+            case_column = columns.index('case_id')
+            order = sorted(range(len(rows)), key=lambda row: ids[rows[row][case_column]])
+            table['case_index'] = len(data)
+            data.extend(array('I', order).tobytes())
+            _pad(data)
+        header['tables'][key] = table
+
+    # expected_result 索引與內嵌內容
+    expected.sort(key=lambda item: ids[item[0]])
+    path_ids = array('I', (ids[relative] for relative, _ in expected))
+    content_offsets = array('Q')
+    content_lengths = array('q')
+    blobs = bytearray()
+    for _, content in expected:
+        content_offsets.append(len(blobs))
+        content_lengths.append(-1 if content is None else len(content))
+        blobs.extend(content or b'')
+    header['expected'] = {'count': len(expected), 'path_ids': len(data)}
+    data.extend(path_ids.tobytes())
+    _pad(data)
+    header['expected']['offsets'] = len(data)
+    data.extend(content_offsets.tobytes())
+    header['expected']['lengths'] = len(data)
+    data.extend(content_lengths.tobytes())
+    header['expected']['blob'] = len(data)
+    data.extend(blobs)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    folder = os.path.dirname(target)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_target = f'{target}.{os.getpid()}.tmp'
+    with open(tmp_target, 'wb') as file_output:
+        file_output.write(MAGIC)
+        file_output.write(_LENGTH.pack(len(header_bytes)))
+        file_output.write(header_bytes)
+        file_output.write(b'\0' * (-(len(MAGIC) + _LENGTH.size + len(header_bytes)) % 8))
+        file_output.write(data)
+    os.replace(tmp_target, target)
+    return target
+
+
+class _Table:
+    """計畫檔中的一個 CSV 表"""
+    __slots__ = ('plan', 'columns', 'rows', 'column_ids', 'case_index')
+
+    def __init__(self, plan, meta: dict):
+        self.plan = plan
+        self.columns = CaseColumns.get(meta['columns'])
+        self.rows = meta['rows']
+        self.column_ids = [
+            plan._array(offset, 'I', self.rows) for offset in meta['column_offsets']]
+        self.case_index = (
+            plan._array(meta['case_index'], 'I', self.rows)
+            if 'case_index' in meta else None)
+
+
+class PlanCase(Mapping):
+    """
+    計畫檔中的單一案例（欄位值在存取時才從字串表解碼）
+
+    介面與 TestCase 相同；pickle 時轉為 TestCase。
+    """
+    __slots__ = ('_table', '_row')
+    __test__ = False
+
+    def __init__(self, table: _Table, row: int):
+        self._table = table
+        self._row = row
+
+    @property
+    def case_id(self) -> str:
+        return self.get('case_id', '')
+
+    @property
+    def row(self) -> tuple:
+        return tuple(self[name] for name in self._table.columns.names)
+
+    def __getitem__(self, key):
+        position = self._table.columns.index[key]
+        return self._table.plan.string(self._table.column_ids[position][self._row])
+
+    def __iter__(self):
+        return iter(self._table.columns.names)
+
+    def __len__(self):
+        return len(self._table.columns.names)
+
+    def to_dict(self) -> dict:
+        return dict(zip(self._table.columns.names, self.row))
+
+    def __reduce__(self):
+        return (TestCase, (self._table.columns, self.row))
+
+    def __repr__(self):
+        return f'PlanCase({self.to_dict()!r})'
+
+
+class TestPlan:
+    """
+    以 mmap 載入的計畫檔（載入只解析 header，與案例數量無關）
+
+    Args:
+        path: 計畫檔路徑
+    """
+    __test__ = False
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file_input:
+            self._mm = mmap.mmap(file_input.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'Not a test plan: {path}')
+        header_length, = _LENGTH.unpack_from(self._mm, len(MAGIC))
+        header_start = len(MAGIC) + _LENGTH.size
+        self.header = json.loads(self._mm[header_start:header_start + header_length])
+        data_start = header_start + header_length
+        self._data_start = data_start + (-data_start % 8)
+        self._view = memoryview(self._mm)
+
+        strings = self.header['strings']
+        self._string_count = strings['count']
+        self._string_offsets = self._array(strings['offsets'], 'Q', strings['count'] + 1)
+        self._string_blob = self._data_start + strings['blob']
+        self._string_cache = {}
+        self._tables = {}
+        self._lookups = {}
+
+        expected = self.header['expected']
+        self._expected_ids = self._array(expected['path_ids'], 'I', expected['count'])
+        self._expected_offsets = self._array(expected['offsets'], 'Q', expected['count'])
+        self._expected_lengths = self._array(expected['lengths'], 'q', expected['count'])
+        self._expected_blob = self._data_start + expected['blob']
+
+    def _array(self, offset: int, fmt: str, count: int) -> memoryview:
+        start = self._data_start + offset
+        size = struct.calcsize(fmt) * count
+        return self._view[start:start + size].cast(fmt)
+
+    def string(self, string_id: int) -> str:
+        value = self._string_cache.get(string_id)
+        if value is None:
+            start = self._string_blob + self._string_offsets[string_id]
+            end = self._string_blob + self._string_offsets[string_id + 1]
+            value = self._string_cache[string_id] = str(self._view[start:end], 'utf-8')
+        return value
+
+    def string_id(self, value: str):
+        """字串 → id（二分搜尋排序後的字串表）；不存在時回傳 None"""
+        low, high = 0, self._string_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.string(middle) < value:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._string_count and self.string(low) == value:
+            return low
+        return None
+
+    def is_stale(self, root: str) -> bool:
+        """來源檔案的路徑、大小、mtime 或數量是否與編譯時不同"""
+        sources = scan_sources(root) if os.path.isdir(root) else []
+        return _signature(sources) != self.header['signature']
+
+    # ---------- CSV ----------
+    def _table(self, key: str):
+        table = self._tables.get(key)
+        if table is None and key in self.header['tables']:
+            table = self._tables[key] = _Table(self, self.header['tables'][key])
+        return table
+
+    def has_csv(self, key: str) -> bool:
+        """key 為相對於 test_data/{env}/、不含副檔名的路徑（例如 'users/get_users'）"""
+        return key in self.header['tables']
+
+    def read_csv(self, key: str) -> list:
+        """取得 CSV 的所有案例（list of PlanCase）"""
+        table = self._table(key)
+        return [PlanCase(table, row) for row in range(table.rows)]
+
+    def find_case_id(self, key: str, case_id: str):
+        """依 case_id 取得案例（case_id 索引二分搜尋）；找不到時回傳 None"""
+        table = self._table(key)
+        target = self.string_id(case_id)
+        if table is None or table.case_index is None or target is None:
+            return None
+        case_column = table.columns.index['case_id']
+        ids = table.column_ids[case_column]
+        low, high = 0, table.rows
+        while low < high:
+            middle = (low + high) // 2
+            if ids[table.case_index[middle]] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < table.rows and ids[table.case_index[low]] == target:
+            return PlanCase(table, table.case_index[low])
+        return None
+
+    def lookup(self, key: str, key_func) -> dict:
+        """
+        依 key_func(case) 建立並快取查詢表（每個 CSV 只建立一次）
+
+        Returns:
+            dict: key_func 結果 → 第一個符合的 PlanCase
+        """
+        cache_key = (key, key_func)
+        table = self._lookups.get(cache_key)
+        if table is None:
+            table = {}
+            for case in self.read_csv(key):
+                table.setdefault(key_func(case), case)
+            self._lookups[cache_key] = table
+        return table
+
+    # ---------- expected_result ----------
+    def _expected_position(self, relative: str):
+        target = self.string_id(relative)
+        if target is None:
+            return None
+        low, high = 0, len(self._expected_ids)
+        while low < high:
+            middle = (low + high) // 2
+            if self._expected_ids[middle] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._expected_ids) and self._expected_ids[low] == target:
+            return low
+        return None
+
+    def has_expected(self, relative: str) -> bool:
+        """relative 為相對於 test_data/{env}/ 的路徑（/ 分隔）"""
+        return self._expected_position(relative) is not None
+
+    def expected_bytes(self, relative: str):
+        """取得內嵌的 expected JSON 內容；不存在或未內嵌時回傳 None"""
+        position = self._expected_position(relative)
+        if position is None or self._expected_lengths[position] < 0:
+            return None
+        start = self._expected_blob + self._expected_offsets[position]
+        return bytes(self._view[start:start + self._expected_lengths[position]])
+
+    def close(self):
+        """釋放所有 memoryview 並關閉 mmap（之後不可再存取此計畫與其 PlanCase）"""
+        self._string_cache.clear()
+        self._lookups.clear()
+        views = [
+            self._string_offsets, self._expected_ids,
+            self._expected_offsets, self._expected_lengths,
+        ]
+        for table in self._tables.values():
+            views.extend(table.column_ids)
+            if table.case_index is not None:
+                views.append(table.case_index)
+        self._tables.clear()
+        for view in views:
+            view.release()
+        self._view.release()
+        self._mm.close()
+
+
+def ensure(test_data_folder: str, env: str, path: str = None) -> str:
+    """
+    確保計畫檔存在且未過期，必要時重新編譯
+
+    Returns:
+        str: 計畫檔路徑
+    """
+    path = path or default_plan_path(env)
+    root = os.path.join(test_data_folder, env)
+    if os.path.isfile(path):
+        try:
+            plan = TestPlan(path)
+        except (ValueError, KeyError):
+            plan = None
+        if plan is not None:
+            stale = plan.is_stale(root)
+            plan.close()
+            if not stale:
+                return path
+    return build(test_data_folder, env, path)
+
+
+def attach(path: str):
+    """載入計畫檔作為目前行程使用的計畫（xdist worker 由主行程傳入路徑）"""
+    _attached['plan'] = TestPlan(path)
+
+
+def current():
+    """目前載入的計畫；未載入時回傳 None"""
+    return _attached['plan']
+
+
+def relative_to_env(path: str, test_data_folder: str, env: str):
+    """將 './test_data/dev/users/...' 形式的路徑轉為計畫檔使用的相對路徑；不在該環境下時回傳 None"""
+    relative = os.path.relpath(
+        os.path.normpath(path), os.path.normpath(os.path.join(test_data_folder, env)))
+    if relative.startswith('..'):
+        return None
+    return relative.replace(os.sep, '/')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='測試計畫檔工具')
+    parser.add_argument('command', choices=('build', 'info'))
+    parser.add_argument(
+        '--test-data', default=os.environ.get('TEST_DATA_FOLDER', './test_data'))
+    parser.add_argument('--env', default=os.environ.get('ENV', 'dev'))
+    parser.add_argument('--output', default=None, help='計畫檔路徑（預設 .test_plan/{env}.plan）')
+    parser.add_argument('--embed-limit', type=int, default=DEFAULT_EMBED_LIMIT)
+    args = parser.parse_args(argv)
+    path = args.output or default_plan_path(args.env)
+
+    if args.command == 'build':
+        start = time.time()
+        build(args.test_data, args.env, path, embed_limit=args.embed_limit)
+        print(f'Test plan built: {path} ({time.time() - start:.2f}s)')
+    else:
+        if not os.path.isfile(path):
+            print(f'Test plan not found: {path}')
+            sys.exit(1)
+        plan = TestPlan(path)
+        root = os.path.join(args.test_data, args.env)
+        print(f'path: {path}')
+        print(f'size: {os.path.getsize(path)} bytes')
+        print(f'strings: {plan.header["strings"]["count"]}')
+        for key, table in sorted(plan.header['tables'].items()):
+            print(f'table {key}: {table["rows"]} cases')
+        print(f'expected_result: {plan.header["expected"]["count"]}')
+        print(f'stale: {plan.is_stale(root)}')
+
+
+if __name__ == '__main__':
+    main()
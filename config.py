@@ -1,13 +1,23 @@
 """
 配置管理模組
 統一管理環境變數和配置資訊
+
+設定項在第一次存取時才解析（`config.ENV` 或 `config.settings.ENV`），
+import 本模組不會讀取 .env 也不會檢查必需項。
 """
-import json
 import os
 
-from dotenv import load_dotenv
+_dotenv_loaded = False
+
 
-load_dotenv()
+def _load_dotenv():
+    """第一次讀取環境變數前載入 .env（僅一次）"""
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    _dotenv_loaded = True
 
 
 def get_env(key, default=None, is_required=True):
@@ -25,6 +35,7 @@ def get_env(key, default=None, is_required=True):
     Raises:
         ValueError: 當必需項不存在時
     """
+    _load_dotenv()
     env_value = os.getenv(key)
     if is_required:
         if env_value is None:
@@ -33,30 +44,158 @@ def get_env(key, default=None, is_required=True):
     return env_value or default
 
 
-# ============================================
-# 環境設定
-# ============================================
-ENV = get_env('ENV', default='dev')
-VERSION = get_env('VERSION', default='/v1')
-
-# ============================================
-# Service A 配置（對應原始專案中的 ORI）
-# ============================================
-SERVICE_A_BASE_URL = get_env('SERVICE_A_BASE_URL')
-SERVICE_A_ACCOUNT = get_env('SERVICE_A_ACCOUNT')
-SERVICE_A_PASSWORD = get_env('SERVICE_A_PASSWORD')
-
-# ============================================
-# 測試資料設定
-# ============================================
-TEST_DATA_FOLDER = get_env('TEST_DATA_FOLDER', default='./test_data')
-
-# ============================================
-# 可選配置（用於 CI/CD）
-# ============================================
-SLACK_WEBHOOK_URL = get_env('SLACK_WEBHOOK_URL', is_required=False)
-REPORT_URL_EXPIRED_DATE = get_env('REPORT_URL_EXPIRED_DATE', is_required=False)
-GITHUB_ACTOR = get_env('GITHUB_ACTOR', is_required=False)
-COMMIT_SHA = get_env('COMMIT_SHA', is_required=False)
-GITHUB_HEAD_REF = get_env('GITHUB_HEAD_REF', is_required=False)
-GITHUB_REPOSITORY = get_env('GITHUB_REPOSITORY', is_required=False)
+# 設定項名稱 → get_env() 參數
+_SETTINGS = {
+    # ============================================
+    # 環境設定
+    # ============================================
+    'ENV': {'default': 'dev'},
+    'VERSION': {'default': '/v1'},
+
+    # ============================================
+    # Service A 配置（對應原始專案中的 ORI）
+    # ============================================
+    'SERVICE_A_BASE_URL': {},
+    'SERVICE_A_ACCOUNT': {},
+    'SERVICE_A_PASSWORD': {},
+
+    # ============================================
+    # 測試資料設定
+    # ============================================
+    'TEST_DATA_FOLDER': {'default': './test_data'},
+    # 預先編譯的測試計畫檔（TEST_PLAN_PATH 空白時為 .test_plan/{ENV}.plan；來源較新時自動重新產生）
+    'TEST_PLAN': {'default': 'true', 'is_required': False},
+    'TEST_PLAN_PATH': {'default': '', 'is_required': False},
+    # JSON 編解碼實作（auto / orjson / json）
+    'JSON_CODEC': {'default': 'auto', 'is_required': False},
+
+    # ============================================
+    # 回應錄製 / 重播（off / record / replay）
+    # ============================================
+    'REPLAY_MODE': {'default': 'off', 'is_required': False},
+    'REPLAY_STORE_PATH': {'default': '.replay/responses.db', 'is_required': False},
+    'REPLAY_VERSION': {'default': '', 'is_required': False},
+    'REPLAY_MAX_AGE': {'is_required': False},
+
+    # ============================================
+    # 請求重試（冪等方法 + 連線錯誤 / 指定狀態碼；RETRY_BUDGET 為整個 session 的重試額度）
+    # ============================================
+    'RETRY_MAX_ATTEMPTS': {'default': '3', 'is_required': False},
+    'RETRY_BACKOFF_BASE': {'default': '0.5', 'is_required': False},
+    'RETRY_BACKOFF_MAX': {'default': '8', 'is_required': False},
+    'RETRY_STATUS_CODES': {'default': '502,503,504', 'is_required': False},
+    'RETRY_METHODS': {'default': 'GET,HEAD,OPTIONS,PUT,DELETE', 'is_required': False},
+    'RETRY_BUDGET': {'default': '50', 'is_required': False},
+    'RETRY_AFTER_MAX': {'default': '60', 'is_required': False},
+
+    # ============================================
+    # 回應本文大小（空白表示不限制；超過 SPILL_BODY_BYTES 時寫入 SPILL_DIR 暫存檔）
+    # ============================================
+    'MAX_BODY_BYTES': {'default': '', 'is_required': False},
+    'SPILL_BODY_BYTES': {'default': '', 'is_required': False},
+    'SPILL_DIR': {'default': '', 'is_required': False},
+
+    # ============================================
+    # HTTP 壓縮（Accept-Encoding 協商；請求本文達 REQUEST_COMPRESSION_MIN_BYTES 時以 gzip 壓縮）
+    # ============================================
+    'HTTP_COMPRESSION': {'default': 'false', 'is_required': False},
+    'REQUEST_COMPRESSION_MIN_BYTES': {'default': '1024', 'is_required': False},
+
+    # ============================================
+    # GET 回應快取（session 範圍，依 ETag / Last-Modified 重新驗證）
+    # ============================================
+    'HTTP_CACHE_ENABLED': {'default': 'false', 'is_required': False},
+
+    # ============================================
+    # 請求合併（session 範圍；相同指紋的請求只送出一次，COALESCE_METHODS 為可合併的方法）
+    # ============================================
+    'COALESCE_REQUESTS': {'default': 'false', 'is_required': False},
+    'COALESCE_METHODS': {'default': 'GET,HEAD', 'is_required': False},
+
+    # ============================================
+    # 差異報告（DIFF_ATTACHMENT=true 時將完整差異以 gzip 壓縮附加到 Allure 報告）
+    # ============================================
+    'DIFF_ATTACHMENT': {'default': 'false', 'is_required': False},
+
+    # ============================================
+    # 案例剖析（--profile-cases / --trace-memory；結果輸出至 PROFILE_OUTPUT）
+    # ============================================
+    'PROFILE_CASES': {'default': 'false', 'is_required': False},
+    'TRACE_MEMORY': {'default': 'false', 'is_required': False},
+    'PROFILE_OUTPUT': {'default': 'profile-results', 'is_required': False},
+    'PROFILE_INTERVAL_MS': {'default': '5', 'is_required': False},
+    'PROFILE_TOP_N': {'default': '20', 'is_required': False},
+    'TRACE_MEMORY_FRAMES': {'default': '16', 'is_required': False},
+
+    # ============================================
+    # 增量執行（指紋未變且上次通過的案例標記為 cached-pass；結果存於 .pytest_cache）
+    # ============================================
+    'INCREMENTAL': {'default': 'false', 'is_required': False},
+
+    # ============================================
+    # 跨機器分片（--shard-index / --shard-count；SHARD_TIMINGS 為歷史執行時間 JSON，用於依時間平衡）
+    # ============================================
+    'SHARD_INDEX': {'default': '0', 'is_required': False},
+    'SHARD_COUNT': {'default': '1', 'is_required': False},
+    'SHARD_TIMINGS': {'default': '', 'is_required': False},
+
+    # ============================================
+    # 請求速率調節（AIMD token bucket；GOVERNOR_SHARED_FILE 供多個 worker 共用）
+    # ============================================
+    'GOVERNOR_ENABLED': {'default': 'false', 'is_required': False},
+    'GOVERNOR_RATE': {'default': '20', 'is_required': False},
+    'GOVERNOR_MIN_RATE': {'default': '1', 'is_required': False},
+    'GOVERNOR_MAX_RATE': {'default': '500', 'is_required': False},
+    'GOVERNOR_SHARED_FILE': {'is_required': False},
+
+    # ============================================
+    # 報告匯出（--export true；sink 為 local 或 s3）
+    # ============================================
+    'EXPORT_SINK': {'default': 'local', 'is_required': False},
+    'EXPORT_LOCAL_DIR': {'default': 'exported_reports', 'is_required': False},
+    'EXPORT_S3_BUCKET': {'is_required': False},
+    'EXPORT_S3_PREFIX': {'default': '', 'is_required': False},
+    'EXPORT_S3_ENDPOINT_URL': {'is_required': False},
+    'EXPORT_MAX_WORKERS': {'default': '8', 'is_required': False},
+    'EXPORT_MANIFEST_MAX_AGE_DAYS': {'default': '30', 'is_required': False},
+
+    # ============================================
+    # 可選配置（用於 CI/CD）
+    # ============================================
+    'SLACK_WEBHOOK_URL': {'is_required': False},
+    'REPORT_URL_EXPIRED_DATE': {'is_required': False},
+    'GITHUB_ACTOR': {'is_required': False},
+    'COMMIT_SHA': {'is_required': False},
+    'GITHUB_HEAD_REF': {'is_required': False},
+    'GITHUB_REPOSITORY': {'is_required': False},
+}
+
+
+class Settings:
+    """
+    延遲解析的設定物件
+
+    屬性於第一次存取時呼叫 get_env() 解析並快取，
+    必需項缺少時才在存取當下拋出 ValueError。
+    """
+
+    def __getattr__(self, name):
+        if name not in _SETTINGS:
+            raise AttributeError(f'Unknown setting: {name}')
+        value = get_env(name, **_SETTINGS[name])
+        self.__dict__[name] = value
+        return value
+
+    def reset(self):
+        """清除已快取的值（環境變數變更後重新解析）"""
+        self.__dict__.clear()
+
+
+settings = Settings()
+
+
+def __getattr__(name):
+    """讓 `config.ENV` 等既有寫法導向延遲解析的 settings（PEP 562）"""
+    if name in _SETTINGS:
+        return getattr(settings, name)
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
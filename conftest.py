@@ -5,15 +5,27 @@ pytest 配置和 fixtures
 import os
 import shutil
 import subprocess
+import tempfile
 import time
 from datetime import datetime
 
 import pytest
 
 import config as app_config
+from api import case_metrics, coalesce, http_cache, replay
+from api import governor as rate_governor
+from api.example.api_method import APIMethod
+from api.example.oauth2 import OAuth2
+from common import impact, profiling, registry, sharding, test_plan
+from common.file_process import FileProcess
+from utils import report_export
 
 env = app_config.ENV
 version = app_config.VERSION
+impact_recorder = None
+timing_recorder = None
+case_sampler = None
+memory_tracer = None
 
 
 def pytest_addoption(parser):
@@ -45,15 +57,182 @@ def pytest_addoption(parser):
         default="allure-results",
         help="Allure 結果目錄"
     )
+    parser.addoption(
+        '--replay',
+        action='store',
+        default=app_config.REPLAY_MODE,
+        choices=replay.MODES,
+        help='回應錄製 / 重播模式（off/record/replay）'
+    )
+    parser.addoption(
+        '--replay-store',
+        action='store',
+        default=app_config.REPLAY_STORE_PATH,
+        help='錄製回應的儲存檔案'
+    )
+    parser.addoption(
+        '--replay-version',
+        action='store',
+        default=app_config.REPLAY_VERSION,
+        help='錄製回應的版本標籤；重播時版本不符視為過期'
+    )
+    parser.addoption(
+        '--replay-max-age',
+        action='store',
+        type=float,
+        default=app_config.REPLAY_MAX_AGE,
+        help='錄製回應的最長保存秒數；重播時超過視為過期'
+    )
+    parser.addoption(
+        '--rate-governor',
+        action='store',
+        default=app_config.GOVERNOR_ENABLED,
+        help='是否啟用 AIMD 請求併發 / 速率調節（true/false）；xdist 下各 worker 共用 token bucket'
+    )
+    parser.addoption(
+        '--http-cache',
+        action='store',
+        default=app_config.HTTP_CACHE_ENABLED,
+        help='是否啟用 GET 回應快取（true/false）；依 ETag / Last-Modified 重新驗證，依認證類型分開'
+    )
+    parser.addoption(
+        '--coalesce',
+        action='store',
+        default=app_config.COALESCE_REQUESTS,
+        help='是否合併相同的請求（true/false）：相同指紋的 GET / HEAD 只送出一次；xdist 下各 worker 共用結果'
+    )
+    parser.addoption(
+        '--profile-cases',
+        action='store',
+        default=app_config.PROFILE_CASES,
+        help='以取樣方式剖析每個案例的 CPU 時間（true/false），依框架元件彙整並輸出 collapsed stack'
+    )
+    parser.addoption(
+        '--trace-memory',
+        action='store',
+        default=app_config.TRACE_MEMORY,
+        help='以 tracemalloc 記錄每個案例的記憶體峰值與留存配置（true/false）'
+    )
+    parser.addoption(
+        '--incremental',
+        action='store',
+        default=app_config.INCREMENTAL,
+        help='增量執行（true/false）：指紋未變且上次通過的案例標記為 cached-pass，其餘照常執行'
+    )
+    parser.addoption(
+        '--shard-index',
+        action='store',
+        type=int,
+        default=int(app_config.SHARD_INDEX),
+        help='本機器執行的分片索引（0 起算）'
+    )
+    parser.addoption(
+        '--shard-count',
+        action='store',
+        type=int,
+        default=int(app_config.SHARD_COUNT),
+        help='分片總數；依 module + case_id 決定案例所屬分片，可與 -n 併用'
+    )
+    parser.addoption(
+        '--shard-timings',
+        action='store',
+        default=app_config.SHARD_TIMINGS,
+        help='歷史執行時間 JSON；提供時依時間平衡各分片（greedy LPT）'
+    )
+    parser.addoption(
+        '--timings-output',
+        action='store',
+        default=None,
+        help='將本次每個案例的執行時間寫入此 JSON（可用 python -m common.sharding merge 合併）'
+    )
 
 
 def pytest_configure(config):
-    global target_tags
+    global target_tags, impact_recorder, timing_recorder, case_sampler, memory_tracer
     target_tags = config.getoption(
         '--tags', default=None) or config.getoption('--tag', default=None)
     if target_tags:
         target_tags = target_tags.lower().split(',')
 
+    replay.configure(
+        mode=config.getoption('--replay'),
+        path=config.getoption('--replay-store'),
+        version=config.getoption('--replay-version'),
+        max_age=config.getoption('--replay-max-age')
+    )
+
+    # xdist worker 由主行程傳入共用的 token bucket 狀態檔；單一行程時僅使用 GOVERNOR_SHARED_FILE（可為空）
+    # 請求合併的共用回應檔同樣由主行程命名（單一行程時只在行程內合併，不需要檔案）
+    workerinput = getattr(config, 'workerinput', None)
+    if workerinput is not None:
+        shared_file = workerinput.get('governor_shared_file')
+        coalesce_store = workerinput.get('coalesce_store')
+        if workerinput.get('test_plan'):
+            test_plan.attach(workerinput['test_plan'])
+    else:
+        shared_file = app_config.GOVERNOR_SHARED_FILE
+        config.governor_shared_file = shared_file or os.path.join(
+            tempfile.gettempdir(), f'pytest-governor-{os.getpid()}.json')
+        coalesce_store = None
+        config.coalesce_store = os.path.join(
+            tempfile.gettempdir(), f'pytest-coalesce-{os.getpid()}.db')
+    rate_governor.configure(
+        enabled=str(config.getoption('--rate-governor')).lower() in ('true', '1', 'yes'),
+        shared_file=shared_file
+    )
+    http_cache.configure(
+        enabled=str(config.getoption('--http-cache')).lower() in ('true', '1', 'yes')
+    )
+    coalesce.configure(
+        enabled=str(config.getoption('--coalesce')).lower() in ('true', '1', 'yes'),
+        methods=[method.strip() for method in app_config.COALESCE_METHODS.split(',') if method.strip()],
+        shared_path=coalesce_store
+    )
+
+    # 增量執行：結果只由主行程彙整並寫回 .pytest_cache（xdist worker 的報告會回到主行程）
+    config.incremental = (
+        str(config.getoption('--incremental')).lower() in ('true', '1', 'yes')
+        and getattr(config, 'cache', None) is not None
+    )
+    impact_recorder = None
+    if config.incremental and workerinput is None:
+        impact_recorder = impact.ResultRecorder(
+            config.cache.get(impact.IMPACT_CACHE_KEY, {}))
+
+    shard_index, shard_count = config.getoption('--shard-index'), config.getoption('--shard-count')
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise pytest.UsageError(
+            f'--shard-index must be in [0, {shard_count}) and --shard-count >= 1')
+    timing_recorder = None
+    if config.getoption('--timings-output') and workerinput is None:
+        timing_recorder = sharding.TimingRecorder()
+
+    # 案例剖析：每個執行案例的行程各自取樣，xdist worker 的結果於 session 結束時由主行程合併
+    root = str(config.rootpath)
+    case_sampler = memory_tracer = None
+    if str(config.getoption('--profile-cases')).lower() in ('true', '1', 'yes'):
+        case_sampler = profiling.CaseSampler(root, float(app_config.PROFILE_INTERVAL_MS) / 1000)
+    if str(config.getoption('--trace-memory')).lower() in ('true', '1', 'yes'):
+        memory_tracer = profiling.MemoryTracer(root, int(app_config.TRACE_MEMORY_FRAMES))
+    if (case_sampler or memory_tracer) and workerinput is None:
+        shutil.rmtree(os.path.join(app_config.PROFILE_OUTPUT, '.parts'), ignore_errors=True)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """pytest-xdist：把主行程的設定傳給各 worker"""
+    node.workerinput['governor_shared_file'] = node.config.governor_shared_file
+    node.workerinput['coalesce_store'] = node.config.coalesce_store
+
+    # 測試計畫檔只在主行程檢查 / 編譯一次，worker 直接以 mmap 掛載（TEST_PLAN=false 時不建立也不掛載）
+    if str(app_config.TEST_PLAN).lower() not in ('true', '1', 'yes'):
+        node.workerinput['test_plan'] = None
+        return
+    if not getattr(node.config, 'test_plan_path', None):
+        node.config.test_plan_path = test_plan.ensure(
+            app_config.TEST_DATA_FOLDER, app_config.ENV, app_config.TEST_PLAN_PATH or None)
+    node.workerinput['test_plan'] = node.config.test_plan_path
+
 
 @pytest.fixture(scope="session", autouse=True)
 def pre_test(request):
@@ -67,6 +246,131 @@ def pre_test(request):
     # 例如：初始化測試資料、設定環境等
 
 
+def pytest_generate_tests(metafunc):
+    """
+    依端點註冊表產生測試案例
+
+    測試函式同時使用 endpoint 與 case_input 時，
+    以 test_data/endpoints.json 的每個端點 × 其 CSV 每一列參數化
+    """
+    if not {'endpoint', 'case_input'} <= set(metafunc.fixturenames):
+        return
+
+    params = []
+    for endpoint in registry.load_endpoints(app_config.TEST_DATA_FOLDER):
+        marks = [pytest.mark.order(endpoint.order)] if endpoint.order else []
+        for case in FileProcess.read_csv_data(
+            file_name=endpoint.csv_file, path=endpoint.module
+        ):
+            params.append(pytest.param(
+                endpoint, case,
+                id=f"{endpoint.key}-{case['case_id']}",
+                marks=marks
+            ))
+    metafunc.parametrize(('endpoint', 'case_input'), params)
+
+
+def _shard_items(config, items):
+    """
+    只保留本分片的案例（其餘 deselect）；每個案例記錄分片鍵供時間紀錄使用
+
+    端點案例的鍵為 module/api_name/case_id，其他測試為 nodeid
+    """
+    shard_count = config.getoption('--shard-count')
+    if shard_count <= 1 and not config.getoption('--timings-output'):
+        return
+    keys = {}
+    for item in items:
+        params = getattr(getattr(item, 'callspec', None), 'params', {})
+        if 'endpoint' in params and 'case_input' in params:
+            keys[item.nodeid] = sharding.case_key(params['endpoint'], params['case_input'])
+        else:
+            keys[item.nodeid] = item.nodeid
+        item.user_properties.append((sharding.SHARD_KEY_PROPERTY, keys[item.nodeid]))
+    if shard_count <= 1:
+        return
+
+    assignment = sharding.assign(
+        list(keys.values()), shard_count,
+        sharding.load_timings(config.getoption('--shard-timings')))
+    shard_index = config.getoption('--shard-index')
+    selected, deselected = [], []
+    for item in items:
+        (selected if assignment[keys[item.nodeid]] == shard_index else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    先依 --shard-index / --shard-count 切分案例；
+    增量執行時再為端點案例計算指紋，與上次相同且通過的案例標記為 cached-pass（skip）
+    """
+    _shard_items(config, items)
+    if not config.incremental:
+        return
+    previous = config.cache.get(impact.IMPACT_CACHE_KEY, {})
+    root = str(config.rootpath)
+    for item in items:
+        params = getattr(getattr(item, 'callspec', None), 'params', {})
+        if 'endpoint' not in params or 'case_input' not in params:
+            continue
+        code = impact.code_hash(
+            root, extra_files=(os.path.relpath(str(item.path), root), 'conftest.py'))
+        fingerprint = impact.case_fingerprint(
+            params['endpoint'], params['case_input'],
+            app_config.TEST_DATA_FOLDER, app_config.ENV, code,
+            target=app_config.SERVICE_A_BASE_URL or ''
+        )
+        item.user_properties.append(('impact_fingerprint', fingerprint))
+        if impact.is_cached_pass(previous, item.nodeid, fingerprint):
+            item.user_properties.append(('cached_pass', 1))
+            item.add_marker(pytest.mark.skip(reason='cached-pass: unchanged since last passing run'))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """案例剖析涵蓋 setup、call 與 teardown"""
+    if case_sampler is not None:
+        case_sampler.begin(item.nodeid)
+    if memory_tracer is not None:
+        memory_tracer.begin(item.nodeid)
+    yield
+    if case_sampler is not None:
+        case_sampler.end()
+    if memory_tracer is not None:
+        memory_tracer.end(item.nodeid)
+
+
+def pytest_runtest_logreport(report):
+    if impact_recorder is not None:
+        impact_recorder.observe(report.nodeid, report.when, report.outcome, report.user_properties)
+    if timing_recorder is not None:
+        timing_recorder.observe(report.duration, report.user_properties)
+
+
+@pytest.fixture(scope='session')
+def api():
+    """所有端點共用的 APIMethod 物件"""
+    return APIMethod()
+
+
+@pytest.fixture(scope='session')
+def auth_token():
+    """
+    整個 session（每個 xdist worker）只登入一次
+
+    Returns:
+        str: 認證 token/cookie
+    """
+    return OAuth2().post_oauth2(
+        account=app_config.SERVICE_A_ACCOUNT,
+        credential=app_config.SERVICE_A_PASSWORD,
+        service='service_a'
+    )
+
+
 @pytest.fixture(scope='function')
 def is_run():
     """
@@ -103,12 +407,80 @@ def is_run():
     return check
 
 
+@pytest.fixture(autouse=True)
+def record_case_metrics(request):
+    """
+    記錄每個案例的請求統計（例如 retries）
+
+    結果寫入報告的 user_properties，xdist 下同樣會回傳到主行程供終端摘要使用
+    """
+    case_metrics.begin_case(request.node.nodeid)
+    yield
+    for name, value in case_metrics.end_case().items():
+        request.node.user_properties.append((name, value))
+
+
+def _collect_case_metric(terminalreporter, name: str) -> dict:
+    """從所有測試報告的 user_properties 彙整指定統計（nodeid → 數值）"""
+    collected = {}
+    for reports in terminalreporter.stats.values():
+        for report in reports:
+            for prop_name, value in getattr(report, 'user_properties', None) or []:
+                if prop_name == name:
+                    collected[report.nodeid] = value
+    return collected
+
+
+def _finish_profiling(config):
+    """停止剖析；xdist worker 寫出部分結果，主行程合併後輸出報告"""
+    if case_sampler is None and memory_tracer is None:
+        return
+    part = {}
+    if case_sampler is not None and case_sampler.started:
+        case_sampler.stop()
+        part['cpu'] = case_sampler.data()
+    if memory_tracer is not None and memory_tracer.started:
+        part['memory'] = memory_tracer.data()
+        memory_tracer.stop()
+
+    parts_folder = os.path.join(app_config.PROFILE_OUTPUT, '.parts')
+    workerinput = getattr(config, 'workerinput', None)
+    if workerinput is not None:
+        if part:
+            profiling.save_part(parts_folder, workerinput['workerid'], part)
+        return
+    data = profiling.merge(profiling.load_parts(parts_folder) + [part])
+    shutil.rmtree(parts_folder, ignore_errors=True)
+    if profiling.write_reports(app_config.PROFILE_OUTPUT, data, int(app_config.PROFILE_TOP_N)):
+        config.profile_summary = profiling.summary(data)
+
+
 def pytest_sessionfinish(session):
     """
     測試會話結束時的處理
     """
     # 可以在這裡加入清理工作
     # 例如：清理測試資料、重置環境等
+    if impact_recorder is not None:
+        session.config.cache.set(impact.IMPACT_CACHE_KEY, impact_recorder.results())
+    if timing_recorder is not None:
+        sharding.save_timings(session.config.getoption('--timings-output'), timing_recorder.timings)
+    _finish_profiling(session.config)
+
+    governor_shared_file = getattr(session.config, 'governor_shared_file', None)
+    if (
+        governor_shared_file
+        and not app_config.GOVERNOR_SHARED_FILE
+        and os.path.isfile(governor_shared_file)
+    ):
+        os.remove(governor_shared_file)
+
+    coalesce_store = getattr(session.config, 'coalesce_store', None)
+    if coalesce_store:
+        for path in (coalesce_store, f'{coalesce_store}-wal', f'{coalesce_store}-shm'):
+            if os.path.isfile(path):
+                os.remove(path)
+        shutil.rmtree(f'{coalesce_store}.locks', ignore_errors=True)
 
 
 def pytest_terminal_summary(terminalreporter, config, exitstatus):
@@ -132,6 +504,73 @@ def pytest_terminal_summary(terminalreporter, config, exitstatus):
     skipped = len(terminalreporter.stats.get('skipped', []))
     error = len([i for i in terminalreporter.stats.get('error', [])])
 
+    retried = _collect_case_metric(terminalreporter, 'retries')
+    if retried:
+        print(
+            f" ⚙️ Retried requests: {sum(retried.values())} "
+            f"in {len(retried)} cases"
+        )
+        for nodeid, count in sorted(retried.items()):
+            print(f"   - {nodeid}: {count}")
+
+    transferred = sum(_collect_case_metric(terminalreporter, 'bytes_transferred').values())
+    decoded = sum(_collect_case_metric(terminalreporter, 'bytes_decoded').values())
+    # 假回應或全部命中重播 / 快取時沒有實際傳輸（transferred 為 0），不列出
+    if 0 < transferred < decoded:
+        print(
+            f" ⚙️ Response bytes: transferred {transferred / 1024:.1f} KB, "
+            f"decoded {decoded / 1024:.1f} KB ({transferred / decoded:.0%})"
+        )
+
+    cache = http_cache.get_cache()
+    if cache is not None:
+        hits = sum(_collect_case_metric(terminalreporter, 'http_cache_hits').values())
+        revalidated = sum(
+            _collect_case_metric(terminalreporter, 'http_cache_revalidated').values())
+        print(f" ⚙️ HTTP cache: {hits} fresh hits, {revalidated} revalidated (304)")
+
+    if coalesce.get_coalescer() is not None:
+        coalesced = _collect_case_metric(terminalreporter, 'coalesced')
+        print(f" ⚙️ Coalesced requests: {sum(coalesced.values())} in {len(coalesced)} cases")
+
+    if getattr(config, 'profile_summary', None):
+        print(f" ⚙️ Case profile: {os.path.join(app_config.PROFILE_OUTPUT, 'report.txt')}")
+        for line in config.profile_summary:
+            print(f"   - {line}")
+
+    if config.incremental:
+        cached = len(_collect_case_metric(terminalreporter, 'cached_pass'))
+        print(f" ⚙️ Incremental: {cached} cached-pass, {passed + failed + error} executed")
+
+    if replay.mode() != replay.MODE_OFF:
+        replay_stats = replay.stats()
+        print(
+            f" ⚙️ Replay ({replay.mode()}): "
+            f"{replay_stats['hits']} hits, {replay_stats['misses']} misses, "
+            f"{replay_stats['stale']} stale, {replay_stats['recorded']} recorded"
+        )
+
+    # 如果需要匯出報告：先把 allure-results 排入匯出佇列，與報告產生並行
+    exporter = None
+    if is_export == 'true':
+        try:
+            print(' ⚙️ Exporting test reports...')
+            exporter = report_export.ReportExporter(
+                report_export.create_sink(
+                    sink_type=app_config.EXPORT_SINK,
+                    local_dir=app_config.EXPORT_LOCAL_DIR,
+                    bucket=app_config.EXPORT_S3_BUCKET,
+                    prefix=app_config.EXPORT_S3_PREFIX,
+                    endpoint_url=app_config.EXPORT_S3_ENDPOINT_URL
+                ),
+                max_workers=int(app_config.EXPORT_MAX_WORKERS),
+                max_age_days=float(app_config.EXPORT_MANIFEST_MAX_AGE_DAYS)
+            )
+            exporter.submit_tree(
+                allure_results_dir, f'{commit_sha}/{time_now}/allure-results')
+        except Exception as e:
+            print(f" ✘✘✘ Report export failed: {e} ✘✘✘")
+
     try:
         print(" ⚙️ Generating Allure report...")
         allure_start_time = time.time()
@@ -166,6 +605,9 @@ def pytest_terminal_summary(terminalreporter, config, exitstatus):
         )
         print(f"\n ✔✔✔ Report saved as: {report_dir} ✔✔✔")
 
+        if exporter is not None:
+            exporter.submit_tree(report_dir, f'{commit_sha}/{time_now}/report')
+
         os.makedirs('test_report', exist_ok=True)
         shutil.copy2(
             os.path.join(report_dir, report_name),
@@ -183,12 +625,15 @@ def pytest_terminal_summary(terminalreporter, config, exitstatus):
             print(f"Error details: {e.stderr}")
         raise
 
-    # 如果需要匯出報告（例如上傳到 S3、發送到 Slack 等）
-    if is_export == 'true':
-        try:
-            print(' ⚙️ Exporting test reports...')
-            # 可以在這裡加入報告匯出邏輯
-            # 例如：上傳到 S3、發送到 Slack 等
-            print(' ✔✔✔ Report Exported ✔✔✔')
-        except Exception as e:
-            print(f" ✘✘✘ Report export failed: {e} ✘✘✘")
+    finally:
+        if exporter is not None:
+            try:
+                summary = exporter.wait()
+                print(
+                    f" ✔✔✔ Report Exported: {summary['uploaded']} uploaded, "
+                    f"{summary['copied']} deduplicated, {summary['skipped']} unchanged "
+                    f"({summary['uploaded_bytes']}/{summary['total_bytes']} bytes sent, "
+                    f"{summary['pruned']} manifest entries pruned) ✔✔✔"
+                )
+            except Exception as e:
+                print(f" ✘✘✘ Report export failed: {e} ✘✘✘")
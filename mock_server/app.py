@@ -3,32 +3,197 @@ Mock API Server
 
 模擬 REST API：
 - POST /v1/auth/login → 回傳 mock token
-- GET /v1/users、GET /v1/customers → 優先從 Mock DB (SQLite) 查資料回傳；無 DB 時改從 test_data CSV/JSON 回傳
+- test_data/endpoints.json 宣告的端點（例如 GET /v1/users、GET /v1/customers）
+  → 有對應 Mock DB 資料表時優先從 SQLite 查資料回傳；無 DB 時改從 test_data CSV/JSON 回傳
 
 啟動：在專案根目錄執行
   python3 -m mock_server.app
   或
   flask --app mock_server.app:app run --port 5050
 """
-import os
+import io
+import time
+import zlib
 
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
+from flask.json.provider import JSONProvider
+from werkzeug.wrappers import Response
 
+from common import compression, json_codec
+from common.registry import load_endpoints
 from mock_server import db as mock_db
+from mock_server import metrics, profiles
 from mock_server.router import (
+    TEST_DATA_FOLDER,
     _infer_cookie_type,
+    body_etag,
     find_case,
     get_mock_response,
+    parse_page_limit,
 )
+from mock_server.settings import (
+    MOCK_CACHE_MAX_AGE,
+    MOCK_COMPRESSION,
+    MOCK_COMPRESSION_MIN_BYTES,
+    MOCK_ETAG,
+    MOCK_METRICS,
+    MOCK_SERVER_PORT,
+    USE_MOCK_DB,
+    VERSION,
+)
+
+
+class CodecJSONProvider(JSONProvider):
+    """jsonify / request.get_json 改用 common.json_codec（有 orjson 時使用 orjson）"""
+
+    def dumps(self, obj, **kwargs):
+        return json_codec.dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return json_codec.loads(s)
+
 
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
+
+
+class _DecompressRequestBody:
+    """WSGI middleware：解壓縮帶 Content-Encoding 的請求本文（不支援的壓縮回傳 415）"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        encoding = environ.pop("HTTP_CONTENT_ENCODING", None)
+        if encoding:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+            try:
+                body = compression.decompress(environ["wsgi.input"].read(length), encoding)
+            except (ValueError, OSError, EOFError, zlib.error):
+                response = Response(
+                    json_codec.dumps({"error": {"message": f"Unsupported content encoding: {encoding}"}}),
+                    status=415, mimetype="application/json",
+                )
+                return response(environ, start_response)
+            environ["wsgi.input"] = io.BytesIO(body)
+            environ["CONTENT_LENGTH"] = str(len(body))
+        return self.wsgi_app(environ, start_response)
+
+
+app.wsgi_app = _DecompressRequestBody(app.wsgi_app)
+
+# latency / bandwidth / 錯誤注入（MOCK_PROFILE 未設定時為 None）
+PROFILE = profiles.load_profile()
+
+# MOCK_DB_MEMORY=true 時於啟動時將 mock.db 載入記憶體
+mock_db.load_snapshot()
+
+
+def _route_label() -> str:
+    """指標用的路由名稱（URL rule，不含結尾 /）"""
+    return request.url_rule.rule.rstrip("/") if request.url_rule is not None else "unmatched"
+
+
+@app.before_request
+def _start_request_metrics():
+    """最先執行，延遲指標包含設定檔注入的延遲"""
+    g.metrics_started = time.perf_counter()
+    metrics.request_started()
+
 
-# 與 config.VERSION 對齊，例如 /v1
-VERSION = os.environ.get("VERSION", "/v1")
+@app.teardown_request
+def _finish_request_metrics(exc):
+    started = g.get("metrics_started")
+    if started is not None:
+        metrics.request_finished(
+            _route_label(), request.method, g.get("response_status", 500), time.perf_counter() - started)
 
 
-# 是否從 Mock DB 取資料（預設 true；無 mock.db 或查詢失敗時會改從 CSV/JSON）
-USE_MOCK_DB = os.environ.get("USE_MOCK_DB", "true").lower() in ("true", "1", "yes")
+@app.before_request
+def _inject_profile():
+    """依設定檔延遲回應，或以設定的機率直接回傳 429/503（開發伺服器為多執行緒，延遲不阻塞其他請求）"""
+    decision = PROFILE.decide(request.path) if PROFILE is not None else None
+    g.mock_decision = decision
+    if decision is None:
+        return None
+    if decision.delay:
+        time.sleep(decision.delay)
+    if decision.error_status is not None:
+        headers = {"Retry-After": str(decision.retry_after)} if decision.retry_after is not None else {}
+        return jsonify(decision.error_body()), decision.error_status, headers
+    return None
+
+
+@app.after_request
+def _finalize_response(response):
+    """附加 ETag / 條件式回應後，再依 Accept-Encoding 壓縮，最後套用頻寬上限"""
+    response = _apply_etag(response)
+    response = _compress_response(response)
+    g.response_status = response.status_code
+    return _throttle_response(response)
+
+
+def _apply_etag(response):
+    """GET 的 2xx JSON 回應以本文 hash 作為 ETag；If-None-Match 相符時改回 304"""
+    if (
+        not MOCK_ETAG
+        or request.method not in ("GET", "HEAD")
+        or response.status_code not in range(200, 300)
+        or response.direct_passthrough
+        or response.mimetype != "application/json"
+    ):
+        return response
+    response.set_etag(body_etag(response.get_data()))
+    if MOCK_CACHE_MAX_AGE > 0:
+        response.cache_control.max_age = MOCK_CACHE_MAX_AGE
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def _compress_response(response):
+    """依 Accept-Encoding 壓縮 JSON 回應"""
+    if (
+        not MOCK_COMPRESSION
+        or response.direct_passthrough
+        or response.mimetype != "application/json"
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < MOCK_COMPRESSION_MIN_BYTES:
+        return response
+    encoding = compression.choose_encoding(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+    response.set_data(compression.compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _throttle_response(response):
+    """依設定檔的頻寬上限分段送出（以壓縮後的實際傳輸位元組計算）"""
+    decision = g.get("mock_decision")
+    if (
+        decision is None
+        or not decision.bytes_per_second
+        or response.direct_passthrough
+        or request.method == "HEAD"
+    ):
+        return response
+    data = response.get_data()
+    if not data:
+        return response
+
+    def generate():
+        for chunk, seconds in profiles.chunks(data, decision.bytes_per_second):
+            time.sleep(seconds)
+            yield chunk
+
+    response.response = generate()
+    response.headers["Content-Length"] = str(len(data))
+    return response
 
 
 def _get_auth_header():
@@ -37,16 +202,7 @@ def _get_auth_header():
 
 def _parse_page_limit(default_limit=10):
     """從 request 解析 page、limit，回傳 (page, limit, offset)。"""
-    try:
-        page = max(1, int(request.args.get("page", 1)))
-    except (TypeError, ValueError):
-        page = 1
-    try:
-        limit = max(1, min(100, int(request.args.get("limit", default_limit))))
-    except (TypeError, ValueError):
-        limit = default_limit
-    offset = (page - 1) * limit
-    return page, limit, offset
+    return parse_page_limit(request.args.get("page"), request.args.get("limit"), default_limit)
 
 
 # ---------- Auth ----------
@@ -56,69 +212,62 @@ def login():
     return jsonify({"token": "mock_token_for_testing", "cookie": "mock_token_for_testing"}), 200
 
 
-# ---------- Users ----------
-@app.route(f"{VERSION}/users", methods=["GET"])
-@app.route(f"{VERSION}/users/", methods=["GET"])
-def get_users():
-    query_string = request.query_string.decode("utf-8") if request.query_string else ""
-    if query_string and not query_string.startswith("?"):
-        query_string = "?" + query_string
-    cookie_type = _infer_cookie_type(_get_auth_header())
-    if cookie_type != "auth":
-        return jsonify({"error": {"code": "E002", "message": "Unauthorized access"}}), 401
-
-    # 僅在「成功案例」(CSV 對應 status 2xx) 且 Mock DB 存在時從 DB 取資料；其餘仍用 CSV/JSON（含 400 等）
-    row = find_case("users", "get_users", query_string, cookie_type)
-    if row and int(row.get("status_code", 200)) in range(200, 300) and USE_MOCK_DB and mock_db.db_available():
-        try:
-            page, limit, offset = _parse_page_limit()
-            data = mock_db.fetch_users(limit=limit, offset=offset)
-            total = mock_db.get_users_total()
-            body = mock_db.build_pagination_body(data, total, page, limit)
-            return jsonify(body), 200
-        except Exception:
-            pass  # fallback to file
-
-    status, body = get_mock_response(
-        module="users",
-        api_name="get_users",
-        csv_file_name="get_users",
-        query_string=query_string,
-        cookie_type=cookie_type,
-    )
-    return jsonify(body), status
-
-
-# ---------- Customers ----------
-@app.route(f"{VERSION}/customers", methods=["GET"])
-@app.route(f"{VERSION}/customers/", methods=["GET"])
-def get_customers():
-    query_string = request.query_string.decode("utf-8") if request.query_string else ""
-    if query_string and not query_string.startswith("?"):
-        query_string = "?" + query_string
-    cookie_type = _infer_cookie_type(_get_auth_header())
-    if cookie_type != "auth":
-        return jsonify({"error": {"code": "E002", "message": "Unauthorized access"}}), 401
-
-    row = find_case("customers", "get_customers", query_string, cookie_type)
-    if row and int(row.get("status_code", 200)) in range(200, 300) and USE_MOCK_DB and mock_db.db_available():
-        try:
-            page, limit, offset = _parse_page_limit()
-            data = mock_db.fetch_customers(limit=limit, offset=offset)
-            total = mock_db.get_customers_total()
-            body = mock_db.build_pagination_body(data, total, page, limit)
-            return jsonify(body), 200
-        except Exception:
-            pass
-
-    status, body = get_mock_response(
-        module="customers",
-        api_name="get_customers",
-        csv_file_name="get_customers",
-        query_string=query_string,
-        cookie_type=cookie_type,
-    )
-    return jsonify(body), status
+# ---------- 端點（依 test_data/endpoints.json 產生） ----------
+def _make_endpoint_view(endpoint):
+    """產生單一端點的 view：Mock DB（成功案例）優先，其餘依 CSV/JSON 回傳。"""
+
+    route = f"{VERSION}{endpoint.path}"
+
+    def view():
+        query_string = request.query_string.decode("utf-8") if request.query_string else ""
+        if query_string and not query_string.startswith("?"):
+            query_string = "?" + query_string
+        cookie_type = _infer_cookie_type(_get_auth_header())
+        if cookie_type != "auth":
+            return jsonify({"error": {"code": "E002", "message": "Unauthorized access"}}), 401
+
+        # 僅在「成功案例」(CSV 對應 status 2xx) 且 Mock DB 存在時從 DB 取資料；其餘仍用 CSV/JSON（含 400 等）
+        row = find_case(endpoint.module, endpoint.csv_file, query_string, cookie_type)
+        if (
+            row
+            and int(row.get("status_code", 200)) in range(200, 300)
+            and endpoint.mock_db_table in mock_db.FETCHERS
+            and USE_MOCK_DB
+            and mock_db.db_available()
+        ):
+            try:
+                page, limit, offset = _parse_page_limit()
+                query = mock_db.parse_query(endpoint.mock_db_table, request.args)
+                fetch, get_total = mock_db.FETCHERS[endpoint.mock_db_table]
+                data = fetch(limit=limit, offset=offset, query=query)
+                total = get_total(query)
+                body = mock_db.build_pagination_body(data, total, page, limit)
+                metrics.count_source(route, "db")
+                return jsonify(body), 200
+            except Exception as exc:
+                # fallback to file（含白名單外的查詢參數）
+                metrics.count_fallback(route, type(exc).__name__)
+
+        status, body = get_mock_response(
+            module=endpoint.module,
+            api_name=endpoint.api_name,
+            csv_file_name=endpoint.csv_file,
+            query_string=query_string,
+            cookie_type=cookie_type,
+        )
+        metrics.count_source(route, "file")
+        return jsonify(body), status
+
+    return view
+
+
+for _endpoint in load_endpoints(TEST_DATA_FOLDER):
+    _view = _make_endpoint_view(_endpoint)
+    for _rule in (f"{VERSION}{_endpoint.path}", f"{VERSION}{_endpoint.path}/"):
+        app.add_url_rule(
+            _rule, endpoint=f"{_endpoint.key}:{_rule}", view_func=_view,
+            methods=[_endpoint.method],
+        )
 
 
 # ---------- Health ----------
@@ -127,6 +276,13 @@ def health():
     return jsonify({"status": "ok", "service": "mock-api"}), 200
 
 
+# ---------- Metrics ----------
+if MOCK_METRICS:
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        """Prometheus text format 指標（見 mock_server/metrics.py）"""
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
-    port = int(os.environ.get("MOCK_SERVER_PORT", "5050"))
-    app.run(host="0.0.0.0", port=port, debug=False)
+    app.run(host="0.0.0.0", port=MOCK_SERVER_PORT, debug=False)
@@ -0,0 +1,373 @@
+"""
+Mock API Server（ASGI 版）
+
+與 app.py 相同的路由、認證與回退規則（_infer_cookie_type → find_case → Mock DB 優先、其餘 CSV/JSON），
+但不依賴 Web 框架，以 asyncio 處理大量並行的 keep-alive 連線：
+- 啟動時預先計算所有案例的回應（JSON 只序列化一次、ETag 與壓縮結果快取），請求時只查表
+- Mock DB 查詢交給有上限的執行緒池（MOCK_DB_WORKERS），不阻塞事件迴圈
+- 測試計畫檔重新產生時（CSV / expected_result 變更）於背景重建回應表
+- MOCK_PROFILE 的延遲與頻寬上限以 asyncio.sleep 實作，不佔用事件迴圈
+
+啟動：在專案根目錄執行（需安裝 uvicorn）
+  python3 -m mock_server.asgi_app
+  或
+  uvicorn mock_server.asgi_app:app --port 5050
+"""
+import asyncio
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from common import compression, json_codec
+from common.registry import load_endpoints
+from mock_server import db as mock_db
+from mock_server import metrics, profiles, router
+from mock_server.settings import (
+    MOCK_CACHE_MAX_AGE,
+    MOCK_COMPRESSION,
+    MOCK_COMPRESSION_MIN_BYTES,
+    MOCK_DB_WORKERS,
+    MOCK_ETAG,
+    MOCK_METRICS,
+    MOCK_SERVER_PORT,
+    USE_MOCK_DB,
+    VERSION,
+)
+
+
+class PreparedResponse:
+    """
+    預先序列化的 JSON 回應（壓縮結果依編碼快取）
+
+    Args:
+        status: HTTP 狀態碼
+        body: 回應 JSON（None 表示空本文）
+        headers: 額外的回應 header（例如 405 的 Allow）
+    """
+    __slots__ = ("status", "body", "etag", "headers", "_compressed")
+
+    def __init__(self, status: int, body, headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = json_codec.dumps_bytes(body) if body is not None else b""
+        self.etag = f'"{router.body_etag(self.body)}"'
+        self.headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or {}).items()
+        ]
+        self._compressed = {}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        data = self._compressed.get(encoding)
+        if data is None:
+            data = self._compressed[encoding] = compression.compress(self.body, encoding)
+        return data
+
+
+UNAUTHORIZED = PreparedResponse(401, {"error": {"code": "E002", "message": "Unauthorized access"}})
+NO_MATCH = PreparedResponse(404, {"error": {"message": "No matching test case in CSV"}})
+NOT_FOUND = PreparedResponse(404, {"error": {"message": "Not Found"}})
+LOGIN = PreparedResponse(200, {"token": "mock_token_for_testing", "cookie": "mock_token_for_testing"})
+HEALTH = PreparedResponse(200, {"status": "ok", "service": "mock-api"})
+
+# 與 Flask 相同：GET 路由同時接受 HEAD，所有路由都接受 OPTIONS
+_STATIC_ROUTES = {"/health": {"GET"}, f"{VERSION}/auth/login": {"POST"}}
+if MOCK_METRICS:
+    _STATIC_ROUTES["/metrics"] = {"GET"}
+
+
+def _allowed_methods(methods) -> frozenset:
+    methods = set(methods) | {"OPTIONS"}
+    if "GET" in methods:
+        methods.add("HEAD")
+    return frozenset(methods)
+
+
+def _method_response(method: str, allowed: frozenset) -> PreparedResponse:
+    """路徑存在但方法不符：OPTIONS 回 200，其餘回 405（皆帶 Allow）"""
+    headers = {"Allow": ", ".join(sorted(allowed))}
+    if method == "OPTIONS":
+        return PreparedResponse(200, None, headers)
+    return PreparedResponse(405, {"error": {"message": "Method Not Allowed"}}, headers)
+
+
+def _unsupported_encoding(encoding: str) -> PreparedResponse:
+    return PreparedResponse(415, {"error": {"message": f"Unsupported content encoding: {encoding}"}})
+
+# latency / bandwidth / 錯誤注入（MOCK_PROFILE 未設定時為 None）
+PROFILE = profiles.load_profile()
+_INJECTED_ERRORS: Dict[int, PreparedResponse] = {}
+
+
+def _injected_error(decision: profiles.Decision) -> PreparedResponse:
+    """設定檔注入的錯誤回應（依狀態碼快取）"""
+    response = _INJECTED_ERRORS.get(decision.error_status)
+    if response is None:
+        response = _INJECTED_ERRORS[decision.error_status] = PreparedResponse(
+            decision.error_status, decision.error_body())
+    return response
+
+
+class ResponseTable:
+    """
+    預先計算的路由與案例回應表
+
+    routes: (method, path) → Endpoint（GET 路由同時登記 HEAD）
+    allowed: path → 可用的方法（含 OPTIONS；用於 405 / OPTIONS 的 Allow）
+    cases: (endpoint.key, 正規化 query_string, cookie 類型) → (CSV status_code, PreparedResponse)
+    """
+
+    def __init__(self):
+        self.plan = router.get_plan()
+        self.routes = {}
+        methods_by_path = {path: set(methods) for path, methods in _STATIC_ROUTES.items()}
+        self.cases: Dict[Tuple[str, str, str], Tuple[int, PreparedResponse]] = {}
+        for endpoint in load_endpoints(router.TEST_DATA_FOLDER):
+            for rule in (f"{VERSION}{endpoint.path}", f"{VERSION}{endpoint.path}/"):
+                self.routes[(endpoint.method, rule)] = endpoint
+                if endpoint.method == "GET":
+                    self.routes[("HEAD", rule)] = endpoint
+                methods_by_path.setdefault(rule, set()).add(endpoint.method)
+            for row in router.load_csv_cases(endpoint.module, endpoint.csv_file):
+                query_string, cookie_type = router._case_key(row)
+                key = (endpoint.key, query_string, cookie_type)
+                # 與 find_case 相同：相同 query / cookie 以第一列為準
+                if key in self.cases:
+                    continue
+                status, body = router.get_mock_response(
+                    module=endpoint.module,
+                    api_name=endpoint.api_name,
+                    csv_file_name=endpoint.csv_file,
+                    query_string=query_string,
+                    cookie_type=cookie_type,
+                )
+                self.cases[key] = (int(row.get("status_code", 200)), PreparedResponse(status, body))
+        self.allowed = {path: _allowed_methods(methods) for path, methods in methods_by_path.items()}
+
+
+def _fetch_page(table: str, args: Dict[str, str]) -> PreparedResponse:
+    """（執行緒池中執行）由 Mock DB 取得分頁資料（page / limit 以外的參數為篩選與排序）"""
+    page, limit, offset = router.parse_page_limit(args.get("page"), args.get("limit"))
+    query = mock_db.parse_query(table, args)
+    fetch, get_total = mock_db.FETCHERS[table]
+    data = fetch(limit=limit, offset=offset, query=query)
+    total = get_total(query)
+    return PreparedResponse(200, mock_db.build_pagination_body(data, total, page, limit))
+
+
+class MockASGIApp:
+    """ASGI 應用程式（支援 lifespan；未收到 lifespan 事件時於第一個請求建立回應表）"""
+
+    def __init__(self):
+        self.table: Optional[ResponseTable] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._refresh_task = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    # ---------- lifespan ----------
+    async def _startup(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=MOCK_DB_WORKERS, thread_name_prefix="mock-db")
+        if self.table is None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, mock_db.load_snapshot)
+            self.table = await loop.run_in_executor(self.executor, ResponseTable)
+        if self._refresh_task is None and router.TEST_PLAN:
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+
+    async def _shutdown(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self._startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self._shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _refresh_loop(self):
+        """測試計畫檔重新載入後重建回應表"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(router.PLAN_CHECK_INTERVAL)
+            plan = await loop.run_in_executor(self.executor, router.get_plan)
+            if plan is not self.table.plan:
+                self.table = await loop.run_in_executor(self.executor, ResponseTable)
+
+    # ---------- http ----------
+    async def _http(self, scope, receive, send):
+        if self.table is None:
+            await self._startup()
+        started = time.perf_counter()
+        metrics.request_started()
+        status = 500
+        try:
+            # 讀完請求本文（本服務不使用其內容，但與 Flask 版相同會驗證 Content-Encoding）
+            chunks = []
+            message = {"more_body": True}
+            while message.get("more_body"):
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                chunks.append(message.get("body", b""))
+
+            headers = {
+                name.decode("latin-1").lower(): value.decode("latin-1")
+                for name, value in scope["headers"]
+            }
+            encoding = headers.get("content-encoding")
+            if encoding:
+                try:
+                    compression.decompress(b"".join(chunks), encoding)
+                except (ValueError, OSError, EOFError, zlib.error):
+                    status = await self._send(scope, headers, _unsupported_encoding(encoding), send)
+                    return
+
+            if MOCK_METRICS and scope["path"] == "/metrics" and scope["method"] in ("GET", "HEAD"):
+                status = 200
+                await self._send_metrics(send, head=scope["method"] == "HEAD")
+                return
+
+            decision = PROFILE.decide(scope["path"]) if PROFILE is not None else None
+            if decision is not None and decision.delay:
+                await asyncio.sleep(decision.delay)
+            if decision is not None and decision.error_status is not None:
+                response = _injected_error(decision)
+            else:
+                response = await self._route(scope, headers)
+            status = await self._send(scope, headers, response, send, decision)
+        finally:
+            metrics.request_finished(
+                self._route_label(scope), scope["method"], status, time.perf_counter() - started)
+
+    def _route_label(self, scope) -> str:
+        """指標用的路由名稱（與 Flask 版的 URL rule 相同）"""
+        method, path = scope["method"], scope["path"]
+        endpoint = self.table.routes.get((method, path))
+        if endpoint is not None:
+            return f"{VERSION}{endpoint.path}"
+        if path in ("/health", "/metrics", f"{VERSION}/auth/login"):
+            return path
+        return "unmatched"
+
+    @staticmethod
+    async def _send_metrics(send, head: bool = False):
+        body = metrics.render().encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/plain; version=0.0.4"),
+            (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": b"" if head else body})
+
+    async def _route(self, scope, headers: dict) -> PreparedResponse:
+        method, path = scope["method"], scope["path"]
+        if path == "/health" and method in ("GET", "HEAD"):
+            return HEALTH
+        if path == f"{VERSION}/auth/login" and method == "POST":
+            return LOGIN
+
+        endpoint = self.table.routes.get((method, path))
+        if endpoint is None:
+            allowed = self.table.allowed.get(path)
+            return NOT_FOUND if allowed is None else _method_response(method, allowed)
+
+        cookie_type = router._infer_cookie_type(headers.get("authorization"))
+        if cookie_type != "auth":
+            return UNAUTHORIZED
+
+        raw_query = scope["query_string"].decode("latin-1")
+        case = self.table.cases.get(
+            (endpoint.key, router._normalize_query(raw_query), cookie_type))
+        if case is None:
+            return NO_MATCH
+
+        # 僅在「成功案例」且 Mock DB 存在時從 DB 取資料；其餘使用預先計算的 CSV/JSON 回應
+        row_status, prepared = case
+        if (
+            row_status in range(200, 300)
+            and endpoint.mock_db_table in mock_db.FETCHERS
+            and USE_MOCK_DB
+            and mock_db.db_available()
+        ):
+            args = {name: values[0] for name, values in parse_qs(raw_query).items()}
+            try:
+                response = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, _fetch_page, endpoint.mock_db_table, args)
+                metrics.count_source(f"{VERSION}{endpoint.path}", "db")
+                return response
+            except Exception as exc:
+                # fallback to file（含白名單外的查詢參數）
+                metrics.count_fallback(f"{VERSION}{endpoint.path}", type(exc).__name__)
+        metrics.count_source(f"{VERSION}{endpoint.path}", "file")
+        return prepared
+
+    async def _send(self, scope, headers: dict, response: PreparedResponse, send,
+                    decision: Optional[profiles.Decision] = None) -> int:
+        """送出回應，回傳實際的狀態碼（條件式請求可能為 304）"""
+        status = response.status
+        response_headers = [(b"content-type", b"application/json")]
+        response_headers.extend(response.headers)
+        encoding = None
+        if decision is not None and decision.error_status is not None and decision.retry_after is not None:
+            response_headers.append((b"retry-after", str(decision.retry_after).encode()))
+
+        if MOCK_ETAG and scope["method"] in ("GET", "HEAD") and status in range(200, 300):
+            response_headers.append((b"etag", response.etag.encode("latin-1")))
+            response_headers.append((
+                b"cache-control",
+                f"max-age={MOCK_CACHE_MAX_AGE}".encode() if MOCK_CACHE_MAX_AGE > 0 else b"no-cache",
+            ))
+            if response.etag in (headers.get("if-none-match") or "").replace(" ", "").split(","):
+                status = 304
+        if MOCK_COMPRESSION:
+            response_headers.append((b"vary", b"Accept-Encoding"))
+            if status != 304 and len(response.body) >= MOCK_COMPRESSION_MIN_BYTES:
+                encoding = compression.choose_encoding(headers.get("accept-encoding"))
+
+        body = b"" if status == 304 or scope["method"] == "HEAD" else response.encoded(encoding)
+        if encoding is not None:
+            response_headers.append((b"content-encoding", encoding.encode("latin-1")))
+        if status != 304:
+            response_headers.append((b"content-length", str(len(response.encoded(encoding))).encode()))
+
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        if body and decision is not None and decision.bytes_per_second:
+            # 依頻寬上限分段送出（以壓縮後的實際傳輸位元組計算）
+            for chunk, seconds in profiles.chunks(body, decision.bytes_per_second):
+                await asyncio.sleep(seconds)
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+            return status
+        await send({"type": "http.response.body", "body": body})
+        return status
+
+
+app = MockASGIApp()
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is required to run the ASGI mock server: pip install uvicorn")
+        sys.exit(1)
+    uvicorn.run(app, host="0.0.0.0", port=MOCK_SERVER_PORT, log_level="warning")
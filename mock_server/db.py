@@ -3,10 +3,19 @@ Mock DB 查詢模組
 
 從 SQLite (mock.db) 查詢 users、customers，
 供 Mock API 回傳與 expected_result 相同結構的 { data, pagination }。
+page / limit 以外的白名單參數（QUERY_FIELDS）轉為參數化 SQL 的篩選與排序，皆落在有索引的欄位上。
+MOCK_DB_MEMORY=true 時改由記憶體快照查詢（MemorySnapshot），每個執行緒重複使用自己的連線。
 """
+import itertools
 import os
 import sqlite3
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from mock_server import metrics
+from mock_server.settings import MOCK_DB_MEMORY, MOCK_DB_RELOAD_INTERVAL
 
 MOCK_DB_PATH = os.environ.get("MOCK_DB_PATH", "mock.db")
 
@@ -23,8 +32,8 @@ def _db_exists() -> bool:
 
 
 def db_available() -> bool:
-    """Mock DB 檔案是否存在（供 Mock API 判斷是否改從 DB 取資料）。"""
-    return _db_exists()
+    """Mock DB 檔案是否存在或已載入記憶體（供 Mock API 判斷是否改從 DB 取資料）。"""
+    return _state["snapshot"] is not None or _db_exists()
 
 
 def get_connection() -> Optional[sqlite3.Connection]:
@@ -37,89 +46,326 @@ def get_connection() -> Optional[sqlite3.Connection]:
         return None
 
 
-def get_total(cursor: sqlite3.Cursor, table: str) -> int:
-    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-    return cursor.fetchone()[0]
+_snapshot_names = itertools.count(1)
 
 
-def fetch_users(limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+class MemorySnapshot:
     """
-    從 users 表查詢，回傳與 expected_result 格式一致的 list of dict。
-    is_active 以 boolean 回傳。
+    mock.db 的記憶體快照
+
+    以 backup API 複製到具名的共用快取記憶體資料庫（file:...?mode=memory&cache=shared），
+    由 anchor 連線維持其存在；查詢端每個執行緒各自開一條連線並重複使用。
+    reload_interval > 0 時，每隔該秒數檢查 mock.db 的 mtime / 大小，變更時載入新的快照後切換，
+    仍在使用舊快照的執行緒於下一次查詢時改連新快照。
+
+    Args:
+        path: mock.db 路徑
+        reload_interval: 檢查檔案變更的間隔（秒），0 表示不重新載入
     """
-    conn = get_connection()
-    if not conn:
-        return []
-    try:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, username, email, is_active, created_at FROM users ORDER BY id LIMIT ? OFFSET ?",
-            (limit, offset),
-        )
-        rows = cursor.fetchall()
-        result = []
-        for row in rows:
-            result.append({
-                "id": row["id"],
-                "username": row["username"] or "",
-                "email": row["email"] or "",
-                "is_active": bool(row["is_active"]),
-                "created_at": row["created_at"] or "",
-            })
-        return result
-    finally:
-        conn.close()
 
+    def __init__(self, path: str, reload_interval: float = 0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.uri = None
+        self.signature = None
+        self.loaded_at = 0.0
+        self._anchor = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._local = threading.local()
+        self.load()
 
-def fetch_customers(limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
-    """從 customers 表查詢，回傳與 expected_result 格式一致的 list of dict。"""
-    conn = get_connection()
-    if not conn:
-        return []
-    try:
+    def _file_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """將 mock.db 載入新的記憶體資料庫並切換"""
+        signature = self._file_signature()
+        uri = f"file:mock_db_snapshot_{os.getpid()}_{next(_snapshot_names)}?mode=memory&cache=shared"
+        anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(self.path)
+        try:
+            source.backup(anchor)
+        finally:
+            source.close()
+        with self._lock:
+            previous, self._anchor = self._anchor, anchor
+            self.uri, self.signature, self.loaded_at = uri, signature, time.time()
+        if previous is not None:
+            previous.close()
+
+    def _maybe_reload(self):
+        if self.reload_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        with self._reload_lock:
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                changed = self._file_signature() != self.signature
+            except OSError:
+                return  # 檔案暫時不存在（例如重新產生中），沿用目前的快照
+            if changed:
+                self.load()
+
+    def connection(self) -> sqlite3.Connection:
+        """目前執行緒的唯讀連線（快照切換後重新連線）"""
+        self._maybe_reload()
+        uri = self.uri
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.uri == uri:
+            return conn
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(uri, uri=True)
         conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, customer_id, name, email, status, created_at FROM customers ORDER BY id LIMIT ? OFFSET ?",
-            (limit, offset),
-        )
-        rows = cursor.fetchall()
-        result = []
-        for row in rows:
-            result.append({
-                "id": row["id"],
-                "customer_id": row["customer_id"] or "",
-                "name": row["name"] or "",
-                "email": row["email"] or "",
-                "status": row["status"] or "",
-                "created_at": row["created_at"] or "",
-            })
-        return result
-    finally:
-        conn.close()
+        conn.execute("PRAGMA query_only = ON")
+        self._local.conn, self._local.uri = conn, uri
+        return conn
+
+
+_state = {"snapshot": None}
+_snapshot_lock = threading.Lock()
 
 
-def get_customers_total() -> int:
+def load_snapshot() -> Optional[MemorySnapshot]:
+    """
+    MOCK_DB_MEMORY=true 且 mock.db 存在時載入記憶體快照（Mock Server 啟動時呼叫）
+
+    Returns:
+        MemorySnapshot: 未啟用或無 mock.db 時回傳 None
+    """
+    if MOCK_DB_MEMORY and _state["snapshot"] is None and _db_exists():
+        with _snapshot_lock:
+            if _state["snapshot"] is None:
+                _state["snapshot"] = MemorySnapshot(_get_db_path(), MOCK_DB_RELOAD_INTERVAL)
+    return _state["snapshot"]
+
+
+@contextmanager
+def _reader() -> Iterator[Optional[sqlite3.Connection]]:
+    """查詢用連線：記憶體模式為執行緒共用的快照連線，否則為每次新開的檔案連線"""
+    snapshot = _state["snapshot"] or load_snapshot()
+    if snapshot is not None:
+        yield snapshot.connection()
+        return
     conn = get_connection()
-    if not conn:
-        return 0
     try:
-        cursor = conn.cursor()
-        return get_total(cursor, "customers")
+        yield conn
     finally:
-        conn.close()
+        if conn:
+            conn.close()
 
 
-def get_users_total() -> int:
-    conn = get_connection()
-    if not conn:
+class UnsupportedQuery(ValueError):
+    """查詢參數不在白名單或值不合法（Mock API 改從 CSV/JSON 回傳）"""
+
+
+# 分頁參數，由呼叫端處理
+_PAGING_ARGS = ("page", "limit")
+
+# 各資料表可用的查詢參數（皆對應 init_mock_db.create_indexes 建立索引的欄位）
+#   filters: 參數 → (欄位, 比較方式)；eq / bool 為等於、prefix 為字首範圍、>= / <= 為範圍
+#   sort: 可排序欄位（sort=created_at 或 sort=-created_at，相同值再依 id 排序）
+#   range_index: 只有範圍條件時指定的索引（否則 SQLite 會為了 ORDER BY id LIMIT 選擇整表掃描）
+QUERY_FIELDS = {
+    "users": {
+        "columns": ("id", "username", "email", "is_active", "created_at"),
+        "filters": {
+            "is_active": ("is_active", "bool"),
+            "email": ("email", "prefix"),
+            "created_at_from": ("created_at", ">="),
+            "created_at_to": ("created_at", "<="),
+        },
+        "sort": ("id", "created_at"),
+        "range_index": "idx_users_created_at",
+    },
+    "customers": {
+        "columns": ("id", "customer_id", "name", "email", "status", "created_at"),
+        "filters": {
+            "status": ("status", "eq"),
+            "email": ("email", "prefix"),
+            "created_at_from": ("created_at", ">="),
+            "created_at_to": ("created_at", "<="),
+        },
+        "sort": ("id", "created_at"),
+        "range_index": "idx_customers_created_at",
+    },
+}
+
+
+class Query:
+    """
+    已驗證的篩選與排序（參數化 SQL 片段）
+
+    Args:
+        where: WHERE 子句（不含 WHERE，無條件時為空字串）
+        params: WHERE 的參數
+        order_by: ORDER BY 子句（不含 ORDER BY）
+        index: 指定使用的索引（INDEXED BY），None 時由 SQLite 選擇
+    """
+    __slots__ = ("where", "params", "order_by", "index")
+
+    def __init__(self, where: str = "", params: tuple = (), order_by: str = "id", index: Optional[str] = None):
+        self.where = where
+        self.params = params
+        self.order_by = order_by
+        self.index = index
+
+    def _from_sql(self, table: str) -> str:
+        indexed_by = f" INDEXED BY {self.index}" if self.index else ""
+        where = f" WHERE {self.where}" if self.where else ""
+        return f"{table}{indexed_by}{where}"
+
+    def select_sql(self, table: str) -> Tuple[str, tuple]:
+        """分頁查詢的 SQL 與參數（LIMIT / OFFSET 為最後兩個參數）"""
+        columns = ", ".join(QUERY_FIELDS[table]["columns"])
+        sql = f"SELECT {columns} FROM {self._from_sql(table)} ORDER BY {self.order_by} LIMIT ? OFFSET ?"
+        return sql, self.params
+
+    def count_sql(self, table: str) -> Tuple[str, tuple]:
+        return f"SELECT COUNT(*) FROM {self._from_sql(table)}", self.params
+
+
+def _parse_bool(name: str, value: str) -> int:
+    lowered = value.strip().lower()
+    if lowered in ("true", "1"):
+        return 1
+    if lowered in ("false", "0"):
         return 0
-    try:
-        cursor = conn.cursor()
-        return get_total(cursor, "users")
-    finally:
-        conn.close()
+    raise UnsupportedQuery(f"Invalid boolean for {name}: {value}")
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """字首範圍的上界（email >= prefix AND email < 上界，可使用索引，LIKE 則不行）"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def parse_query(table: str, args: Mapping[str, str]) -> Query:
+    """
+    將 query string 參數轉為參數化的篩選 / 排序
+
+    Args:
+        table: 資料表名稱
+        args: query string 參數（page / limit 以外只接受白名單內的參數）
+
+    Raises:
+        UnsupportedQuery: 參數不在白名單或值不合法
+    """
+    fields = QUERY_FIELDS[table]
+    conditions, params = [], []
+    order_by = "id"
+    range_only = True
+    for name, value in args.items():
+        if name in _PAGING_ARGS:
+            continue
+        if name == "sort":
+            column = value.lstrip("-")
+            if column not in fields["sort"]:
+                raise UnsupportedQuery(f"Unsupported sort column: {value}")
+            direction = " DESC" if value.startswith("-") else ""
+            order_by = f"{column}{direction}" if column == "id" else f"{column}{direction}, id{direction}"
+            continue
+        if name not in fields["filters"]:
+            raise UnsupportedQuery(f"Unsupported query parameter: {name}")
+        column, kind = fields["filters"][name]
+        range_only = range_only and kind in (">=", "<=")
+        if kind == "bool":
+            conditions.append(f"{column} = ?")
+            params.append(_parse_bool(name, value))
+        elif kind == "prefix":
+            if not value:
+                raise UnsupportedQuery(f"Empty prefix for {name}")
+            conditions.append(f"{column} >= ? AND {column} < ?")
+            params.extend((value, _prefix_upper_bound(value)))
+        elif kind == "eq":
+            conditions.append(f"{column} = ?")
+            params.append(value)
+        else:
+            conditions.append(f"{column} {kind} ?")
+            params.append(value)
+    index = fields["range_index"] if conditions and range_only else None
+    return Query(" AND ".join(conditions), tuple(params), order_by, index)
+
+
+def get_total(cursor: sqlite3.Cursor, table: str, query: Optional[Query] = None) -> int:
+    sql, params = (query or Query()).count_sql(table)
+    cursor.execute(sql, params)
+    return cursor.fetchone()[0]
+
+
+def _fetch_rows(table: str, limit: int, offset: int, query: Optional[Query]) -> List[sqlite3.Row]:
+    with _reader() as conn:
+        if not conn:
+            return []
+        conn.row_factory = sqlite3.Row
+        sql, params = (query or Query()).select_sql(table)
+        started = time.perf_counter()
+        rows = conn.execute(sql, params + (limit, offset)).fetchall()
+        metrics.observe_sqlite(table, "select", time.perf_counter() - started)
+        return rows
+
+
+def fetch_users(limit: int = 10, offset: int = 0, query: Optional[Query] = None) -> List[Dict[str, Any]]:
+    """
+    從 users 表查詢，回傳與 expected_result 格式一致的 list of dict。
+    is_active 以 boolean 回傳。
+    """
+    result = []
+    for row in _fetch_rows("users", limit, offset, query):
+        result.append({
+            "id": row["id"],
+            "username": row["username"] or "",
+            "email": row["email"] or "",
+            "is_active": bool(row["is_active"]),
+            "created_at": row["created_at"] or "",
+        })
+    return result
+
+
+def fetch_customers(limit: int = 10, offset: int = 0, query: Optional[Query] = None) -> List[Dict[str, Any]]:
+    """從 customers 表查詢，回傳與 expected_result 格式一致的 list of dict。"""
+    result = []
+    for row in _fetch_rows("customers", limit, offset, query):
+        result.append({
+            "id": row["id"],
+            "customer_id": row["customer_id"] or "",
+            "name": row["name"] or "",
+            "email": row["email"] or "",
+            "status": row["status"] or "",
+            "created_at": row["created_at"] or "",
+        })
+    return result
+
+
+def _count(table: str, query: Optional[Query]) -> int:
+    with _reader() as conn:
+        if not conn:
+            return 0
+        started = time.perf_counter()
+        total = get_total(conn.cursor(), table, query)
+        metrics.observe_sqlite(table, "count", time.perf_counter() - started)
+        return total
+
+
+def get_customers_total(query: Optional[Query] = None) -> int:
+    return _count("customers", query)
+
+
+def get_users_total(query: Optional[Query] = None) -> int:
+    return _count("users", query)
+
+
+# 資料表 → (fetch(limit, offset, query), get_total(query))，供 endpoints.json 的 mock_db_table 對應
+FETCHERS = {
+    "users": (fetch_users, get_users_total),
+    "customers": (fetch_customers, get_customers_total),
+}
 
 
 def build_pagination_body(
@@ -1,13 +1,17 @@
 """
 Mock DB 初始化腳本（可選）
 
-建立 SQLite 資料庫與範例表（users、customers），
+建立 SQLite 資料庫與範例表（users、customers）及查詢用索引，
 並可從 test_data 的 expected_result JSON 匯入一筆範例資料。
-供日後擴充「Mock API 改由查詢 SQLite 回傳」時使用。
+--synthetic-rows N 另外產生 N 筆可重現的假資料（量測大表篩選效能用；會改變分頁 total，
+與 expected_result 精確比對的案例將不一致）。
 """
+import argparse
 import json
 import os
+import random
 import sqlite3
+from datetime import datetime, timedelta
 
 TEST_DATA_FOLDER = os.environ.get("TEST_DATA_FOLDER", "./test_data")
 ENV = os.environ.get("ENV", "dev")
@@ -39,6 +43,73 @@ def _customers_schema(cursor):
     """)
 
 
+# mock_server.db.QUERY_FIELDS 可篩選 / 排序的欄位皆需有索引（tests/mock_server/test_query_plan.py 檢查）
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_users_is_active ON users (is_active, id)",
+    "CREATE INDEX IF NOT EXISTS idx_users_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS idx_users_created_at ON users (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_users_is_active_created_at ON users (is_active, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_customers_status ON customers (status, id)",
+    "CREATE INDEX IF NOT EXISTS idx_customers_email ON customers (email)",
+    "CREATE INDEX IF NOT EXISTS idx_customers_created_at ON customers (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_customers_status_created_at ON customers (status, created_at)",
+)
+
+_SYNTHETIC_BATCH = 10000
+_SYNTHETIC_START = datetime(2025, 1, 1)
+
+
+def create_schema(cursor):
+    """建立資料表與索引"""
+    _users_schema(cursor)
+    _customers_schema(cursor)
+    for statement in INDEXES:
+        cursor.execute(statement)
+
+
+def _next_id(cursor, table: str) -> int:
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def _created_at(rng: random.Random) -> str:
+    moment = _SYNTHETIC_START + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def insert_synthetic_rows(cursor, rows: int, seed: int = 0):
+    """
+    產生可重現的假資料（每批 _SYNTHETIC_BATCH 筆）
+
+    Args:
+        cursor: SQLite cursor
+        rows: users、customers 各產生的筆數
+        seed: 亂數種子
+    """
+    rng = random.Random(seed)
+    user_start = _next_id(cursor, "users")
+    customer_start = _next_id(cursor, "customers")
+    for batch_start in range(0, rows, _SYNTHETIC_BATCH):
+        batch = range(batch_start, min(rows, batch_start + _SYNTHETIC_BATCH))
+        cursor.executemany(
+            "INSERT INTO users (id, username, email, is_active, created_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (user_start + i, f"synthetic_user_{i}", f"user{i}@synthetic.example.com",
+                 1 if rng.random() < 0.8 else 0, _created_at(rng))
+                for i in batch
+            ],
+        )
+        cursor.executemany(
+            "INSERT INTO customers (id, customer_id, name, email, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (customer_start + i, f"SYN{i:08d}", f"Synthetic Customer {i}",
+                 f"customer{i}@synthetic.example.com",
+                 "active" if rng.random() < 0.7 else "inactive", _created_at(rng))
+                for i in batch
+            ],
+        )
+
+
 def _insert_sample_users(cursor):
     path = os.path.join(
         TEST_DATA_FOLDER, ENV, "users", "expected_result", "get_users", "TC001.json"
@@ -90,6 +161,12 @@ def _insert_sample_customers(cursor):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="建立 Mock DB（SQLite）")
+    parser.add_argument("--synthetic-rows", type=int, default=0,
+                        help="users、customers 各額外產生的假資料筆數（預設 0）")
+    parser.add_argument("--seed", type=int, default=0, help="假資料的亂數種子")
+    args = parser.parse_args()
+
     base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     db_path = MOCK_DB_PATH if os.path.isabs(MOCK_DB_PATH) else os.path.join(base, MOCK_DB_PATH)
     d = os.path.dirname(db_path)
@@ -98,10 +175,11 @@ def main():
 
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    _users_schema(cursor)
-    _customers_schema(cursor)
+    create_schema(cursor)
     _insert_sample_users(cursor)
     _insert_sample_customers(cursor)
+    if args.synthetic_rows > 0:
+        insert_synthetic_rows(cursor, args.synthetic_rows, args.seed)
     conn.commit()
     conn.close()
     print(f"Mock DB 已建立: {db_path}")
@@ -0,0 +1,175 @@
+"""
+Mock Server 指標（Prometheus text format，GET /metrics）
+Flask 版（app.py）與 ASGI 版（asgi_app.py）共用，區分 CI 變慢是在用戶端還是 Mock Server。
+
+- mock_requests_total / mock_request_duration_seconds：各路由請求數與延遲分佈（含設定檔注入的延遲）
+- mock_requests_in_flight：處理中的請求數
+- mock_lookup_total：CSV 案例 / expected_result 查詢是否由測試計畫檔快取提供（hit）或讀取原檔（miss）
+- mock_response_source_total / mock_db_fallback_total：回應來自 Mock DB 或 CSV/JSON，以及 DB 失敗改用檔案的次數與原因
+- mock_sqlite_query_seconds：SQLite 查詢時間
+
+計數器以執行緒為單位累加（不需鎖），輸出時才合併；執行緒結束後其計數器由下一個新執行緒沿用，
+Werkzeug 每個請求一條執行緒時計數器數量仍以同時存在的執行緒數為上限。
+"""
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from mock_server.settings import MOCK_METRICS
+
+# 延遲分佈的 bucket 上界（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_HELP = {
+    "mock_requests_total": ("counter", "Requests handled by the mock server"),
+    "mock_request_duration_seconds": ("histogram", "Request handling time in seconds"),
+    "mock_requests_in_flight": ("gauge", "Requests currently being handled"),
+    "mock_lookup_total": ("counter", "Test case / expected result lookups (hit = served from the test plan)"),
+    "mock_response_source_total": ("counter", "Endpoint responses by source (db or file)"),
+    "mock_db_fallback_total": ("counter", "Mock DB failures that fell back to CSV/JSON"),
+    "mock_sqlite_query_seconds": ("histogram", "SQLite query time in seconds"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _ThreadMetrics:
+    """單一執行緒的計數器（僅由擁有的執行緒寫入）"""
+    __slots__ = ("owner", "counters", "histograms", "in_flight")
+
+    def __init__(self, owner: threading.Thread):
+        self.owner = owner
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) → [各 bucket 次數..., +Inf 次數, 總和]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self.in_flight = 0
+
+
+_registry: List[_ThreadMetrics] = []
+_registry_lock = threading.Lock()
+_local = threading.local()
+
+
+def _mine() -> _ThreadMetrics:
+    metrics = getattr(_local, "metrics", None)
+    if metrics is not None:
+        return metrics
+    current = threading.current_thread()
+    with _registry_lock:
+        # 沿用已結束執行緒的計數器（已不會再被寫入），避免每條短命執行緒各佔一份
+        for candidate in _registry:
+            if not candidate.owner.is_alive():
+                candidate.owner = current
+                metrics = candidate
+                break
+        else:
+            metrics = _ThreadMetrics(current)
+            _registry.append(metrics)
+    _local.metrics = metrics
+    return metrics
+
+
+def _inc(name: str, labels: Labels, amount: float = 1):
+    counters = _mine().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + amount
+
+
+def _observe(name: str, labels: Labels, seconds: float):
+    histograms = _mine().histograms
+    key = (name, labels)
+    values = histograms.get(key)
+    if values is None:
+        values = histograms[key] = [0] * (len(BUCKETS) + 2)
+    values[bisect_left(BUCKETS, seconds)] += 1
+    values[-1] += seconds
+
+
+def request_started():
+    if MOCK_METRICS:
+        _mine().in_flight += 1
+
+
+def request_finished(route: str, method: str, status: int, seconds: float):
+    """請求結束（須與 request_started 在同一執行緒呼叫）"""
+    if not MOCK_METRICS:
+        return
+    _mine().in_flight -= 1
+    _inc("mock_requests_total", (("route", route), ("method", method), ("status", str(status))))
+    _observe("mock_request_duration_seconds", (("route", route),), seconds)
+
+
+def count_lookup(kind: str, hit: bool):
+    """kind：csv / expected；hit 表示由測試計畫檔提供"""
+    if MOCK_METRICS:
+        _inc("mock_lookup_total", (("kind", kind), ("result", "hit" if hit else "miss")))
+
+
+def count_source(route: str, source: str):
+    """source：db / file"""
+    if MOCK_METRICS:
+        _inc("mock_response_source_total", (("route", route), ("source", source)))
+
+
+def count_fallback(route: str, reason: str):
+    if MOCK_METRICS:
+        _inc("mock_db_fallback_total", (("route", route), ("reason", reason)))
+
+
+def observe_sqlite(table: str, operation: str, seconds: float):
+    if MOCK_METRICS:
+        _observe("mock_sqlite_query_seconds", (("table", table), ("operation", operation)), seconds)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render() -> str:
+    """合併所有執行緒的計數器，輸出 Prometheus text format"""
+    counters: Dict[Tuple[str, Labels], float] = {}
+    histograms: Dict[Tuple[str, Labels], List[float]] = {}
+    in_flight = 0
+    with _registry_lock:
+        registry = list(_registry)
+    for metrics in registry:
+        in_flight += metrics.in_flight
+        for key, value in metrics.counters.copy().items():
+            counters[key] = counters.get(key, 0) + value
+        for key, values in metrics.histograms.copy().items():
+            merged = histograms.setdefault(key, [0] * len(values))
+            for index, value in enumerate(list(values)):
+                merged[index] += value
+
+    lines = []
+    for name, (metric_type, help_text) in _HELP.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if name == "mock_requests_in_flight":
+            lines.append(f"{name} {in_flight}")
+        elif metric_type == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+        else:
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), values[:-1]):
+                    cumulative += count
+                    bucket_labels = labels + (("le", str(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {_format_number(cumulative)}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(values[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {_format_number(cumulative)}")
+    return "\n".join(lines) + "\n"
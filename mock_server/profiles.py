@@ -0,0 +1,145 @@
+"""
+Mock Server 行為設定檔（latency / bandwidth / 錯誤注入）
+讓 Mock Server 模擬較慢的正式環境，以離線、可重現的方式量測用戶端的並行、重試與 timeout 行為。
+Flask 版（app.py）與 ASGI 版（asgi_app.py）共用；延遲不會阻塞其他請求
+（Flask 為多執行緒、ASGI 使用 asyncio.sleep）。
+
+環境變數 MOCK_PROFILE：JSON 字串或 JSON 檔案路徑，例如：
+  {
+    "seed": 42,
+    "routes": {
+      "*": {"latency": {"type": "fixed", "ms": 20}},
+      "/v1/users": {
+        "latency": {"type": "long_tail", "base_ms": 30, "spike_ms": 800, "spike_rate": 0.01},
+        "bandwidth_kbps": 512,
+        "errors": {"rate": 0.05, "statuses": [429, 503], "retry_after": 1}
+      }
+    }
+  }
+
+latency.type：
+  fixed      {"ms"}
+  normal     {"mean_ms", "stddev_ms"}（小於 0 時視為 0）
+  long_tail  {"base_ms", "spike_ms", "spike_rate"}（以 spike_rate 的機率延遲 spike_ms，模擬 p99 尖峰）
+"/health"、"/metrics" 不套用設定檔；路徑未列出時使用 "*"。
+每個路由有各自以 seed 初始化的亂數產生器，相同請求順序下結果可重現（MOCK_PROFILE_SEED 可覆寫 seed）。
+"""
+import random
+import threading
+from typing import Optional
+
+from common import json_codec
+from mock_server.settings import MOCK_PROFILE, MOCK_PROFILE_SEED
+
+
+_UNPROFILED_PATHS = ("/health", "/metrics")
+
+
+class Decision:
+    """單一請求的注入結果"""
+    __slots__ = ("delay", "error_status", "retry_after", "bytes_per_second")
+
+    def __init__(self, delay: float, error_status: Optional[int], retry_after, bytes_per_second):
+        self.delay = delay
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.bytes_per_second = bytes_per_second
+
+    def error_body(self) -> dict:
+        return {"error": {"code": self.error_status, "message": "Injected error by mock profile"}}
+
+
+class RouteProfile:
+    """
+    單一路由的設定
+
+    Args:
+        config: 路由設定（latency / bandwidth_kbps / errors）
+        seed: 亂數種子
+    """
+
+    def __init__(self, config: dict, seed):
+        self.latency = config.get("latency") or {}
+        bandwidth = config.get("bandwidth_kbps")
+        self.bytes_per_second = float(bandwidth) * 1024 if bandwidth else None
+        errors = config.get("errors") or {}
+        self.error_rate = float(errors.get("rate", 0))
+        self.error_statuses = list(errors.get("statuses", [503]))
+        self.retry_after = errors.get("retry_after")
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _delay(self) -> float:
+        latency_type = self.latency.get("type", "fixed")
+        if latency_type == "fixed":
+            milliseconds = float(self.latency.get("ms", 0))
+        elif latency_type == "normal":
+            milliseconds = self._random.gauss(
+                float(self.latency.get("mean_ms", 0)), float(self.latency.get("stddev_ms", 0)))
+        elif latency_type == "long_tail":
+            milliseconds = float(self.latency.get("base_ms", 0))
+            if self._random.random() < float(self.latency.get("spike_rate", 0)):
+                milliseconds = float(self.latency.get("spike_ms", 0))
+        else:
+            raise ValueError(f"Unknown latency type in mock profile: {latency_type}")
+        return max(0.0, milliseconds) / 1000
+
+    def decide(self) -> Decision:
+        with self._lock:
+            delay = self._delay() if self.latency else 0.0
+            error_status = None
+            if self.error_rate and self._random.random() < self.error_rate:
+                error_status = self._random.choice(self.error_statuses)
+        return Decision(delay, error_status, self.retry_after, self.bytes_per_second)
+
+
+class MockProfile:
+    """
+    所有路由的設定
+
+    Args:
+        config: {"seed": ..., "routes": {path: 路由設定}}
+    """
+
+    def __init__(self, config: dict):
+        seed = MOCK_PROFILE_SEED or config.get("seed")
+        self.routes = {
+            path.rstrip("/") or "/": RouteProfile(route, f"{seed}:{path}")
+            for path, route in (config.get("routes") or {}).items()
+        }
+
+    def decide(self, path: str) -> Optional[Decision]:
+        """依請求路徑決定延遲 / 錯誤 / 頻寬；無設定時回傳 None"""
+        if path in _UNPROFILED_PATHS:
+            return None
+        route = self.routes.get(path.rstrip("/") or "/") or self.routes.get("*")
+        return route.decide() if route is not None else None
+
+
+def load_profile(value: Optional[str] = None) -> Optional[MockProfile]:
+    """
+    讀取 MOCK_PROFILE（JSON 字串或檔案路徑）
+
+    Returns:
+        MockProfile: 未設定時回傳 None
+    """
+    value = value if value is not None else MOCK_PROFILE
+    if not value.strip():
+        return None
+    if value.lstrip().startswith("{"):
+        return MockProfile(json_codec.loads(value))
+    with open(value, "rb") as file_input:
+        return MockProfile(json_codec.loads(file_input.read()))
+
+
+def chunks(data: bytes, bytes_per_second: float, interval: float = 0.05):
+    """
+    依頻寬上限切分本文
+
+    Returns:
+        generator: (chunk, 送出前應等待的秒數)
+    """
+    size = max(1, int(bytes_per_second * interval))
+    for start in range(0, len(data), size):
+        chunk = data[start:start + size]
+        yield chunk, len(chunk) / bytes_per_second
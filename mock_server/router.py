@@ -4,16 +4,27 @@ Mock Server 路由邏輯
 根據 request 的 path、query_string、認證狀態，
 對應 test_data 的 CSV 與 expected_result JSON，回傳預設回應。
 """
-import json
+import hashlib
 import os
+import threading
+import time
 from typing import Any, Dict, List, Optional, Tuple
 
-import pandas as pd
+from common import json_codec, test_plan
+from mock_server import metrics
 
 
 # 預設與 test_data 一致
 TEST_DATA_FOLDER = os.environ.get("TEST_DATA_FOLDER", "./test_data")
 ENV = os.environ.get("ENV", "dev")
+# 預先編譯的測試計畫檔（與 pytest 共用 .test_plan/{ENV}.plan；來源較新時自動重新產生）
+TEST_PLAN = os.environ.get("TEST_PLAN", "true").lower() in ("true", "1", "yes")
+TEST_PLAN_PATH = os.environ.get("TEST_PLAN_PATH") or None
+# 檢查計畫檔是否過期的間隔（秒）
+PLAN_CHECK_INTERVAL = 5.0
+
+_plan_lock = threading.Lock()
+_plan_state = {"plan": None, "checked_at": 0.0}
 
 
 def _normalize_query(q: Optional[str]) -> str:
@@ -41,13 +52,66 @@ def _infer_cookie_type(auth_header: Optional[str]) -> str:
     return "auth"
 
 
+def parse_page_limit(page_arg, limit_arg, default_limit: int = 10) -> Tuple[int, int, int]:
+    """解析 page、limit 參數（limit 介於 1~100），回傳 (page, limit, offset)。"""
+    try:
+        page = max(1, int(page_arg if page_arg is not None else 1))
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        limit = max(1, min(100, int(limit_arg if limit_arg is not None else default_limit)))
+    except (TypeError, ValueError):
+        limit = default_limit
+    offset = (page - 1) * limit
+    return page, limit, offset
+
+
+def body_etag(data: bytes) -> str:
+    """回應本文的 ETag（本文 hash，不含引號）"""
+    return hashlib.sha1(data).hexdigest()
+
+
+def get_plan() -> Optional[test_plan.TestPlan]:
+    """
+    取得測試計畫檔（mmap 載入；每 PLAN_CHECK_INTERVAL 秒檢查一次來源是否較新，較新時重新編譯）。
+    TEST_PLAN=false 時回傳 None，改為每次讀取 CSV / JSON 原檔。
+    """
+    if not TEST_PLAN:
+        return None
+    now = time.monotonic()
+    with _plan_lock:
+        plan = _plan_state["plan"]
+        if plan is None or now - _plan_state["checked_at"] >= PLAN_CHECK_INTERVAL:
+            root = os.path.join(TEST_DATA_FOLDER, ENV)
+            if plan is None or plan.is_stale(root):
+                plan = test_plan.TestPlan(test_plan.ensure(TEST_DATA_FOLDER, ENV, TEST_PLAN_PATH))
+                _plan_state["plan"] = plan
+            _plan_state["checked_at"] = now
+        return plan
+
+
+def _case_key(row) -> Tuple[str, str]:
+    """CSV 列的比對鍵：(正規化 query_string, 小寫 cookie 類型)"""
+    return (
+        _normalize_query(row.get("query_string", "")),
+        (row.get("cookie") or "").strip().lower(),
+    )
+
+
 def load_csv_cases(module: str, file_name: str) -> List[Dict[str, Any]]:
     """
     讀取 test_data 下的 CSV（與 FileProcess 路徑一致，header=0 以配合本專案 CSV）。
     """
+    plan = get_plan()
+    if plan is not None and plan.has_csv(f"{module}/{file_name}"):
+        return plan.read_csv(f"{module}/{file_name}")
+
     path = os.path.join(TEST_DATA_FOLDER, ENV, module, f"{file_name}.csv")
     if not os.path.isfile(path):
         return []
+    # pandas 載入成本高，僅在實際讀取 CSV 時才 import
+    import pandas as pd
+
     df = pd.read_csv(path, header=0, dtype=str).dropna(how="all").fillna("")
     return [dict(df.loc[i]) for i in range(len(df))]
 
@@ -60,26 +124,41 @@ def find_case(
 ) -> Optional[Dict[str, Any]]:
     """
     依 query_string 與 cookie 類型找到對應的 CSV 列（一筆測試案例）。
+    有計畫檔時以快取的查詢表比對，不再逐列掃描。
     """
-    cases = load_csv_cases(module, file_name)
-    q = _normalize_query(query_string)
-    for row in cases:
-        row_q = _normalize_query(row.get("query_string", ""))
-        row_cookie = (row.get("cookie") or "").strip().lower()
-        if row_q == q and row_cookie == cookie_type.lower():
+    key = (_normalize_query(query_string), cookie_type.lower())
+    plan = get_plan()
+    if plan is not None and plan.has_csv(f"{module}/{file_name}"):
+        metrics.count_lookup("csv", hit=True)
+        return plan.lookup(f"{module}/{file_name}", _case_key).get(key)
+
+    metrics.count_lookup("csv", hit=False)
+    for row in load_csv_cases(module, file_name):
+        if _case_key(row) == key:
             return row
     return None
 
 
 def load_expected_json(module: str, api_name: str, case_id: str) -> Optional[Dict[str, Any]]:
     """讀取 expected_result 下的 JSON。"""
+    plan = get_plan()
+    if plan is not None:
+        relative = f"{module}/expected_result/{api_name}/{case_id}.json"
+        if not plan.has_expected(relative):
+            return None
+        content = plan.expected_bytes(relative)
+        if content is not None:
+            metrics.count_lookup("expected", hit=True)
+            return json_codec.loads(content)
+
     path = os.path.join(
         TEST_DATA_FOLDER, ENV, module, "expected_result", api_name, f"{case_id}.json"
     )
     if not os.path.isfile(path):
         return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    metrics.count_lookup("expected", hit=False)
+    with open(path, "rb") as f:
+        return json_codec.loads(f.read())
 
 
 def get_mock_response(
@@ -0,0 +1,43 @@
+"""
+Mock Server 設定
+Flask 版（app.py）與 ASGI 版（asgi_app.py）共用，皆由環境變數讀取。
+"""
+import os
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("true", "1", "yes")
+
+
+# 與 config.VERSION 對齊，例如 /v1
+VERSION = os.environ.get("VERSION", "/v1")
+
+# Mock server 監聽埠（預設 5050，避免 macOS AirPlay 佔用 5000）
+MOCK_SERVER_PORT = int(os.environ.get("MOCK_SERVER_PORT", "5050"))
+
+# 是否從 Mock DB 取資料（預設 true；無 mock.db 或查詢失敗時會改從 CSV/JSON）
+USE_MOCK_DB = _flag("USE_MOCK_DB", "true")
+
+# 是否依 Accept-Encoding 壓縮回應（僅壓縮達 MOCK_COMPRESSION_MIN_BYTES 的 JSON 回應）
+MOCK_COMPRESSION = _flag("MOCK_COMPRESSION", "false")
+MOCK_COMPRESSION_MIN_BYTES = int(os.environ.get("MOCK_COMPRESSION_MIN_BYTES", "1024"))
+
+# 是否對 GET 回應附加 ETag（If-None-Match 相符時回 304）；MOCK_CACHE_MAX_AGE 為 0 時回傳 Cache-Control: no-cache
+MOCK_ETAG = _flag("MOCK_ETAG", "true")
+MOCK_CACHE_MAX_AGE = int(os.environ.get("MOCK_CACHE_MAX_AGE", "0"))
+
+# ASGI 版查詢 SQLite 的執行緒數上限
+MOCK_DB_WORKERS = int(os.environ.get("MOCK_DB_WORKERS", "4"))
+
+# latency / bandwidth / 錯誤注入設定檔（JSON 字串或檔案路徑，格式見 mock_server/profiles.py；空值表示不注入）
+MOCK_PROFILE = os.environ.get("MOCK_PROFILE", "")
+# 覆寫設定檔中的 seed（相同 seed 與請求順序下注入結果可重現）
+MOCK_PROFILE_SEED = os.environ.get("MOCK_PROFILE_SEED", "")
+
+# 啟動時將 mock.db 以 SQLite backup API 載入共用的記憶體資料庫，查詢不再讀取磁碟
+MOCK_DB_MEMORY = _flag("MOCK_DB_MEMORY", "false")
+# 記憶體模式下檢查 mock.db 是否變更並重新載入的間隔（秒）；0 表示不重新載入
+MOCK_DB_RELOAD_INTERVAL = float(os.environ.get("MOCK_DB_RELOAD_INTERVAL", "0"))
+
+# 是否提供 GET /metrics（Prometheus text format）並記錄請求指標
+MOCK_METRICS = _flag("MOCK_METRICS", "true")
@@ -0,0 +1,35 @@
+"""
+tests/api 共用的假回應與重試策略 fixture
+"""
+import io
+
+import pytest
+from api import replay, retry
+
+URL = 'http://mock/v1/users'
+
+
+def make_response(status_code=200, body=b'{}', headers=None, retry_after=None, url=URL):
+    """
+    組出假的 requests.Response（raw 為可讀取的 BytesIO，可經過 BaseAPI 的串流與 close）
+
+    Args:
+        headers: 回應 header；預設只有 Content-Type: application/json
+        retry_after: 指定時加上 Retry-After
+    """
+    if headers is None:
+        headers = {'Content-Type': 'application/json'}
+    response = replay.build_response(status_code, headers, body, url, 'OK')
+    response.raw = io.BytesIO(body)
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+@pytest.fixture()
+def policy():
+    """以固定的重試策略取代目前的策略，測試結束後還原"""
+    previous = retry.set_policy(retry.RetryPolicy(
+        max_attempts=3, backoff_base=0.5, backoff_max=8, retry_statuses=(502, 503, 504), budget=10))
+    yield retry.get_policy()
+    retry.set_policy(previous)
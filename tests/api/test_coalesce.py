@@ -0,0 +1,245 @@
+"""
+請求合併：行程內 single-flight、跨 worker 共用與不可共用的回應
+"""
+import multiprocessing
+import threading
+import time
+
+import pytest
+from api import coalesce
+from tests.api.conftest import make_response
+
+URL = 'http://mock/v1/users'
+
+
+BODY = b'{"ok": true}'
+
+
+class _Sender:
+    """依序回傳指定狀態碼的假 send，記錄實際送出次數"""
+
+    def __init__(self, *statuses, delay=0.0):
+        self.statuses = list(statuses) or [200]
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            status = self.statuses[min(self.calls, len(self.statuses) - 1)]
+            self.calls += 1
+        time.sleep(self.delay)
+        return make_response(status, BODY)
+
+
+pytestmark = pytest.mark.usefixtures('policy')
+
+
+def _execute(coalescer, send, key='k'):
+    return coalescer.execute(key, 'GET', URL, 'auth', send)
+
+
+def test_concurrent_identical_requests_send_once():
+    coalescer = coalesce.RequestCoalescer()
+    send = _Sender(delay=0.1)
+    results = []
+
+    def run():
+        results.append(_execute(coalescer, send))
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert send.calls == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert all(response.json() == {'ok': True} for response, _ in results)
+    assert coalescer.stats == {'executed': 1, 'coalesced': 7}
+
+
+def test_shared_responses_are_independent_copies():
+    coalescer = coalesce.RequestCoalescer()
+    send = _Sender()
+    first, _ = _execute(coalescer, send)
+    second, shared = _execute(coalescer, send)
+
+    assert shared
+    assert first is not second
+    second.headers['X-Changed'] = '1'
+    third, _ = _execute(coalescer, send)
+    assert 'X-Changed' not in third.headers
+
+
+def test_different_keys_are_sent_separately():
+    coalescer = coalesce.RequestCoalescer()
+    send = _Sender()
+    _execute(coalescer, send, key='a')
+    _execute(coalescer, send, key='b')
+    assert send.calls == 2
+
+
+def test_failed_send_is_not_kept():
+    coalescer = coalesce.RequestCoalescer()
+
+    def fail():
+        raise ConnectionError('boom')
+
+    with pytest.raises(ConnectionError):
+        _execute(coalescer, fail)
+    send = _Sender()
+    _, shared = _execute(coalescer, send)
+    assert not shared
+    assert send.calls == 1
+
+
+@pytest.mark.parametrize('status', [500, 502, 503, 429])
+def test_throttled_and_server_errors_are_resent(status):
+    coalescer = coalesce.RequestCoalescer()
+    send = _Sender(status, 200)
+    first, _ = _execute(coalescer, send)
+    second, shared = _execute(coalescer, send)
+
+    assert first.status_code == status
+    assert second.status_code == 200
+    assert not shared
+    assert send.calls == 2
+
+
+def test_statuses_in_retry_policy_are_not_shared(policy):
+    policy.retry_statuses = frozenset({409})
+    coalescer = coalesce.RequestCoalescer()
+    send = _Sender(409, 200)
+    _execute(coalescer, send)
+    _execute(coalescer, send)
+    assert send.calls == 2
+
+
+def test_client_errors_are_shared():
+    coalescer = coalesce.RequestCoalescer()
+    send = _Sender(404)
+    _execute(coalescer, send)
+    response, shared = _execute(coalescer, send)
+    assert shared
+    assert response.status_code == 404
+    assert send.calls == 1
+
+
+def test_waiters_resend_after_server_error():
+    coalescer = coalesce.RequestCoalescer()
+    send = _Sender(503, 200, delay=0.1)
+    results = []
+
+    def run():
+        results.append(_execute(coalescer, send)[0].status_code)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 第一個 503 不共用，等待者之一重送後其他案例共用 200
+    assert sorted(results) == [200, 200, 200, 503]
+    assert send.calls == 2
+
+
+def test_shared_store_across_coalescers(tmp_path):
+    path = str(tmp_path / 'coalesce.db')
+    first = coalesce.RequestCoalescer(shared_path=path)
+    second = coalesce.RequestCoalescer(shared_path=path)
+    send = _Sender()
+    _execute(first, send)
+    response, shared = _execute(second, send)
+
+    assert shared
+    assert response.json() == {'ok': True}
+    assert send.calls == 1
+    first.close()
+    second.close()
+
+
+def test_shared_store_skips_server_errors(tmp_path):
+    path = str(tmp_path / 'coalesce.db')
+    first = coalesce.RequestCoalescer(shared_path=path)
+    second = coalesce.RequestCoalescer(shared_path=path)
+    _execute(first, _Sender(503))
+    send = _Sender(200)
+    response, shared = _execute(second, send)
+
+    assert not shared
+    assert response.status_code == 200
+    assert send.calls == 1
+    first.close()
+    second.close()
+
+
+def _worker(path, log_path, barrier):
+    coalescer = coalesce.RequestCoalescer(shared_path=path)
+
+    def send():
+        with open(log_path, 'a', encoding='utf-8') as log:
+            log.write('sent\n')
+        time.sleep(0.2)
+        return make_response(body=BODY)
+
+    barrier.wait()
+    response, _ = _execute(coalescer, send)
+    assert response.status_code == 200
+    coalescer.close()
+
+
+def test_cross_process_requests_send_once(tmp_path):
+    path = str(tmp_path / 'coalesce.db')
+    log_path = tmp_path / 'sent.log'
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(4)
+    processes = [
+        context.Process(target=_worker, args=(path, str(log_path), barrier))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+    assert log_path.read_text(encoding='utf-8').count('sent') == 1
+
+
+def test_request_key_ignores_header_order_and_case():
+    first = coalesce.request_key('GET', URL, 'auth', headers={'Accept': 'a', 'X-Trace': '1'})
+    second = coalesce.request_key('get', URL, 'auth', headers={'x-trace': '1', 'accept': 'a'})
+    assert first == second
+
+
+@pytest.mark.parametrize('changed', [
+    {'headers': {'Accept': 'text/csv'}},
+    {'headers': {'Authorization': 'Bearer other'}},
+    {'max_body_bytes': 1024},
+    {'body': {'a': 1}},
+])
+def test_request_key_distinguishes_headers_and_limits(changed):
+    base = {'headers': {'Accept': 'application/json'}}
+    assert coalesce.request_key('GET', URL, 'auth', **base) != coalesce.request_key(
+        'GET', URL, 'auth', **{**base, **changed})
+
+
+def test_capped_case_does_not_share_uncapped_response(monkeypatch):
+    import requests
+    from api import base_api, download
+
+    body = b'{"data": "' + b'x' * 4096 + b'"}'
+
+    monkeypatch.setattr(requests, 'request', lambda method, url, **kwargs: make_response(body=body))
+    monkeypatch.setattr(base_api.BaseAPI, 'service_a_base_url', 'http://mock')
+    monkeypatch.setattr(base_api.BaseAPI, 'version', '/v1')
+    coalesce.configure(True)
+    try:
+        api = base_api.BaseAPI()
+        assert api.request('GET', '/users').content == body
+        with pytest.raises(download.ResponseTooLargeError):
+            api.request('GET', '/users', max_body_bytes=1024)
+    finally:
+        coalesce.configure(False)
@@ -0,0 +1,45 @@
+"""
+BaseAPI 的 Accept-Encoding 協商：HTTP_COMPRESSION 關閉時要求不壓縮
+"""
+import io
+
+import config
+import pytest
+import requests
+from api import base_api
+
+
+@pytest.fixture()
+def sent(monkeypatch):
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(kwargs)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.raw = io.BytesIO(b'{}')
+        return response
+
+    monkeypatch.setattr(requests, 'request', fake_request)
+    return calls
+
+
+def test_identity_when_compression_disabled(monkeypatch, sent):
+    monkeypatch.setattr(config, 'HTTP_COMPRESSION', 'false')
+    headers = {'Authorization': 'Bearer token'}
+    base_api.BaseAPI()._send('GET', 'http://mock/v1/users', headers=headers)
+    assert sent[0]['headers']['Accept-Encoding'] == 'identity'
+    assert headers == {'Authorization': 'Bearer token'}
+
+
+def test_caller_accept_encoding_is_kept(monkeypatch, sent):
+    monkeypatch.setattr(config, 'HTTP_COMPRESSION', 'false')
+    base_api.BaseAPI()._send('GET', 'http://mock/v1/users', headers={'accept-encoding': 'gzip'})
+    assert sent[0]['headers'] == {'accept-encoding': 'gzip'}
+
+
+def test_negotiates_when_compression_enabled(monkeypatch, sent):
+    monkeypatch.setattr(config, 'HTTP_COMPRESSION', 'true')
+    base_api.BaseAPI()._send('GET', 'http://mock/v1/users')
+    assert 'gzip' in sent[0]['headers']['Accept-Encoding']
@@ -0,0 +1,102 @@
+"""
+回應本文大小上限、落地到暫存檔與暫存檔清除
+"""
+import gc
+import io
+import json
+import os
+
+import pytest
+import requests
+from api import base_api, download
+
+URL = 'http://mock/v1/large'
+BODY = json.dumps({'data': [{'id': index, 'name': f'user_{index}'} for index in range(5000)]}).encode()
+
+
+def _streaming(body=BODY, headers=None):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = URL
+    response.headers.update(headers or {'Content-Type': 'application/json'})
+    response.raw = io.BytesIO(body)
+    return response
+
+
+@pytest.fixture()
+def spill_dir(tmp_path):
+    folder = tmp_path / 'spill'
+    folder.mkdir()
+    return folder
+
+
+def test_small_body_stays_in_memory(spill_dir):
+    response = download.read_body(
+        _streaming(), max_bytes=len(BODY), spill_bytes=len(BODY), spill_dir=str(spill_dir))
+    assert not isinstance(response, download.SpilledResponse)
+    assert response.content == BODY
+    assert os.listdir(spill_dir) == []
+
+
+def test_declared_length_over_cap_aborts_before_reading():
+    response = _streaming(headers={'Content-Length': str(len(BODY))})
+    with pytest.raises(download.ResponseTooLargeError) as error:
+        download.read_body(response, max_bytes=1024)
+    assert error.value.limit == 1024
+    assert error.value.received == 0
+    # 未讀取本文即關閉連線
+    assert response.raw.closed
+
+
+def test_streamed_body_over_cap_aborts():
+    with pytest.raises(download.ResponseTooLargeError) as error:
+        download.read_body(_streaming(), max_bytes=100 * 1024)
+    assert 100 * 1024 < error.value.received <= 100 * 1024 + download.CHUNK_SIZE
+
+
+def test_large_body_spills_to_disk(spill_dir):
+    response = download.read_body(_streaming(), spill_bytes=1024, spill_dir=str(spill_dir))
+
+    assert isinstance(response, download.SpilledResponse)
+    assert os.path.dirname(response.body_path) == str(spill_dir)
+    assert os.path.getsize(response.body_path) == len(BODY)
+    assert b''.join(response.iter_body(chunk_size=4096)) == BODY
+    assert download.json_body(response) == json.loads(BODY)
+    assert download.transfer_sizes(response)[1] == len(BODY)
+    # content 於第一次存取時才讀回
+    assert response._content is False
+    assert response.json()['data'][1] == {'id': 1, 'name': 'user_1'}
+
+
+def test_close_removes_spilled_file(spill_dir):
+    response = download.read_body(_streaming(), spill_bytes=1024, spill_dir=str(spill_dir))
+    response.close()
+    assert os.listdir(spill_dir) == []
+
+
+def test_garbage_collection_removes_spilled_file(spill_dir):
+    response = download.read_body(_streaming(), spill_bytes=1024, spill_dir=str(spill_dir))
+    assert len(os.listdir(spill_dir)) == 1
+    del response
+    gc.collect()
+    assert os.listdir(spill_dir) == []
+
+
+def test_cap_while_spilling_removes_partial_file(spill_dir):
+    with pytest.raises(download.ResponseTooLargeError):
+        download.read_body(
+            _streaming(), max_bytes=len(BODY) - 1, spill_bytes=1024, spill_dir=str(spill_dir))
+    assert os.listdir(spill_dir) == []
+
+
+def test_oversized_response_is_not_retried(monkeypatch, policy):
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(kwargs.get('stream'))
+        return _streaming()
+
+    monkeypatch.setattr(requests, 'request', fake_request)
+    with pytest.raises(download.ResponseTooLargeError):
+        base_api.BaseAPI()._send('GET', URL, max_body_bytes=1024)
+    assert calls == [True]
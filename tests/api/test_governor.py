@@ -0,0 +1,136 @@
+"""
+速率調節器：AIMD 調整與跨行程共用的 token bucket
+"""
+import json
+import multiprocessing
+import time
+
+import pytest
+from api import governor
+from tests.api.conftest import make_response
+
+
+@pytest.fixture()
+def disable_governor():
+    yield
+    governor.configure(False)
+
+
+def test_additive_increase_is_capped():
+    bucket = governor.TokenBucket(rate=10, min_rate=1, max_rate=10.15)
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(10.1)
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(10.15)
+
+
+def test_multiplicative_decrease_is_floored():
+    bucket = governor.TokenBucket(rate=8, min_rate=3, max_rate=100)
+    bucket.on_throttle(0.5)
+    assert bucket.rate == 4
+    bucket.on_throttle(0.5)
+    assert bucket.rate == 3
+
+
+def test_throttle_drains_tokens_and_pauses():
+    bucket = governor.TokenBucket(rate=100, min_rate=1, max_rate=100)
+    bucket.on_throttle(0.5, retry_after=0.3)
+    start = time.time()
+    bucket.acquire()
+    assert time.time() - start >= 0.3
+
+
+def test_acquire_paces_to_rate():
+    bucket = governor.TokenBucket(rate=20, min_rate=1, max_rate=20)
+    start = time.time()
+    for _ in range(6):
+        bucket.acquire()
+    # 第一個 token 立即可用，其餘每 1/20 秒一個
+    assert time.time() - start >= 5 / 20 * 0.9
+
+
+def test_feedback_routes_statuses():
+    rate_governor = governor.RateGovernor(
+        governor.TokenBucket(rate=10, min_rate=1, max_rate=100))
+    rate_governor.feedback(None)
+    assert rate_governor.bucket.rate == 10
+    rate_governor.feedback(make_response(200))
+    assert rate_governor.bucket.rate == pytest.approx(10.1)
+    rate_governor.feedback(make_response(429))
+    assert rate_governor.bucket.rate == pytest.approx(5.05)
+    rate_governor.feedback(make_response(503))
+    assert rate_governor.throttled == 2
+
+
+def test_enabling_retries_throttled_responses(policy, disable_governor):
+    assert not policy.should_retry_response('GET', {}, make_response(429), attempt=1)
+    governor.configure(True)
+    assert policy.should_retry_response('GET', {}, make_response(429, retry_after=1), attempt=1)
+    assert policy.backoff(1, make_response(429, retry_after=1.5)) >= 1.5
+
+
+def test_disabling_removes_only_added_statuses(policy, disable_governor):
+    governor.configure(True)
+    governor.configure(True)
+    assert policy.retry_statuses == frozenset({429, 502, 503, 504})
+    governor.configure(False)
+    assert policy.retry_statuses == frozenset({502, 503, 504})
+
+
+def _hammer_success(path, count):
+    bucket = governor.SharedTokenBucket(path, rate=10, min_rate=1, max_rate=1000)
+    for _ in range(count):
+        bucket.on_success()
+
+
+def _acquire_tokens(path, count):
+    bucket = governor.SharedTokenBucket(path, rate=20, min_rate=1, max_rate=20)
+    for _ in range(count):
+        bucket.acquire()
+
+
+def _run(target, path, workers, count):
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=target, args=(path, count)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+
+def test_shared_bucket_state_is_visible_across_instances(tmp_path):
+    path = str(tmp_path / "bucket.json")
+    first = governor.SharedTokenBucket(path, rate=10, min_rate=1, max_rate=100)
+    second = governor.SharedTokenBucket(path, rate=10, min_rate=1, max_rate=100)
+    first.on_throttle(0.5)
+    assert second.rate == 5
+
+
+@pytest.mark.parametrize('raw', ['{"rate": 5.0, "tokens"', 'not json', '[]', '{"rate": "fast"}'])
+def test_shared_bucket_resets_corrupt_state(tmp_path, raw):
+    path = tmp_path / 'governor.json'
+    path.write_text(raw, encoding='utf-8')
+    bucket = governor.SharedTokenBucket(str(path), rate=10, min_rate=1, max_rate=100)
+    assert bucket.rate == 10
+    bucket.on_success()
+    assert json.loads(path.read_text(encoding='utf-8'))['rate'] == pytest.approx(10.1)
+
+
+def test_shared_bucket_updates_are_not_lost(tmp_path):
+    path = str(tmp_path / "bucket.json")
+    _run(_hammer_success, path, workers=4, count=25)
+
+    expected = 10.0
+    for _ in range(100):
+        expected += 1 / expected
+    bucket = governor.SharedTokenBucket(path, rate=10, min_rate=1, max_rate=1000)
+    assert bucket.rate == pytest.approx(expected)
+
+
+def test_shared_bucket_limits_combined_rate(tmp_path):
+    path = str(tmp_path / "bucket.json")
+    start = time.time()
+    _run(_acquire_tokens, path, workers=3, count=4)
+    # 12 個 token、速率 20/秒：第一個立即可用，其餘至少 11/20 秒
+    assert time.time() - start >= 11 / 20 * 0.9
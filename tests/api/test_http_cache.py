@@ -0,0 +1,123 @@
+"""
+HTTP 條件式請求快取：新鮮度、304 重新驗證與認證類型隔離
+"""
+import pytest
+import requests
+from api import base_api, http_cache
+from tests.api.conftest import make_response
+
+URL = 'http://mock/v1/users'
+
+
+def _response(status_code=200, body=b'{"data": [1]}', **headers):
+    return make_response(status_code, body, headers)
+
+
+class _FakeServer:
+    """記錄收到的 header，依序回傳指定的回應"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, method, url, **kwargs):
+        self.requests.append(dict(kwargs.get('headers') or {}))
+        return self.responses.pop(0)
+
+
+@pytest.fixture()
+def cache():
+    http_cache.configure(True)
+    yield http_cache.get_cache()
+    http_cache.configure(False)
+
+
+def _get(monkeypatch, server, token=None):
+    monkeypatch.setattr(requests, 'request', server)
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    monkeypatch.setattr(base_api.BaseAPI, 'service_a_base_url', 'http://mock')
+    monkeypatch.setattr(base_api.BaseAPI, 'version', '/v1')
+    return base_api.BaseAPI().request('GET', '/users', headers=headers)
+
+
+def test_parse_cache_control():
+    assert http_cache.parse_cache_control('max-age=60, no-cache, private="x"') == {
+        'max-age': '60', 'no-cache': True, 'private': 'x'}
+    assert http_cache.parse_cache_control(None) == {}
+
+
+def test_fresh_entry_is_served_without_request(monkeypatch, cache):
+    server = _FakeServer(_response(**{'Cache-Control': 'max-age=60', 'ETag': '"v1"'}))
+    _get(monkeypatch, server, token='t')
+    response = _get(monkeypatch, server, token='t')
+
+    assert response.json() == {'data': [1]}
+    assert len(server.requests) == 1
+    assert cache.stats['hits'] == 1
+
+
+def test_stale_entry_is_revalidated_and_304_refreshes_it(monkeypatch, cache):
+    server = _FakeServer(
+        _response(**{'Cache-Control': 'no-cache', 'ETag': '"v1"', 'X-Version': '1'}),
+        _response(304, b'', **{'Cache-Control': 'max-age=60', 'ETag': '"v2"', 'X-Version': '2'}),
+    )
+    _get(monkeypatch, server, token='t')
+    response = _get(monkeypatch, server, token='t')
+
+    assert server.requests[1]['If-None-Match'] == '"v1"'
+    assert response.status_code == 200
+    assert response.json() == {'data': [1]}
+    assert response.headers['ETag'] == '"v2"'
+    assert response.headers['X-Version'] == '2'
+    assert cache.stats['revalidated'] == 1
+
+    # 304 帶回 max-age，之後直接使用快取
+    again = _get(monkeypatch, server, token='t')
+    assert again.headers['ETag'] == '"v2"'
+    assert len(server.requests) == 2
+
+
+def test_next_revalidation_uses_etag_from_304(cache):
+    key = http_cache.cache_key(URL, 'auth')
+    cache.update(key, None, _response(**{'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2026 00:00:00 GMT'}))
+    entry = cache.lookup(key)
+    cache.update(key, entry, _response(304, b'', **{'etag': '"v2"'}))
+
+    assert cache.conditional_headers(cache.lookup(key)) == {
+        'If-None-Match': '"v2"', 'If-Modified-Since': 'Mon, 01 Jan 2026 00:00:00 GMT'}
+    headers = cache.lookup(key)['headers']
+    # 不分大小寫取代，不留下重複的 header
+    assert [name for name in headers if name.lower() == 'etag'] == ['etag']
+
+
+def test_304_does_not_store_content_length(cache):
+    key = http_cache.cache_key(URL, 'auth')
+    cache.update(key, None, _response(ETag='"v1"'))
+    cache.update(key, cache.lookup(key), _response(304, b'', **{'Content-Length': '0'}))
+    response = cache.build(cache.lookup(key))
+    assert 'Content-Length' not in response.headers
+    assert response.content == b'{"data": [1]}'
+
+
+def test_auth_types_do_not_share_entries(monkeypatch, cache):
+    server = _FakeServer(
+        _response(body=b'{"data": "auth"}', **{'Cache-Control': 'max-age=60'}),
+        _response(401, b'{"error": "unauthorized"}', **{'Cache-Control': 'max-age=60'}),
+        _response(401, b'{"error": "unauthorized"}'),
+    )
+    assert _get(monkeypatch, server, token='t').json() == {'data': 'auth'}
+    # 無認證的請求不會拿到有認證的快取內容
+    assert _get(monkeypatch, server).status_code == 401
+    assert _get(monkeypatch, server).status_code == 401
+    assert len(server.requests) == 3
+    assert 'If-None-Match' not in server.requests[1]
+
+
+@pytest.mark.parametrize('headers', [
+    {'Cache-Control': 'no-store, max-age=60', 'ETag': '"v1"'},
+    {},
+])
+def test_uncacheable_responses_are_not_stored(cache, headers):
+    key = http_cache.cache_key(URL, 'auth')
+    cache.update(key, None, _response(**headers))
+    assert cache.lookup(key) is None
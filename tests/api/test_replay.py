@@ -0,0 +1,173 @@
+"""
+回應錄製 / 重播：指紋、round-trip、過期判斷與維護指令
+"""
+import time
+
+import pytest
+from api import replay
+from tests.api.conftest import make_response
+
+URL = 'http://mock/v1/users?page=1'
+
+
+def _response(headers=None):
+    return make_response(body=b'{"data": []}', url=URL, headers=headers or {
+        'Content-Type': 'application/json', 'X-Request-Id': 'abc'})
+
+
+@pytest.fixture()
+def store_path(tmp_path):
+    return str(tmp_path / 'replay' / 'responses.db')
+
+
+@pytest.fixture()
+def recording(store_path):
+    yield store_path
+    replay.configure(replay.MODE_OFF)
+
+
+def _age(store_path, key, seconds):
+    store = replay.ResponseStore(store_path)
+    with store._lock:
+        store._conn.execute(
+            'UPDATE responses SET recorded_at = recorded_at - ? WHERE fingerprint = ?',
+            (seconds, key))
+        store._conn.commit()
+    store.close()
+
+
+def test_fingerprint_is_stable():
+    first = replay.fingerprint('get', URL, 'auth', {'b': 1, 'a': [1, 2]})
+    second = replay.fingerprint('GET', URL, 'auth', {'a': [1, 2], 'b': 1})
+    assert first == second
+    assert first == replay.fingerprint('GET', URL, 'auth', '{"a":[1,2],"b":1}')
+    assert len(first) == 64
+
+
+@pytest.mark.parametrize('changed', [
+    ('POST', URL, 'auth', None),
+    ('GET', URL + '&limit=5', 'auth', None),
+    ('GET', URL, 'no-auth', None),
+    ('GET', URL, 'auth', {'a': 1}),
+])
+def test_fingerprint_distinguishes_requests(changed):
+    assert replay.fingerprint('GET', URL, 'auth', None) != replay.fingerprint(*changed)
+
+
+def test_empty_body_forms_share_a_fingerprint():
+    assert replay.fingerprint('GET', URL, 'auth', None) == replay.fingerprint('GET', URL, 'auth', b'')
+
+
+def test_store_round_trip(store_path):
+    store = replay.ResponseStore(store_path)
+    response = _response(headers={
+        'Content-Type': 'application/json', 'Content-Encoding': 'gzip', 'Content-Length': '10'})
+    store.put('key', 'get', URL, 'auth', response, version='v1')
+    entry = store.get('key')
+    store.close()
+
+    assert entry['method'] == 'GET'
+    assert entry['status_code'] == 200
+    assert entry['body'] == b'{"data": []}'
+    assert entry['version'] == 'v1'
+    # 已解壓縮的 body 不再帶 content-encoding / length
+    assert entry['headers'] == {'Content-Type': 'application/json'}
+
+
+def test_record_then_replay(recording):
+    key = replay.fingerprint('GET', URL, 'auth')
+    replay.configure(replay.MODE_RECORD, path=recording, version='v1')
+    replay.save(key, 'GET', URL, 'auth', _response())
+    before = replay.stats()
+
+    replay.configure(replay.MODE_REPLAY, path=recording, version='v1')
+    response = replay.load(key)
+
+    assert replay.mode() == replay.MODE_REPLAY
+    assert response.status_code == 200
+    assert response.json() == {'data': []}
+    assert response.headers['x-request-id'] == 'abc'
+    assert response.url == URL
+    assert replay.stats()['hits'] == before['hits'] + 1
+
+
+def test_replay_miss_raises(recording):
+    replay.configure(replay.MODE_REPLAY, path=recording)
+    with pytest.raises(replay.ReplayMissError, match='No recorded response'):
+        replay.load('missing')
+
+
+def test_replay_rejects_other_version(recording):
+    key = replay.fingerprint('GET', URL, 'auth')
+    replay.configure(replay.MODE_RECORD, path=recording, version='v1')
+    replay.save(key, 'GET', URL, 'auth', _response())
+
+    replay.configure(replay.MODE_REPLAY, path=recording, version='v2')
+    with pytest.raises(replay.ReplayMissError, match='stale'):
+        replay.load(key)
+
+
+def test_replay_rejects_old_entries(recording):
+    key = replay.fingerprint('GET', URL, 'auth')
+    replay.configure(replay.MODE_RECORD, path=recording)
+    replay.save(key, 'GET', URL, 'auth', _response())
+    replay.configure(replay.MODE_OFF)
+    _age(recording, key, 120)
+
+    replay.configure(replay.MODE_REPLAY, path=recording, max_age=60)
+    with pytest.raises(replay.ReplayMissError, match='stale'):
+        replay.load(key)
+    replay.configure(replay.MODE_REPLAY, path=recording, max_age=600)
+    assert replay.load(key).status_code == 200
+
+
+def test_is_stale():
+    entry = {'recorded_at': time.time() - 100, 'version': 'v1'}
+    assert not replay.is_stale(entry)
+    assert not replay.is_stale(entry, max_age=200, version='v1')
+    assert replay.is_stale(entry, max_age=50)
+    assert replay.is_stale(entry, version='v2')
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match='Unsupported replay mode'):
+        replay.configure('rewind')
+
+
+@pytest.fixture()
+def populated(store_path):
+    store = replay.ResponseStore(store_path)
+    store.put('fresh', 'GET', URL, 'auth', _response(), version='v2')
+    store.put('old-version', 'GET', URL + '&page=2', 'auth', _response(), version='v1')
+    store.put('expired', 'GET', URL + '&page=3', 'no-auth', _response(), version='v2')
+    store.close()
+    _age(store_path, 'expired', 1000)
+    return store_path
+
+
+def test_cli_stats(populated, capsys):
+    replay.main(['stats', '--store', populated, '--max-age', '500', '--version', 'v2'])
+    assert capsys.readouterr().out.splitlines() == ['entries: 3', 'versions: v1, v2', 'stale: 2']
+
+
+def test_cli_stale_lists_entries(populated, capsys):
+    replay.main(['stale', '--store', populated, '--max-age', '500', '--version', 'v2'])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert any('page=2' in line and 'version=v1' in line for line in lines)
+    assert any('page=3' in line and '[no-auth]' in line for line in lines)
+
+
+def test_cli_prune_deletes_only_stale(populated, capsys):
+    replay.main(['prune', '--store', populated, '--max-age', '500', '--version', 'v2'])
+    assert capsys.readouterr().out.strip() == 'pruned: 2'
+
+    store = replay.ResponseStore(populated)
+    assert [entry['fingerprint'] for entry in store.entries()] == ['fresh']
+    store.close()
+
+
+def test_cli_requires_existing_store(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        replay.main(['stats', '--store', str(tmp_path / 'missing.db')])
+    assert 'store not found' in capsys.readouterr().err
@@ -0,0 +1,137 @@
+"""
+重試策略：退避、Retry-After 下限、冪等判斷與重試額度
+以假的 requests.request 驅動 BaseAPI._send，不經網路、不實際等待。
+"""
+import pytest
+import requests
+from api import base_api, retry
+from tests.api.conftest import make_response
+
+URL = 'http://mock/v1/users'
+
+
+class _FakeSend:
+    """依序回傳指定的回應或拋出指定的例外"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def __call__(self, method, url, **kwargs):
+        self.calls.append(method)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(base_api.time, 'sleep', recorded.append)
+    return recorded
+
+
+def _send(monkeypatch, fake, method='GET', headers=None):
+    monkeypatch.setattr(requests, 'request', fake)
+    return base_api.BaseAPI()._send(method, URL, headers=headers)
+
+
+def test_backoff_ceiling_doubles_up_to_max(monkeypatch, policy):
+    monkeypatch.setattr(retry.random, 'uniform', lambda low, high: high)
+    assert [policy.backoff(attempt) for attempt in range(1, 7)] == [0.5, 1, 2, 4, 8, 8]
+
+
+def test_backoff_uses_full_jitter(monkeypatch, policy):
+    bounds = []
+    monkeypatch.setattr(retry.random, 'uniform', lambda low, high: bounds.append((low, high)) or low)
+    assert policy.backoff(3) == 0
+    assert bounds == [(0, 2)]
+
+
+def test_retry_after_is_a_lower_bound(policy):
+    assert policy.backoff(1, make_response(503, retry_after=3)) >= 3
+    # 超過 backoff_max 仍以 Retry-After 為準
+    assert policy.backoff(1, make_response(503, retry_after=20)) >= 20
+    assert policy.backoff(1, make_response(503, retry_after='Wed, 21 Oct 2026 07:28:00 GMT')) <= 0.5
+
+
+def test_retry_after_beyond_limit_is_not_retried(policy):
+    policy.retry_after_max = 30
+    assert policy.should_retry_response('GET', {}, make_response(503, retry_after=30), 1)
+    assert not policy.should_retry_response('GET', {}, make_response(503, retry_after=31), 1)
+
+
+def test_status_retry_requires_idempotency(policy):
+    assert policy.should_retry_response('GET', {}, make_response(503), 1)
+    assert policy.should_retry_response('put', {}, make_response(502), 1)
+    assert not policy.should_retry_response('POST', {}, make_response(503), 1)
+    assert policy.should_retry_response('POST', {'Idempotency-Key': 'k'}, make_response(503), 1)
+    assert not policy.should_retry_response('GET', {}, make_response(500), 1)
+
+
+def test_error_retry_depends_on_whether_request_was_sent(policy):
+    connect = requests.exceptions.ConnectTimeout()
+    read = requests.exceptions.ReadTimeout()
+    assert policy.should_retry_error('POST', {}, connect, 1)
+    assert not policy.should_retry_error('POST', {}, read, 1)
+    assert policy.should_retry_error('GET', {}, read, 1)
+    assert not policy.should_retry_error('GET', {}, ValueError(), 1)
+
+
+def test_max_attempts_stops_retries(policy):
+    assert policy.should_retry_response('GET', {}, make_response(503), 2)
+    assert not policy.should_retry_response('GET', {}, make_response(503), 3)
+
+
+def test_budget_is_shared_and_exhausted(policy):
+    policy.budget = 2
+    assert policy.should_retry_response('GET', {}, make_response(503), 1)
+    assert policy.should_retry_error('GET', {}, requests.exceptions.ConnectTimeout(), 1)
+    assert not policy.should_retry_response('GET', {}, make_response(503), 1)
+    assert policy.retries_used == 2
+
+
+def test_send_retries_until_success(monkeypatch, policy, sleeps):
+    fake = _FakeSend(make_response(503, retry_after=2), make_response(502), make_response(200))
+    response = _send(monkeypatch, fake)
+
+    assert response.status_code == 200
+    assert len(fake.calls) == 3
+    assert len(sleeps) == 2
+    assert sleeps[0] >= 2
+    assert sleeps[1] <= 1
+
+
+def test_send_returns_last_response_when_attempts_run_out(monkeypatch, policy, sleeps):
+    fake = _FakeSend(make_response(503), make_response(503), make_response(503))
+    assert _send(monkeypatch, fake).status_code == 503
+    assert len(fake.calls) == 3
+
+
+def test_send_does_not_retry_non_idempotent(monkeypatch, policy, sleeps):
+    fake = _FakeSend(make_response(503))
+    assert _send(monkeypatch, fake, method='POST').status_code == 503
+    assert sleeps == []
+
+
+def test_send_retries_post_with_idempotency_key(monkeypatch, policy, sleeps):
+    fake = _FakeSend(make_response(503), make_response(201))
+    response = _send(monkeypatch, fake, method='POST', headers={'Idempotency-Key': 'k'})
+    assert response.status_code == 201
+    assert fake.calls == ['POST', 'POST']
+
+
+def test_send_raises_after_connection_errors(monkeypatch, policy, sleeps):
+    fake = _FakeSend(*[requests.exceptions.ConnectionError('down')] * 3)
+    with pytest.raises(requests.exceptions.RequestException, match='down'):
+        _send(monkeypatch, fake)
+    assert len(fake.calls) == 3
+
+
+def test_send_stops_when_budget_is_spent(monkeypatch, policy, sleeps):
+    policy.budget = 1
+    fake = _FakeSend(make_response(503), make_response(503), make_response(200), make_response(503))
+    assert _send(monkeypatch, fake).status_code == 503
+    assert _send(monkeypatch, _FakeSend(make_response(503))).status_code == 503
+    assert len(sleeps) == 1
@@ -0,0 +1,92 @@
+"""
+增量執行的案例指紋與程式碼 hash
+"""
+import pytest
+from common import impact
+from common.registry import Endpoint
+
+ENDPOINT = Endpoint(module="users", api_name="get_users", method="GET", path="/users")
+CASE = {"case_id": "TC001", "page": "1", "limit": "10"}
+
+
+@pytest.fixture()
+def data_root(tmp_path, monkeypatch):
+    # Endpoint 的路徑以 ./{test_data_folder} 組成，需在測試資料的上層目錄執行
+    monkeypatch.chdir(tmp_path)
+    expected = tmp_path / "data" / "dev" / "users" / "expected_result" / "get_users"
+    expected.mkdir(parents=True)
+    (expected / "TC001.json").write_text('{"data": []}', encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture()
+def code_root(tmp_path):
+    impact.code_hash.cache_clear()
+    (tmp_path / "api").mkdir()
+    (tmp_path / "api" / "base_api.py").write_text("VALUE = 1\n", encoding="utf-8")
+    (tmp_path / "api" / "__pycache__").mkdir()
+    yield tmp_path
+    impact.code_hash.cache_clear()
+
+
+def _fingerprint(case=CASE, **overrides):
+    arguments = dict(test_data_folder="data", env="dev", code="code", target="http://mock")
+    arguments.update(overrides)
+    return impact.case_fingerprint(ENDPOINT, case, **arguments)
+
+
+def test_fingerprint_is_stable(data_root):
+    reordered = dict(reversed(list(CASE.items())))
+    assert _fingerprint() == _fingerprint()
+    assert _fingerprint(reordered) == _fingerprint()
+
+
+@pytest.mark.parametrize("changed", [
+    {"case": {**CASE, "limit": "20"}},
+    {"case": {**CASE, "sort": "name"}},
+    {"env": "staging"},
+    {"code": "other"},
+    {"target": "http://staging"},
+])
+def test_fingerprint_changes_with_inputs(data_root, changed):
+    assert _fingerprint(**changed) != _fingerprint()
+
+
+def test_fingerprint_changes_with_expected_json(data_root):
+    before = _fingerprint()
+    expected = data_root / "data" / "dev" / "users" / "expected_result" / "get_users" / "TC001.json"
+    expected.write_text('{"data": [1]}', encoding="utf-8")
+    assert _fingerprint() != before
+
+
+def test_fingerprint_changes_when_schema_appears(data_root):
+    before = _fingerprint()
+    schema = data_root / "data" / "dev" / "users" / "schema"
+    schema.mkdir(parents=True)
+    (schema / "get_users.json").write_text('{"type": "object"}', encoding="utf-8")
+    assert _fingerprint() != before
+
+
+def test_code_hash_tracks_python_sources(code_root):
+    root = str(code_root)
+    before = impact.code_hash(root, ("api",))
+
+    (code_root / "api" / "__pycache__" / "base_api.cpython-311.pyc").write_bytes(b"\0")
+    (code_root / "api" / "notes.txt").write_text("ignored", encoding="utf-8")
+    impact.code_hash.cache_clear()
+    assert impact.code_hash(root, ("api",)) == before
+
+    (code_root / "api" / "base_api.py").write_text("VALUE = 2\n", encoding="utf-8")
+    impact.code_hash.cache_clear()
+    assert impact.code_hash(root, ("api",)) != before
+
+
+def test_code_hash_includes_extra_files(code_root):
+    root = str(code_root)
+    (code_root / "conftest.py").write_text("A = 1\n", encoding="utf-8")
+    before = impact.code_hash(root, ("api",), ("conftest.py",))
+
+    (code_root / "conftest.py").write_text("A = 2\n", encoding="utf-8")
+    impact.code_hash.cache_clear()
+    assert impact.code_hash(root, ("api",), ("conftest.py",)) != before
+    assert impact.code_hash(root, ("api",)) != before
@@ -0,0 +1,40 @@
+"""
+JSON 編解碼：實作於第一次使用時依 config 決定
+"""
+import pytest
+import config
+from common import json_codec
+
+
+@pytest.fixture()
+def unresolved(monkeypatch):
+    previous = json_codec._backend['name']
+    monkeypatch.setitem(json_codec._backend, 'name', None)
+    config.settings.__dict__.pop('JSON_CODEC', None)
+    yield
+    config.settings.__dict__.pop('JSON_CODEC', None)
+    json_codec._backend['name'] = previous
+
+
+def test_setting_is_read_on_first_use(monkeypatch, unresolved):
+    # import 之後才設定（例如由 .env 載入）仍然生效
+    monkeypatch.setenv('JSON_CODEC', 'json')
+    assert json_codec.loads(b'{"a": 1}') == {'a': 1}
+    assert json_codec.backend() == 'json'
+
+
+def test_auto_prefers_orjson_when_installed(monkeypatch, unresolved):
+    monkeypatch.setenv('JSON_CODEC', 'auto')
+    assert json_codec.backend() == ('orjson' if json_codec.orjson is not None else 'json')
+
+
+def test_unknown_codec_is_rejected(monkeypatch, unresolved):
+    monkeypatch.setenv('JSON_CODEC', 'yaml')
+    with pytest.raises(ValueError, match='Unknown JSON codec'):
+        json_codec.dumps({'a': 1})
+
+
+def test_non_finite_floats(monkeypatch):
+    monkeypatch.setitem(json_codec._backend, 'name', 'json')
+    assert json_codec.dumps(float('nan')) == 'NaN'
+    assert str(json_codec.loads(b'[NaN]')[0]) == 'nan'
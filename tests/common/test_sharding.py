@@ -0,0 +1,83 @@
+"""
+跨機器分片：分配、LPT 平衡、中位數估計與結果合併
+"""
+import random
+from collections import Counter
+
+import pytest
+from common import sharding
+
+KEYS = [f"users/get_users/TC{index:03d}" for index in range(1, 24)]
+
+
+@pytest.mark.parametrize("durations", [None, {key: float(index % 7 + 1) for index, key in enumerate(KEYS)}])
+@pytest.mark.parametrize("shard_count", [1, 3, 5])
+def test_every_case_lands_on_exactly_one_shard(durations, shard_count):
+    assignment = sharding.assign(KEYS + KEYS[:3], shard_count, durations)
+    assert set(assignment) == set(KEYS)
+    assert set(assignment.values()) <= set(range(shard_count))
+
+
+@pytest.mark.parametrize("durations", [None, {key: float(len(key) % 5 + 1) for key in KEYS}])
+def test_split_does_not_depend_on_collection_order(durations):
+    shuffled = list(KEYS)
+    random.Random(7).shuffle(shuffled)
+    assert sharding.assign(shuffled, 4, durations) == sharding.assign(KEYS, 4, durations)
+
+
+def test_without_timings_counts_differ_by_at_most_one():
+    counts = Counter(sharding.assign(KEYS, 4).values())
+    assert max(counts.values()) - min(counts.values()) <= 1
+
+
+def test_lpt_balances_total_time():
+    durations = {key: float(index + 1) for index, key in enumerate(KEYS)}
+    assignment = sharding.assign(KEYS, 3, durations)
+    loads = [0.0] * 3
+    for key, shard in assignment.items():
+        loads[shard] += durations[key]
+    # LPT：最重與最輕分片的差距不超過單一最長案例
+    assert max(loads) - min(loads) <= max(durations.values())
+
+
+def test_lpt_places_longest_cases_on_separate_shards():
+    durations = {"a": 10.0, "b": 9.0, "c": 1.0, "d": 1.0}
+    assignment = sharding.assign(list(durations), 2, durations)
+    assert assignment["a"] != assignment["b"]
+
+
+def test_unknown_cases_are_weighted_by_median():
+    keys = ["a", "b", "c", "d", "new"]
+    durations = {"a": 8.0, "b": 7.0, "c": 6.0, "d": 1.0}
+    assignment = sharding.assign(keys, 2, durations)
+    assert assignment == sharding.assign(keys, 2, {**durations, "new": 6.5})
+    assert assignment != sharding.assign(keys, 2, {**durations, "new": 1.0})
+
+
+def test_merge_results_and_timings(tmp_path):
+    first, second, output = tmp_path / "shard-0", tmp_path / "shard-1", tmp_path / "merged"
+    (first / "history").mkdir(parents=True)
+    second.mkdir()
+    (first / "a-result.json").write_text("{}", encoding="utf-8")
+    (first / "history" / "history.json").write_text("{}", encoding="utf-8")
+    (first / "environment.properties").write_text("shard=0", encoding="utf-8")
+    (second / "b-result.json").write_text("{}", encoding="utf-8")
+    (second / "environment.properties").write_text("shard=1", encoding="utf-8")
+    sharding.save_timings(str(tmp_path / "timings-0.json"), {"a": 1.0, "shared": 2.0})
+    sharding.save_timings(str(tmp_path / "timings-1.json"), {"b": 3.0, "shared": 4.0})
+
+    exit_code = sharding.main([
+        "merge", "--results", str(first), str(second), "--output", str(output),
+        "--timings", str(tmp_path / "timings-0.json"), str(tmp_path / "timings-1.json"),
+        "--timings-output", str(tmp_path / "timings.json"),
+    ])
+
+    assert exit_code == 0
+    merged = sorted(str(path.relative_to(output)) for path in output.rglob("*") if path.is_file())
+    assert merged == ["a-result.json", "b-result.json", "environment.properties", "history/history.json"]
+    assert (output / "environment.properties").read_text(encoding="utf-8") == "shard=1"
+    assert sharding.load_timings(str(tmp_path / "timings.json")) == {"a": 1.0, "b": 3.0, "shared": 4.0}
+
+
+def test_load_timings_missing_file(tmp_path):
+    assert sharding.load_timings(str(tmp_path / "missing.json")) == {}
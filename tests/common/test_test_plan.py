@@ -0,0 +1,65 @@
+"""
+測試計畫檔過期判斷與資源釋放
+"""
+import os
+
+import pytest
+from common import test_plan
+
+
+@pytest.fixture()
+def data_root(tmp_path):
+    module = tmp_path / "dev" / "users"
+    (module / "expected_result").mkdir(parents=True)
+    (module / "get_users.csv").write_text("case_id,case_description\nTC001,first\n", encoding="utf-8")
+    (module / "expected_result" / "TC001.json").write_text('{"a": 1}', encoding="utf-8")
+    return tmp_path
+
+
+def _build(data_root):
+    path = test_plan.build(str(data_root), "dev", str(data_root / "dev.plan"))
+    return test_plan.TestPlan(path)
+
+
+def test_fresh_plan_is_not_stale(data_root):
+    plan = _build(data_root)
+    assert not plan.is_stale(str(data_root / "dev"))
+    plan.close()
+
+
+def test_rename_is_detected(data_root):
+    plan = _build(data_root)
+    folder = data_root / "dev" / "users" / "expected_result"
+    os.rename(folder / "TC001.json", folder / "TC002.json")
+    assert plan.is_stale(str(data_root / "dev"))
+    plan.close()
+
+
+def test_edit_keeping_mtime_is_detected(data_root):
+    plan = _build(data_root)
+    target = data_root / "dev" / "users" / "expected_result" / "TC001.json"
+    stat = target.stat()
+    target.write_text('{"a": 100}', encoding="utf-8")
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert plan.is_stale(str(data_root / "dev"))
+    plan.close()
+
+
+def test_ensure_rebuilds_stale_plan(data_root):
+    path = str(data_root / "dev.plan")
+    test_plan.build(str(data_root), "dev", path)
+    target = data_root / "dev" / "users" / "expected_result" / "TC001.json"
+    target.write_text('{"a": 2}', encoding="utf-8")
+    test_plan.ensure(str(data_root), "dev", path)
+    plan = test_plan.TestPlan(path)
+    assert plan.expected_bytes("users/expected_result/TC001.json") == b'{"a": 2}'
+    plan.close()
+
+
+def test_close_releases_mmap(data_root):
+    plan = _build(data_root)
+    assert plan.find_case_id("users/get_users", "TC001")["case_description"] == "first"
+    plan.close()
+    assert plan._mm.closed
+    with pytest.raises(ValueError):
+        plan._view[0]
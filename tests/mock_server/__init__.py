@@ -0,0 +1 @@
+# Mock Server 測試
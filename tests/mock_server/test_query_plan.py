@@ -0,0 +1,92 @@
+"""
+Mock DB 查詢計畫測試
+mock_server.db 白名單內的每個篩選都必須走索引（EXPLAIN QUERY PLAN 不可出現整表掃描），
+排序不可需要暫存 B-tree，確保百萬筆的 Mock 資料表仍可快速查詢。
+"""
+import sqlite3
+
+import pytest
+from mock_server import db as mock_db
+from mock_server import init_mock_db
+
+# 各篩選參數的範例值
+SAMPLE_VALUES = {
+    "is_active": "true",
+    "status": "active",
+    "email": "user1",
+    "created_at_from": "2025-03-01T00:00:00Z",
+    "created_at_to": "2025-06-01T00:00:00Z",
+}
+
+FILTER_CASES = [
+    (table, name)
+    for table, fields in mock_db.QUERY_FIELDS.items()
+    for name in fields["filters"]
+]
+# 與排序併用時也不可需要暫存 B-tree 的等值篩選
+EQUALITY_FILTERS = {"users": {"is_active": "true"}, "customers": {"status": "active"}}
+
+SORT_CASES = [
+    (table, f"{direction}{column}")
+    for table, fields in mock_db.QUERY_FIELDS.items()
+    for column in fields["sort"]
+    for direction in ("", "-")
+]
+
+
+@pytest.fixture(scope="module")
+def connection():
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    init_mock_db.create_schema(cursor)
+    init_mock_db.insert_synthetic_rows(cursor, 2000)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _plan(connection, sql: str, params: tuple) -> list:
+    return [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+@pytest.mark.parametrize("table, name", FILTER_CASES)
+def test_filter_uses_index(connection, table, name):
+    query = mock_db.parse_query(table, {"page": "1", "limit": "10", name: SAMPLE_VALUES[name]})
+    select_sql, params = query.select_sql(table)
+    count_sql, count_params = query.count_sql(table)
+    for sql, sql_params in ((select_sql, params + (10, 0)), (count_sql, count_params)):
+        plan = _plan(connection, sql, sql_params)
+        assert all(step.startswith("SEARCH") for step in plan if table in step), plan
+
+
+@pytest.mark.parametrize("with_filter", [False, True])
+@pytest.mark.parametrize("table, sort", SORT_CASES)
+def test_sort_without_temp_btree(connection, table, sort, with_filter):
+    args = dict(EQUALITY_FILTERS[table]) if with_filter else {}
+    args["sort"] = sort
+    query = mock_db.parse_query(table, args)
+    sql, params = query.select_sql(table)
+    plan = _plan(connection, sql, params + (10, 0))
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_filters_return_matching_rows(connection):
+    query = mock_db.parse_query(
+        "customers", {"status": "inactive", "email": "customer1", "sort": "-created_at"})
+    sql, params = query.select_sql("customers")
+    rows = connection.execute(sql, params + (50, 0)).fetchall()
+    assert rows
+    assert all(row[4] == "inactive" and row[3].startswith("customer1") for row in rows)
+    created = [row[5] for row in rows]
+    assert created == sorted(created, reverse=True)
+
+
+@pytest.mark.parametrize("args", [
+    {"unknown": "1"},
+    {"sort": "name"},
+    {"sort": "id; DROP TABLE users"},
+    {"is_active": "maybe"},
+])
+def test_rejects_unsupported_query(args):
+    with pytest.raises(mock_db.UnsupportedQuery):
+        mock_db.parse_query("users", args)
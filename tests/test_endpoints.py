@@ -0,0 +1,84 @@
+"""
+端點 API 測試
+依 test_data/endpoints.json 宣告的端點產生測試案例（端點 × CSV 每一列），
+參數化與共用登入由 conftest.py 的 pytest_generate_tests 與 auth_token fixture 提供。
+"""
+import json
+
+import allure
+import config
+import pytest
+from api.download import ResponseTooLargeError, json_body
+from utils.assert_response import Assert
+from Validator.validate_common import Validator
+from Validator.validate_schema import SchemaValidator
+
+asserter = Assert()
+
+
+def test_endpoint(is_run, api, auth_token, endpoint, case_input):
+    """
+    測試單一端點的單一案例
+
+    Args:
+        is_run: 是否執行測試 fixture
+        api: APIMethod 物件（session 共用）
+        auth_token: 登入取得的認證 token（session 共用）
+        endpoint: 端點宣告（common.registry.Endpoint）
+        case_input: 測試案例輸入（從 CSV 讀取）
+    """
+    allure.dynamic.epic(endpoint.epic)
+    allure.dynamic.feature(endpoint.feature)
+    if endpoint.story:
+        allure.dynamic.story(endpoint.story)
+    allure.dynamic.severity(endpoint.severity)
+    allure.dynamic.title(
+        f"{case_input['case_id']} - {case_input['case_description']}"
+    )
+
+    if not is_run(run=case_input['is_run'], tags=case_input['tags']):
+        pytest.skip('Skip')
+
+    body = case_input.get('body') or '{}'
+
+    try:
+        resp = asserter.request_switch(
+            method=endpoint.method,
+            cookie_code=case_input['cookie'],
+            params_query=case_input.get('query_string', ''),
+            path=endpoint.path,
+            api=api,
+            cookie=auth_token,
+            body=json.loads(body),
+            max_body_bytes=endpoint.body_limit(case_input)
+        )
+    except ResponseTooLargeError as err:
+        pytest.fail(str(err))
+
+    resp_json = json_body(resp)
+
+    asserter.validate_status(
+        status_code=resp.status_code,
+        case_input=case_input
+    )
+
+    if endpoint.validation_mode(case_input) == 'schema':
+        validator = SchemaValidator(
+            resp_json=resp_json,
+            schema_path=endpoint.schema_path(config.TEST_DATA_FOLDER, config.ENV),
+            api_tag=endpoint.api_name
+        )
+    else:
+        validator = Validator(
+            resp_json=resp_json,
+            expected_path=endpoint.expected_path(
+                config.TEST_DATA_FOLDER, config.ENV, case_input['case_id']
+            ),
+            api_tag=endpoint.api_name
+        )
+    validator.validate()
+
+    print(
+        f"{case_input['case_id']}, {case_input['case_description']}\n"
+        f"API Path={case_input.get('query_string', '')}"
+    )
@@ -1 +0,0 @@
-# 使用者相關測試
@@ -0,0 +1,175 @@
+"""
+報告匯出的 sink 與內容去重
+"""
+import json
+import os
+
+import pytest
+from utils import report_export
+
+
+@pytest.fixture()
+def results(tmp_path):
+    folder = tmp_path / "allure-results"
+    (folder / "attachments").mkdir(parents=True)
+    (folder / "a-result.json").write_text('{"status": "passed"}', encoding="utf-8")
+    (folder / "attachments" / "log.txt").write_text("same log", encoding="utf-8")
+    (folder / "attachments" / "copy-of-log.txt").write_text("same log", encoding="utf-8")
+    return folder
+
+
+@pytest.fixture()
+def sink(tmp_path):
+    return report_export.LocalDirSink(str(tmp_path / "exported"))
+
+
+def _export(sink, folder, prefix, **kwargs):
+    exporter = report_export.ReportExporter(sink, max_workers=1, **kwargs)
+    exporter.submit_tree(str(folder), prefix)
+    return exporter.wait()
+
+
+def test_local_sink_upload_and_copy(tmp_path, sink):
+    source = tmp_path / "source.txt"
+    source.write_text("content", encoding="utf-8")
+    sink.upload(str(source), "run-1/source.txt")
+    sink.copy("run-1/source.txt", "run-2/nested/source.txt")
+
+    copied = os.path.join(sink.root, "run-2", "nested", "source.txt")
+    with open(copied, encoding="utf-8") as file_input:
+        assert file_input.read() == "content"
+    assert sink.load_manifest() == {}
+    sink.save_manifest({"version": 2, "objects": {}})
+    assert sink.load_manifest() == {"version": 2, "objects": {}}
+
+
+def test_local_sink_upload_does_not_write_through_hard_link(tmp_path, sink):
+    first = tmp_path / "first.txt"
+    first.write_text("old", encoding="utf-8")
+    sink.upload(str(first), "a.txt")
+    sink.copy("a.txt", "b.txt")
+    first.write_text("new", encoding="utf-8")
+    sink.upload(str(first), "b.txt")
+
+    with open(os.path.join(sink.root, "a.txt"), encoding="utf-8") as file_input:
+        assert file_input.read() == "old"
+
+
+def test_duplicate_content_within_one_run_is_copied(sink, results):
+    summary = _export(sink, results, "sha/20260101/allure-results")
+    assert summary["uploaded"] + summary["copied"] == 3
+    assert summary["copied"] == 1
+    assert summary["uploaded_bytes"] == summary["total_bytes"] - len("same log")
+
+
+def test_new_timestamp_prefix_reuses_stored_content(sink, results):
+    _export(sink, results, "sha/20260101/allure-results")
+    summary = _export(sink, results, "sha/20260102/allure-results")
+
+    assert summary["uploaded"] == 0
+    assert summary["copied"] == 3
+    assert summary["uploaded_bytes"] == 0
+    exported = os.path.join(sink.root, "sha", "20260102", "allure-results", "a-result.json")
+    with open(exported, encoding="utf-8") as file_input:
+        assert json.load(file_input) == {"status": "passed"}
+
+
+def test_manifest_is_keyed_by_content(sink, results):
+    _export(sink, results, "sha/20260101/allure-results")
+    _export(sink, results, "sha/20260102/allure-results")
+
+    manifest = sink.load_manifest()
+    assert manifest["version"] == report_export.MANIFEST_VERSION
+    # 三個檔案只有兩種內容，且第二次匯出不會新增項目
+    assert len(manifest["objects"]) == 2
+    assert all(entry["key"].startswith("sha/20260101/") for entry in manifest["objects"].values())
+
+
+def test_changed_content_is_uploaded(sink, results):
+    _export(sink, results, "run-1")
+    (results / "a-result.json").write_text('{"status": "failed"}', encoding="utf-8")
+    summary = _export(sink, results, "run-2")
+
+    assert summary["uploaded"] == 1
+    assert summary["copied"] == 2
+
+
+def test_same_key_and_content_is_skipped(sink, results):
+    _export(sink, results, "run-1")
+    summary = _export(sink, results, "run-1")
+
+    # 兩份相同內容的 log 只有一個是 manifest 記錄的 key
+    assert summary["skipped"] == 2
+    assert summary["copied"] == 1
+
+
+def test_expired_entries_are_pruned(sink, results, tmp_path):
+    _export(sink, results, "run-1")
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "report.html").write_text("<html></html>", encoding="utf-8")
+    manifest = sink.load_manifest()
+    for entry in manifest["objects"].values():
+        entry["last_seen"] -= 2 * 86400
+    sink.save_manifest(manifest)
+    _export(sink, other, "run-2")
+
+    summary = _export(sink, other, "run-3", max_age_days=1)
+    assert summary["pruned"] == 2
+    assert [entry["key"] for entry in sink.load_manifest()["objects"].values()] == ["run-2/report.html"]
+
+
+def test_missing_source_falls_back_to_upload(sink, results):
+    _export(sink, results, "run-1")
+    os.remove(os.path.join(sink.root, "run-1", "a-result.json"))
+    summary = _export(sink, results, "run-2")
+
+    assert summary["uploaded"] == 1
+    assert summary["copied"] == 2
+    assert os.path.isfile(os.path.join(sink.root, "run-2", "a-result.json"))
+
+
+class _FakeS3Client:
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = []
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        body = self.objects[Key]
+        return {"Body": type("Body", (), {"read": lambda self: body})()}
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[Key] = Body
+
+    def upload_file(self, local_path, bucket, key, Config):
+        self.calls.append(("upload", key))
+        with open(local_path, "rb") as file_input:
+            self.objects[key] = file_input.read()
+
+    def copy_object(self, Bucket, Key, CopySource):
+        self.calls.append(("copy", CopySource["Key"], Key))
+        self.objects[Key] = self.objects[CopySource["Key"]]
+
+
+def test_s3_sink_uses_server_side_copy(results):
+    s3_sink = report_export.S3Sink.__new__(report_export.S3Sink)
+    s3_sink.bucket = "reports"
+    s3_sink.prefix = "api-tests"
+    s3_sink.client = _FakeS3Client()
+    s3_sink.transfer_config = None
+
+    assert s3_sink.load_manifest() == {}
+    _export(s3_sink, results, "run-1")
+    s3_sink.client.calls.clear()
+    summary = _export(s3_sink, results, "run-2")
+
+    assert summary["uploaded_bytes"] == 0
+    assert all(call[0] == "copy" for call in s3_sink.client.calls)
+    assert "api-tests/run-2/a-result.json" in s3_sink.client.objects
+    assert "api-tests/.export-manifest.json" in s3_sink.client.objects
@@ -0,0 +1,216 @@
+"""
+Validator 逐欄比對與 DeepDiff 的一致性，以及比對錯誤時的差異輸出
+"""
+import json
+import math
+
+import pytest
+from deepdiff import DeepDiff
+from Validator.validate_common import Validator
+
+ROWS = 150
+
+
+def _rows(count=ROWS, **overrides) -> list:
+    rows = [
+        {"id": index, "name": f"user_{index}", "score": index * 0.5,
+         "active": index % 2 == 0, "meta": {"tags": ["a", "b"], "level": index % 3}}
+        for index in range(count)
+    ]
+    for index, values in overrides.items():
+        rows[int(index)].update(values)
+    return rows
+
+
+@pytest.fixture()
+def validator(tmp_path):
+    path = tmp_path / "expected.json"
+    path.write_text("{}", encoding="utf-8")
+    return Validator("columnar-test", {}, str(path))
+
+
+def _normalize(diff) -> dict:
+    """DeepDiff 的 text view 與 Validator._diff 統一為 {change_type: {path: change}}"""
+    result = {}
+    for change_type, changes in dict(diff).items():
+        if isinstance(changes, dict):
+            result[change_type] = dict(changes)
+        else:
+            result[change_type] = {path: None for path in changes}
+    return result
+
+
+def _assert_same_as_deepdiff(validator, expected, actual):
+    columnar = _normalize(validator._diff(expected, actual))
+    reference = _normalize(DeepDiff(expected, actual))
+    assert columnar == reference
+    return columnar
+
+
+def test_large_list_is_compared_column_wise(validator, monkeypatch):
+    calls = []
+    original = validator._columnar_diff
+    monkeypatch.setattr(validator, "_columnar_diff", lambda *args: calls.append(1) or original(*args))
+    expected = {"data": _rows()}
+    actual = {"data": _rows(**{"3": {"name": "changed"}})}
+    _assert_same_as_deepdiff(validator, expected, actual)
+    assert calls == [1]
+
+
+def test_value_changes_match_deepdiff(validator):
+    expected = {"data": _rows(), "total": ROWS}
+    actual = {"data": _rows(**{"0": {"score": 9.5}, "120": {"name": "x"}}), "total": ROWS + 1}
+    diff = _assert_same_as_deepdiff(validator, expected, actual)
+    assert set(diff["values_changed"]) == {
+        "root['data'][0]['score']", "root['data'][120]['name']", "root['total']"}
+
+
+def test_type_changes_match_deepdiff(validator):
+    expected = {"data": _rows()}
+    actual = {"data": _rows(**{"5": {"id": "5"}, "6": {"active": 1}, "7": {"meta": None}})}
+    diff = _assert_same_as_deepdiff(validator, expected, actual)
+    assert set(diff["type_changes"]) == {
+        "root['data'][5]['id']", "root['data'][6]['active']", "root['data'][7]['meta']"}
+
+
+def test_nested_cells_match_deepdiff(validator):
+    expected = {"data": _rows()}
+    actual = {"data": _rows(**{
+        "10": {"meta": {"tags": ["a", "b", "c"], "level": 1}},
+        "11": {"meta": {"tags": ["a"], "level": 2}},
+        "12": {"meta": {"tags": ["a", "b"], "level": 0, "extra": True}},
+        "13": {"meta": {"tags": ["a", "b"], "level": "1"}},
+    })}
+    diff = _assert_same_as_deepdiff(validator, expected, actual)
+    assert set(diff) == {
+        "iterable_item_added", "iterable_item_removed", "dictionary_item_added", "type_changes"}
+
+
+def test_nan_matches_deepdiff(validator):
+    # 由 JSON 解析出的 NaN 是不同物件；DeepDiff 比對列表元素時視為相同，逐欄比對也一樣
+    expected = json.loads(json.dumps({"data": _rows(**{"4": {"score": float("nan")}})}))
+    actual = json.loads(json.dumps({"data": _rows(**{"4": {"score": float("nan")}, "9": {"id": -1}})}))
+    diff = _assert_same_as_deepdiff(validator, expected, actual)
+    assert set(diff["values_changed"]) == {"root['data'][9]['id']"}
+
+
+def test_nan_against_number_matches_deepdiff(validator):
+    expected = {"data": _rows(**{"4": {"score": float("nan")}})}
+    actual = {"data": _rows()}
+    columnar = _normalize(validator._diff(expected, actual))
+    reference = _normalize(DeepDiff(expected, actual))
+    assert set(columnar) == set(reference) == {"values_changed"}
+    assert set(columnar["values_changed"]) == set(reference["values_changed"]) == {
+        "root['data'][4]['score']"}
+    assert math.isnan(columnar["values_changed"]["root['data'][4]['score']"]["old_value"])
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda rows: rows[50].pop("name"),
+    lambda rows: rows[50].update({"unexpected": 1}),
+    lambda rows: [row.pop("score") for row in rows],
+    lambda rows: rows.append(dict(rows[0])),
+    lambda rows: rows.pop(),
+], ids=["missing-key", "extra-key", "renamed-column", "extra-row", "missing-row"])
+def test_mismatched_keys_or_lengths_fall_back_to_deepdiff(validator, mutate):
+    expected = {"data": _rows()}
+    actual = {"data": _rows(**{"2": {"name": "changed"}})}
+    mutate(actual["data"])
+    _assert_same_as_deepdiff(validator, expected, actual)
+
+
+def test_identical_documents_have_no_diff(validator):
+    assert validator._diff({"data": _rows()}, {"data": _rows()}) == {}
+
+
+def test_unexpected_error_still_prints_diff(validator, monkeypatch, capsys):
+    def broken(*args):
+        raise TypeError("columnar failure")
+
+    monkeypatch.setattr(validator, "_columnar_diff", broken)
+    validator.expected_resp = {"data": _rows()}
+    validator.resp_json = {"data": _rows(**{"1": {"name": "changed"}})}
+    with pytest.raises(AssertionError):
+        validator.validate()
+
+    output = capsys.readouterr().out
+    assert "columnar failure" in output
+    assert "root['data'][1]['name']" in output
+
+
+def test_mismatch_prints_diff_once(validator, capsys):
+    validator.expected_resp = {"data": _rows()}
+    validator.resp_json = {"data": _rows(**{"1": {"name": "changed"}})}
+    with pytest.raises(AssertionError):
+        validator.validate()
+    assert capsys.readouterr().out.count("root['data'][1]['name']") == 1
+
+
+def _many_changes(count) -> tuple:
+    expected = {"data": _rows()}
+    actual = {"data": _rows(**{str(index): {"name": f"changed_{index}"} for index in range(count)})}
+    actual["extra"] = "x" * 1000
+    return expected, actual
+
+
+def test_report_is_truncated_with_counts(validator, capsys):
+    count = Validator.MAX_REPORTED_DIFFS + 15
+    expected, actual = _many_changes(count)
+    validator.find_different(expected, actual)
+    output = capsys.readouterr().out
+
+    total = count + 1
+    assert f"Differences: {total} (values_changed: {count}, dictionary_item_added: 1)" in output
+    assert output.count("Value of items been Changes:") == Validator.MAX_REPORTED_DIFFS
+    assert f"... and {total - Validator.MAX_REPORTED_DIFFS} more difference(s)" in output
+    # 整份文件只輸出截斷的預覽
+    assert "x" * 100 not in output
+    assert len(output) < 20000
+
+
+def test_small_report_has_no_more_line(validator, capsys):
+    expected, actual = _many_changes(3)
+    validator.find_different(expected, actual)
+    output = capsys.readouterr().out
+    assert "more difference(s)" not in output
+    assert "Items added:" in output
+
+
+def test_full_diff_is_attached_as_gzip_jsonl(validator, monkeypatch, capsys):
+    import gzip
+
+    import allure
+    import config
+
+    attachments = []
+    monkeypatch.setattr(config, "DIFF_ATTACHMENT", "true", raising=False)
+    monkeypatch.setattr(allure, "attach", lambda body, **kwargs: attachments.append((body, kwargs)))
+    count = Validator.MAX_REPORTED_DIFFS * 3
+    expected, actual = _many_changes(count)
+    expected["data"][0]["id"] = "0"
+    validator.find_different(expected, actual)
+    capsys.readouterr()
+
+    assert len(attachments) == 1
+    body, kwargs = attachments[0]
+    assert kwargs == {"name": "columnar-test full diff", "extension": "jsonl.gz"}
+    records = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+    assert len(records) == count + 2
+    by_path = {record["path"]: record for record in records}
+    assert by_path["root['data'][7]['name']"] == {
+        "type": "values_changed", "path": "root['data'][7]['name']",
+        "expected": "user_7", "actual": "changed_7"}
+    assert by_path["root['extra']"]["actual"] == "x" * 1000
+    assert by_path["root['data'][0]['id']"] == {
+        "type": "type_changes", "path": "root['data'][0]['id']", "expected": "0", "actual": 0}
+
+
+def test_no_attachment_by_default(validator, monkeypatch, capsys):
+    import allure
+    import config
+
+    attachments = []
+    monkeypatch.setattr(config, "DIFF_ATTACHMENT", "false", raising=False)
+    monkeypatch.setattr(allure, "attach", lambda body, **kwargs: attachments.append(body))
+    validator.find_different(*_many_changes(3))
+    assert attachments == []
@@ -0,0 +1,119 @@
+"""
+Schema 驗證模式測試
+compile_schema 支援的關鍵字（type、required、enum / $enum、巢狀 items）與錯誤路徑文字，
+以及 SchemaValidator 的通過 / 失敗行為。
+"""
+import json
+
+import pytest
+from common import constants
+from Validator.validate_schema import SchemaValidator, compile_schema
+
+CUSTOMER_SCHEMA = {
+    "type": "object",
+    "required": ["data"],
+    "properties": {
+        "data": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["id", "status"],
+                "properties": {
+                    "id": {"type": "integer", "minimum": 1},
+                    "status": {"type": "string", "$enum": "CUSTOMER_STATUSES"},
+                    "tags": {"type": "array", "items": {"enum": ["a", "b"]}},
+                },
+            },
+        },
+    },
+}
+
+
+def _errors(schema, value) -> list:
+    errors = []
+    compile_schema(schema)(value, "root", errors)
+    return errors
+
+
+def _valid_customer(**overrides) -> dict:
+    customer = {"id": 1, "status": constants.CUSTOMER_STATUSES[0], "tags": ["a"]}
+    customer.update(overrides)
+    return customer
+
+
+def test_valid_document_passes():
+    assert _errors(CUSTOMER_SCHEMA, {"data": [_valid_customer(), _valid_customer(id=2)]}) == []
+
+
+@pytest.mark.parametrize("schema, value, message", [
+    ({"type": "integer"}, "1", "expected type integer, got str"),
+    ({"type": "integer"}, True, "expected type integer, got bool"),
+    ({"type": ["string", "null"]}, 1, "expected type string | null, got int"),
+    ({"type": "number"}, None, "expected type number, got NoneType"),
+])
+def test_type_errors(schema, value, message):
+    assert _errors(schema, value) == [("root", message)]
+
+
+def test_type_mismatch_skips_other_keywords():
+    assert _errors({"type": "string", "enum": ["x"]}, 1) == [("root", "expected type string, got int")]
+
+
+def test_required_property_missing():
+    assert _errors(CUSTOMER_SCHEMA, {}) == [("root['data']", "required property is missing")]
+
+
+def test_enum_error():
+    errors = _errors({"enum": ["a", "b"]}, "c")
+    assert errors == [("root", "'c' is not one of ['a', 'b']")]
+
+
+def test_constants_enum_error():
+    errors = _errors({"$enum": "CUSTOMER_STATUSES"}, "unknown")
+    assert errors == [("root", f"'unknown' is not one of {list(constants.CUSTOMER_STATUSES)}")]
+
+
+def test_unknown_constants_enum_raises():
+    with pytest.raises(ValueError):
+        compile_schema({"$enum": "NO_SUCH_CONSTANT"})
+
+
+def test_nested_item_error_paths():
+    document = {"data": [
+        _valid_customer(),
+        _valid_customer(id=0, tags=["a", "z"]),
+        {"status": "unknown"},
+    ]}
+    errors = _errors(CUSTOMER_SCHEMA, document)
+    assert errors == [
+        ("root['data'][1]['id']", "0 is less than minimum 1"),
+        ("root['data'][1]['tags'][1]", "'z' is not one of ['a', 'b']"),
+        ("root['data'][2]['id']", "required property is missing"),
+        ("root['data'][2]['status']",
+         f"'unknown' is not one of {list(constants.CUSTOMER_STATUSES)}"),
+    ]
+
+
+def test_additional_properties_false():
+    schema = {"type": "object", "properties": {"a": {}}, "additionalProperties": False}
+    assert _errors(schema, {"a": 1, "b": 2}) == [("root['b']", "additional property is not allowed")]
+
+
+@pytest.fixture()
+def schema_path(tmp_path):
+    path = tmp_path / "get_customers.json"
+    path.write_text(json.dumps(CUSTOMER_SCHEMA), encoding="utf-8")
+    return str(path)
+
+
+def test_schema_validator_passes(schema_path):
+    SchemaValidator("schema-test-pass", {"data": [_valid_customer()]}, schema_path).validate()
+
+
+def test_schema_validator_fails_with_report(schema_path, capsys):
+    validator = SchemaValidator("schema-test-fail", {"data": [{"id": "1"}]}, schema_path)
+    with pytest.raises(AssertionError, match="2 schema violation"):
+        validator.validate()
+    output = capsys.readouterr().out
+    assert "Path: root['data'][0]['id']\nexpected type integer, got str" in output
+    assert "Path: root['data'][0]['status']\nrequired property is missing" in output
@@ -19,7 +19,8 @@ class Assert:
         cookie: str,
         body: dict = {},
         params_query: str = '',
-        service: str = 'service_a'
+        service: str = 'service_a',
+        max_body_bytes: int = None
     ):
         """
         Args:
@@ -31,6 +32,7 @@ class Assert:
             body: 請求 body
             params_query: 查詢參數字串
             service: 服務選擇
+            max_body_bytes: 回應本文大小上限（未指定時使用 MAX_BODY_BYTES）
 
         Returns:
             requests.Response: HTTP 回應物件
@@ -42,7 +44,8 @@ class Assert:
             params_query=params_query,
             cookie_code=cookie_code,
             path=path,
-            service=service
+            service=service,
+            max_body_bytes=max_body_bytes
         )
 
     def validate_status(self, status_code: int, case_input: dict):
@@ -2,8 +2,6 @@
 認證工具
 處理各種認證類型的 token/cookie 生成
 """
-import pytest
-
 
 def get_cookie(_type: str, cookie: str, service: str = 'service_a'):
     """
@@ -36,6 +34,7 @@ def get_cookie(_type: str, cookie: str, service: str = 'service_a'):
         else:
             return 'random_token_12345'
     else:
+        import pytest
         pytest.exit(
             f"This cookie type is not supported: {_type}",
             returncode=1
@@ -61,6 +60,7 @@ def get_x_api_key(_type: str, x_api_key: str):
     if _type == 'auth':
         return x_api_key
     else:
+        import pytest
         pytest.exit(
             f"This x_api_key type is not supported: {_type}",
             returncode=1
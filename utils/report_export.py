@@ -0,0 +1,283 @@
+"""
+測試報告匯出
+將 allure-results 與產生的報告並行上傳到可替換的目的地（sink）：
+- LocalDirSink：本機目錄
+- S3Sink：S3 相容儲存（可透過 endpoint_url 指向 MinIO 等本機替代服務）
+
+以內容 hash 做去重：manifest 以 sha256 為鍵記錄該內容第一次存放的 key，
+之後任何一次匯出（即使路徑帶有不同的 commit / 時間戳）遇到相同內容都改用伺服器端複製
+（本機目錄為 hard link），不重傳；超過保留天數未再出現的內容會從 manifest 移除。
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_NAME = '.export-manifest.json'
+MANIFEST_VERSION = 2
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """以串流方式計算檔案 sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file_input:
+        for chunk in iter(lambda: file_input.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalDirSink:
+    """
+    本機目錄 sink
+
+    Args:
+        root: 匯出的根目錄
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def load_manifest(self) -> dict:
+        path = self._path(MANIFEST_NAME)
+        if not os.path.isfile(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as file_input:
+            return json.load(file_input)
+
+    def save_manifest(self, manifest: dict):
+        with open(self._path(MANIFEST_NAME), 'w', encoding='utf-8') as file_output:
+            json.dump(manifest, file_output, sort_keys=True)
+
+    def _prepare(self, key: str) -> str:
+        # 先移除既有檔案：目標可能是與其他 key 共用的 hard link，不能就地覆寫
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.lexists(target):
+            os.remove(target)
+        return target
+
+    def upload(self, local_path: str, key: str):
+        shutil.copyfile(local_path, self._prepare(key))
+
+    def copy(self, source_key: str, key: str):
+        source = self._path(source_key)
+        target = self._prepare(key)
+        try:
+            os.link(source, target)
+        except OSError:  # 跨檔案系統或不支援 hard link
+            shutil.copyfile(source, target)
+
+
+class S3Sink:
+    """
+    S3 相容 sink
+
+    大檔案由 boto3 TransferConfig 自動切成 multipart 並行上傳。
+
+    Args:
+        bucket: bucket 名稱
+        prefix: key 前綴
+        endpoint_url: S3 相容服務位址（例如本機 MinIO: http://127.0.0.1:9000）
+        max_concurrency: 單一檔案 multipart 的並行數
+        multipart_threshold: 超過此大小（bytes）改用 multipart 上傳
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = '',
+        endpoint_url: str = None,
+        max_concurrency: int = 4,
+        multipart_threshold: int = 8 * 1024 * 1024
+    ):
+        # boto3 僅在需要匯出到 S3 時才載入
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client('s3', endpoint_url=endpoint_url or None)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_threshold,
+            max_concurrency=max_concurrency
+        )
+
+    def _key(self, key: str) -> str:
+        return f'{self.prefix}/{key}' if self.prefix else key
+
+    def load_manifest(self) -> dict:
+        try:
+            obj = self.client.get_object(
+                Bucket=self.bucket, Key=self._key(MANIFEST_NAME))
+        except self.client.exceptions.NoSuchKey:
+            return {}
+        return json.loads(obj['Body'].read())
+
+    def save_manifest(self, manifest: dict):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(MANIFEST_NAME),
+            Body=json.dumps(manifest, sort_keys=True).encode('utf-8'),
+            ContentType='application/json'
+        )
+
+    def upload(self, local_path: str, key: str):
+        self.client.upload_file(
+            local_path, self.bucket, self._key(key),
+            Config=self.transfer_config
+        )
+
+    def copy(self, source_key: str, key: str):
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            CopySource={'Bucket': self.bucket, 'Key': self._key(source_key)}
+        )
+
+
+def create_sink(
+    sink_type: str,
+    local_dir: str = 'exported_reports',
+    bucket: str = None,
+    prefix: str = '',
+    endpoint_url: str = None
+):
+    """
+    依設定建立 sink
+
+    Args:
+        sink_type: 'local' 或 's3'
+
+    Raises:
+        ValueError: 當 sink 類型不支援或缺少必要設定時
+    """
+    if sink_type == 'local':
+        return LocalDirSink(local_dir)
+    if sink_type == 's3':
+        if not bucket:
+            raise ValueError('EXPORT_S3_BUCKET is required for s3 export')
+        return S3Sink(bucket=bucket, prefix=prefix, endpoint_url=endpoint_url)
+    raise ValueError(f'Unsupported export sink: {sink_type}')
+
+
+class ReportExporter:
+    """
+    報告匯出器
+
+    submit_tree() 立即把目錄下的檔案丟進執行緒池（hash + 上傳），
+    可在 allure 產生報告的同時先匯出 allure-results；wait() 收尾並寫回 manifest。
+
+    manifest 格式：{'version': 2, 'objects': {sha256: {'key': 存放的 key, 'last_seen': epoch 秒}}}
+
+    Args:
+        sink: LocalDirSink / S3Sink
+        max_workers: 並行上傳的檔案數
+        max_age_days: manifest 保留未再出現內容的天數（應不超過目的地的保存期限）
+    """
+
+    def __init__(self, sink, max_workers: int = 8, max_age_days: float = 30):
+        self.sink = sink
+        self.max_age = max_age_days * 86400
+        self.objects = self._load_objects(sink.load_manifest())
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+        self.summary = {
+            'uploaded': 0,
+            'copied': 0,
+            'skipped': 0,
+            'pruned': 0,
+            'uploaded_bytes': 0,
+            'total_bytes': 0,
+        }
+
+    @staticmethod
+    def _load_objects(manifest: dict) -> dict:
+        # 版本不符時視為沒有 manifest，所有內容重新上傳
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest['objects']
+        return {}
+
+    def submit_tree(self, local_dir: str, key_prefix: str):
+        """將目錄下所有檔案排入匯出佇列"""
+        for root, _, files in os.walk(local_dir):
+            for name in files:
+                local_path = os.path.join(root, name)
+                relative = os.path.relpath(local_path, local_dir)
+                key = '/'.join(
+                    [key_prefix.strip('/')] + relative.split(os.sep))
+                self._futures.append(
+                    self._executor.submit(self._export_file, local_path, key)
+                )
+
+    def _export_file(self, local_path: str, key: str):
+        size = os.path.getsize(local_path)
+        digest = file_sha256(local_path)
+        now = int(time.time())
+        with self._lock:
+            self.summary['total_bytes'] += size
+            entry = self.objects.get(digest)
+            source_key = entry['key'] if entry is not None else None
+            if source_key == key:
+                entry['last_seen'] = now
+                self.summary['skipped'] += 1
+                return
+
+        copied = False
+        if source_key is not None:
+            try:
+                self.sink.copy(source_key, key)
+                copied = True
+            except Exception:  # 來源已被目的地的保存策略刪除等情況，改為重新上傳
+                source_key = None
+        if not copied:
+            self.sink.upload(local_path, key)
+
+        with self._lock:
+            entry = self.objects.get(digest)
+            if copied and entry is not None:
+                entry['last_seen'] = now
+            else:
+                self.objects[digest] = {'key': key, 'last_seen': now}
+            if copied:
+                self.summary['copied'] += 1
+            else:
+                self.summary['uploaded'] += 1
+                self.summary['uploaded_bytes'] += size
+
+    def _manifest(self) -> dict:
+        """移除超過保留天數未再出現的內容後，組成要寫回的 manifest"""
+        expires = time.time() - self.max_age
+        objects = {
+            digest: entry for digest, entry in self.objects.items()
+            if entry['last_seen'] >= expires
+        }
+        self.summary['pruned'] = len(self.objects) - len(objects)
+        return {'version': MANIFEST_VERSION, 'objects': objects}
+
+    def wait(self) -> dict:
+        """
+        等待所有檔案匯出完成並寫回 manifest
+
+        Returns:
+            dict: 匯出統計（uploaded / copied / skipped / pruned / uploaded_bytes / total_bytes）
+
+        Raises:
+            Exception: 任一檔案匯出失敗時拋出第一個錯誤
+        """
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._executor.shutdown(wait=True)
+            self.sink.save_manifest(self._manifest())
+        return dict(self.summary)